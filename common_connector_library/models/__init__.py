@@ -6,6 +6,7 @@ from . import product_product
 from . import stock_inventory
 from . import stock_quant_package
 from . import stock_picking
+from . import mrp_bom_explosion_ept
 from . import product_pricelist
 from . import product_attribute
 from . import product_attribute_value
@@ -18,5 +19,6 @@ from . import product_template
 from . import vendor_stock_ept
 from . import account_move
 from . import ir_cron
+from . import ir_module_module
 from . import data_queue_mixin_ept
 from . import account_bank_statement_line
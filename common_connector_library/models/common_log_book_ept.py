@@ -38,3 +38,41 @@ class CommonLogBookEpt(models.Model):
         seq = self.env['ir.sequence'].next_by_code('common.log.book.ept') or '/'
         vals['name'] = seq
         return super(CommonLogBookEpt, self).create(vals)
+
+    def buffer_log_lines_ept(self, log_book_vals=False):
+        """
+        Gives the log book with a context in which common.log.lines.ept.log_line_ept keeps the log
+        lines in memory instead of creating them one by one. The process must call
+        flush_log_lines_ept before each commit, so the lines of the committed records are never
+        lost with a later failure.
+        :param log_book_vals: Values of the log book to create on the first flush with lines,
+                              used when there is no log book.
+        :return: Log book with the buffering context.
+        """
+        return self.with_context(log_line_buffer_ept={'log_book_id': self.id,
+                                                      'log_book_vals': log_book_vals or {},
+                                                      'lines': []})
+
+    def flush_log_lines_ept(self):
+        """
+        Creates the buffered log lines with one create and empties the buffer, the buffering goes
+        on for the records which still use the buffering context. Without log book, it is created
+        from the buffered log book values on the first flush with lines. It does nothing when the
+        log lines are not buffered, so it can be called from any environment.
+        :return: Log book without the buffering context, empty when nothing was logged.
+        """
+        log_line_buffer = self._context.get('log_line_buffer_ept')
+        if not log_line_buffer:
+            return self
+        log_book_obj = self.env['common.log.book.ept'].with_context(log_line_buffer_ept=None)
+        log_lines_vals = log_line_buffer['lines']
+        if log_lines_vals:
+            if not log_line_buffer['log_book_id'] and log_line_buffer['log_book_vals']:
+                log_line_buffer['log_book_id'] = log_book_obj.create(
+                    log_line_buffer['log_book_vals']).id
+            for vals in log_lines_vals:
+                if not vals.get('log_book_id'):
+                    vals['log_book_id'] = log_line_buffer['log_book_id']
+            self.env['common.log.lines.ept'].create(list(log_lines_vals))
+            del log_lines_vals[:]
+        return log_book_obj.browse(log_line_buffer['log_book_id'])
@@ -15,9 +15,27 @@ class CommonLogLineEpt(models.Model):
     model_id = fields.Many2one("ir.model", string="Model")
     res_id = fields.Integer("Record ID")
 
+    @api.model
+    def log_line_ept(self, vals):
+        """
+        Creates the log line, or keeps its values in memory when the log lines are buffered by
+        common.log.book.ept.buffer_log_lines_ept, the buffered lines are created by
+        flush_log_lines_ept. While buffering nothing is created and an empty recordset is
+        returned, so use create when the log line record itself is needed.
+        :param vals: Values of the log line.
+        :return: Created log line, empty while buffering.
+        """
+        log_line_buffer = self._context.get('log_line_buffer_ept')
+        if log_line_buffer:
+            log_line_buffer['lines'].append(vals)
+            return self.browse()
+        return self.create(vals)
+
     @api.model
     def get_model_id(self, model_name):
-        model = self.env['ir.model'].search([('model', '=', model_name)])
-        if model:
-            return model.id
-        return False
+        """
+        Gives the id of the model from the registry cache of ir.model.
+        :param model_name: Technical name of the model.
+        :return: Id of the model or False.
+        """
+        return self.env['ir.model']._get_id(model_name) or False
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+from odoo import models, api, tools
+
+
+class IrModuleModule(models.Model):
+    _inherit = "ir.module.module"
+
+    @api.model
+    @tools.ormcache('module_name')
+    def is_module_installed_ept(self, module_name):
+        """
+        Checks whether the module is installed. The result is kept in the registry cache, which is
+        rebuilt when modules are installed or uninstalled.
+        :param module_name: Technical name of the module.
+        :return: True if the module is installed.
+        """
+        return bool(self.sudo().search_count([('name', '=', module_name),
+                                              ('state', '=', 'installed')]))
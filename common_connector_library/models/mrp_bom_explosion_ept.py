@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+import logging
+
+from odoo import models
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+
+class MrpBomExplosionEpt(models.AbstractModel):
+    """
+    Explodes the BOMs of the products for the connector processes. Nothing is cached between
+    calls, a caller which explodes the same products many times in one run, like the shipped
+    order processing, keeps the explosions of its run in a dictionary and passes it to each call.
+    """
+    _name = "mrp.bom.explosion.ept"
+    _description = "BOM Explosion Ept"
+
+    def explode_products_ept(self, products, company_id=False, bom_type=False,
+                             bom_explosions=None):
+        """
+        Explodes the BOMs of many products at once.
+        :param products: Product recordset.
+        :param company_id: Company id used to find the BOM.
+        :param bom_type: Type of BOM to find, False for any type.
+        :param bom_explosions: Dictionary of the explosions of the run, products already exploded
+                               in the run are not exploded again.
+        :return: Dictionary of {product_id: [(bom_line, {'qty': qty})]}, in the format of the lines
+                 of mrp.bom.explode.
+        """
+        if "mrp.bom" not in self.env:
+            return {product.id: [] for product in products}
+        if bom_explosions is None:
+            bom_explosions = {}
+        bom_line_obj = self.env["mrp.bom.line"]
+        result = {}
+        for product in products:
+            key = (product.id, company_id, bom_type)
+            if key not in bom_explosions:
+                bom_explosions[key] = self._explode_product_ept(product, company_id, bom_type)
+            result[product.id] = [(bom_line_obj.browse(bom_line_id), {"qty": qty})
+                                  for bom_line_id, qty in bom_explosions[key]]
+        return result
+
+    def explode_product_ept(self, product, company_id=False, bom_type=False, bom_explosions=None):
+        """
+        Explodes the BOM of one product.
+        :return: List of (bom_line, {'qty': qty}).
+        """
+        return self.explode_products_ept(product, company_id, bom_type,
+                                         bom_explosions).get(product.id, [])
+
+    def _explode_product_ept(self, product, company_id=False, bom_type=False):
+        """
+        Finds the BOM of the product and explodes it.
+        :return: List of (bom_line_id, qty), empty when the product has no BOM.
+        """
+        bom_point = self.env["mrp.bom"].sudo()._bom_find(product=product, company_id=company_id,
+                                                         bom_type=bom_type)
+        if not bom_point:
+            return []
+        try:
+            from_uom = product.uom_id
+            to_uom = bom_point.product_uom_id
+            factor = from_uom._compute_quantity(1, to_uom) / bom_point.product_qty
+            _bom, lines = bom_point.explode(product, factor,
+                                            picking_type=bom_point.picking_type_id)
+        except (UserError, ZeroDivisionError) as error:
+            _logger.info("Could not explode BOM %s of product %s: %s", bom_point.id,
+                         product.display_name, error)
+            return []
+        return [(bom_line.id, line_data.get("qty", 0)) for bom_line, line_data in lines]
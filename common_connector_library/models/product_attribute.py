@@ -3,6 +3,119 @@
 from odoo import models
 
 
+def _normalize_attribute_name(name):
+    return (name or '').lower()
+
+
+class AttributeIndexEpt(object):
+    """
+    In-memory index of product attributes and attribute values keyed by normalized name.
+    Attributes are loaded once when the index is built, values are loaded once per attribute on
+    first use. Missing records can be created in bulk and are added to the index.
+    """
+
+    def __init__(self, env, create_variant='always'):
+        self.env = env
+        self.create_variant = create_variant
+        self.attributes = {}
+        self.values = {}
+        attributes = env['product.attribute'].search([('create_variant', '=', create_variant)])
+        for attribute in attributes:
+            self._add_attribute(attribute)
+
+    def _add_attribute(self, attribute):
+        key = _normalize_attribute_name(attribute.name)
+        self.attributes[key] = self.attributes.get(key, self.env['product.attribute']) | attribute
+
+    def _add_value(self, value):
+        attribute_values = self.values.setdefault(value.attribute_id.id, {})
+        key = _normalize_attribute_name(value.name)
+        attribute_values[key] = attribute_values.get(key, self.env['product.attribute.value']) | value
+
+    @staticmethod
+    def _pick(records, name):
+        """ Prefers the exact match, when more than one record matches the normalized name. """
+        if len(records) > 1:
+            return records.filtered(lambda x: x.name == name)[:1] or records[:1]
+        return records
+
+    def get_attribute(self, name, type='radio', auto_create=False):
+        """
+        :param name: name of attribute
+        :param type: type of attribute
+        :param auto_create: True or False
+        :return: attribute
+        """
+        attribute = self._pick(self.attributes.get(_normalize_attribute_name(name),
+                                                   self.env['product.attribute']), name)
+        if not attribute:
+            attributes = self.env['product.attribute'].search(
+                [('name', '=ilike', name), ('create_variant', '=', self.create_variant)])
+            for record in attributes:
+                self._add_attribute(record)
+            attribute = self._pick(attributes, name)
+        if not attribute and auto_create:
+            attribute = self.env['product.attribute'].create({'name': name,
+                                                              'create_variant': self.create_variant,
+                                                              'display_type': type})
+            self._add_attribute(attribute)
+        return attribute
+
+    def _load_values(self, attribute, reload=False):
+        if reload or attribute.id not in self.values:
+            self.values[attribute.id] = {}
+            for value in self.env['product.attribute.value'].search([('attribute_id', '=', attribute.id)]):
+                self._add_value(value)
+        return self.values[attribute.id]
+
+    def get_attribute_values(self, attribute, names, auto_create=False):
+        """
+        Finds the values of an attribute for many names at once and creates all missing values
+        with a single create call.
+        :param attribute: product.attribute record
+        :param names: list of value names
+        :param auto_create: True or False
+        :return: dictionary of {name: product.attribute.value}
+        """
+        attribute_values = self._load_values(attribute)
+        result = {}
+        missing_names = {}
+        for name in names:
+            value = self._pick(attribute_values.get(_normalize_attribute_name(name),
+                                                    self.env['product.attribute.value']), name)
+            if value:
+                result[name] = value
+            else:
+                missing_names.setdefault(_normalize_attribute_name(name), name)
+        if missing_names:
+            # Values may have been created by other processes after loading, so reload once.
+            attribute_values = self._load_values(attribute, reload=True)
+            for key in list(missing_names.keys()):
+                if key in attribute_values:
+                    missing_names.pop(key)
+            for name in names:
+                if name not in result and _normalize_attribute_name(name) in attribute_values:
+                    result[name] = self._pick(attribute_values[_normalize_attribute_name(name)], name)
+        if missing_names and auto_create:
+            values = self.env['product.attribute.value'].with_context(active_id=False).create(
+                [{'name': name, 'attribute_id': attribute.id} for name in missing_names.values()])
+            for value in values:
+                self._add_value(value)
+            for name in names:
+                if name not in result:
+                    result[name] = self._pick(attribute_values.get(_normalize_attribute_name(name)), name)
+        return result
+
+    def get_attribute_value(self, attribute, name, auto_create=False):
+        """
+        :param attribute: product.attribute record
+        :param name: name of attribute value
+        :param auto_create: True or False
+        :return: attribute value or False
+        """
+        return self.get_attribute_values(attribute, [name], auto_create=auto_create).get(name, False)
+
+
 class ProductAttribute(models.Model):
     _inherit = "product.attribute"
 
@@ -25,3 +138,12 @@ class ProductAttribute(models.Model):
                 ({'name': attribute_string, 'create_variant': create_variant,
                   'display_type': type}))
         return attributes
+
+    def get_attribute_index_ept(self, create_variant='always'):
+        """
+        Builds an attribute index to be used for a whole import/export run instead of searching
+        attributes and values by name for every variant.
+        :param create_variant: when variant create
+        :return: AttributeIndexEpt
+        """
+        return AttributeIndexEpt(self.env, create_variant=create_variant)
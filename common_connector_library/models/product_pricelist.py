@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 from odoo import models
+from odoo.tools.float_utils import float_compare
 
 
 class ProductPricelist(models.Model):
@@ -51,3 +52,57 @@ class ProductPricelist(models.Model):
                 {name: new_record[name] for name in new_record._cache})
             product_pricelist_item = product_pricelist_item_obj.create(new_vals)
         return product_pricelist_item
+
+    def get_products_price_ept(self, products, partner=False):
+        """
+        Computes the pricelist price of many products with a single price rule evaluation.
+        :param products: product.product recordset
+        :param partner: partner id or False
+        :return: dictionary of {product_id: price}
+        """
+        self.ensure_one()
+        if not products:
+            return {}
+        return self.get_products_price(products, [1.0] * len(products), [partner] * len(products))
+
+    def set_products_price_ept(self, product_price_dict, min_qty=1):
+        """
+        Bulk version of set_product_price_ept. Existing items are loaded with one search, changed
+        prices are written grouped by value and missing items are created with one create call.
+        :param product_price_dict: dictionary of {product_id: price}
+        :param min_qty: qty
+        :return: product_pricelist_items
+        """
+        self.ensure_one()
+        product_pricelist_item_obj = self.env['product.pricelist.item']
+        if not product_price_dict:
+            return product_pricelist_item_obj
+        product_price_dict = {product_id: float(price or 0.0) for product_id, price in
+                              product_price_dict.items()}
+        product_pricelist_items = product_pricelist_item_obj.search(
+            [('pricelist_id', '=', self.id),
+             ('product_id', 'in', list(product_price_dict.keys())),
+             ('min_quantity', '=', min_qty)])
+
+        items_by_price = {}
+        for item in product_pricelist_items:
+            price = product_price_dict.get(item.product_id.id)
+            if float_compare(item.fixed_price, price, precision_digits=6) != 0:
+                items_by_price.setdefault(price, product_pricelist_item_obj)
+                items_by_price[price] |= item
+        for price, items in items_by_price.items():
+            items.write({'fixed_price': price})
+
+        missing_product_ids = set(product_price_dict.keys()) - set(product_pricelist_items.product_id.ids)
+        if missing_product_ids:
+            products = self.env['product.product'].browse(list(missing_product_ids))
+            vals_list = [{
+                'pricelist_id': self.id,
+                'applied_on': '0_product_variant',
+                'product_id': product.id,
+                'product_tmpl_id': product.product_tmpl_id.id,
+                'min_quantity': min_qty,
+                'fixed_price': product_price_dict.get(product.id),
+            } for product in products]
+            product_pricelist_items |= product_pricelist_item_obj.create(vals_list)
+        return product_pricelist_items
@@ -104,7 +104,7 @@ class ProductProduct(models.Model):
         """
         #Check MRP module is installed or not
         module_obj = self.env['ir.module.module']
-        mrp_module = module_obj.sudo().search([('name', '=', 'mrp'), ('state', '=', 'installed')])
+        mrp_module = module_obj.is_module_installed_ept('mrp')
         date = str(datetime.strftime(from_datetime, '%Y-%m-%d %H:%M:%S'))
         result = []
         if mrp_module :
@@ -146,7 +146,7 @@ class ProductProduct(models.Model):
         location_ids = ','.join(str(e) for e in locations.ids)
         product_list_ids = ','.join(str(e) for e in product_list)
         bom_product_ids = []
-        mrp_module = module_obj.sudo().search([('name', '=', 'mrp'), ('state', '=', 'installed')])
+        mrp_module = module_obj.is_module_installed_ept('mrp')
         if mrp_module:
                 qry = """select p.id as product_id from product_product as p
                 inner join mrp_bom as mb on mb.product_tmpl_id=p.product_tmpl_id
@@ -194,7 +194,7 @@ class ProductProduct(models.Model):
         product_list_ids = ','.join(str(e) for e in product_list)
         bom_product_ids = []
         forcasted_qty = {}
-        mrp_module = module_obj.sudo().search([('name', '=', 'mrp'), ('state', '=', 'installed')])
+        mrp_module = module_obj.is_module_installed_ept('mrp')
         if mrp_module:
             qry = """select p.id as product_id from product_product as p
                 inner join mrp_bom as mb on mb.product_tmpl_id=p.product_tmpl_id
@@ -263,7 +263,8 @@ class ProductProduct(models.Model):
     def get_bom_product_stock_ept(self, product_id, warehouse_id,
                                   fix_stock_type=False,
                                   fix_stock_value=0,
-                                  stock_type='virtual_available'):
+                                  stock_type='virtual_available',
+                                  bom_explosions=None):
         """
         Added by Udit
         This method will check available quantity for componants of BOM type product
@@ -274,16 +275,17 @@ class ProductProduct(models.Model):
         :param fix_stock_type: Fix stock type 'fix' or 'percentage'.
         :param fix_stock_value: Fix stock value.
         :param stock_type: stock availability based on field.
+        :param bom_explosions: Dictionary of the BOM explosions of the caller's run, the BOMs are
+                               exploded once per run when the caller passes it for every product.
         :return: This method will return available quantity for BOM type product.
         Migration done by twinkalc August 2020
         """
-        module_obj = self.env['ir.module.module'].sudo()
-        mrp_module = module_obj.search(
-            [('name', '=', 'mrp'), ('state', '=', 'installed')])
+        module_obj = self.env['ir.module.module']
+        mrp_module = module_obj.is_module_installed_ept('mrp')
         if not mrp_module:
             raise UserError(_("MRP module must be installed to do this process."))
         actual_stock = product_id.find_bom_product_possible_quantity_ept(
-            warehouse_id, stock_type)
+            warehouse_id, stock_type, bom_explosions)
         if actual_stock >= 1.00:
             if fix_stock_type == 'fix':
                 if fix_stock_value >= actual_stock:
@@ -298,17 +300,20 @@ class ProductProduct(models.Model):
         return actual_stock
 
     def find_bom_product_possible_quantity_ept(self, warehouse_id,
-                                           stock_type='virtual_available'):
+                                           stock_type='virtual_available',
+                                           bom_explosions=None):
         """
         Added by Udit
         This method will check available quantity for components of BOM type product
         based on the minimum combinations can be made.
         :param warehouse_id: Warehouse id.
         :param stock_type: stock availability based on field.
+        :param bom_explosions: Dictionary of the BOM explosions of the run.
         :return: This method will return available quantity for BOM type product.
         Migration done by twinkalc August 2020
         """
-        bom_lines = self.env['stock.picking'].get_set_product(product=self)
+        bom_lines = self.env['stock.picking'].get_set_product(product=self,
+                                                              bom_explosions=bom_explosions)
         flag = True
         combination = 0
         for record in bom_lines:
@@ -163,26 +163,88 @@ class SaleOrder(models.Model):
         self.write({'date_order': date_order})
         return True
 
+    def _prepare_confirmation_values(self):
+        """
+        Keeps the order date when the orders are confirmed by the auto workflow.
+        """
+        values = super(SaleOrder, self)._prepare_confirmation_values()
+        if self._context.get('keep_date_order_ept'):
+            values.pop('date_order', None)
+        return values
+
     def process_orders_and_invoices_ept(self):
         """
         This method will confirm sale orders, create and paid related invoices.
-        :param work_flow_process_record: Work flow object
+        Orders are processed together per workflow.
         Migration done by twinkalc August 2020
         """
-        for order in self:
-            work_flow_process_record = order.auto_workflow_process_id
-
-            if order.invoice_status and order.invoice_status == 'invoiced':
-                continue
+        orders = self.filtered(lambda order: order.invoice_status != 'invoiced')
+        for work_flow_process_record in orders.auto_workflow_process_id:
+            workflow_orders = orders.filtered(
+                lambda order: order.auto_workflow_process_id == work_flow_process_record)
 
             if work_flow_process_record.validate_order:
-                order.validate_order_ept()
+                workflow_orders.with_context(keep_date_order_ept=True).action_confirm()
+
+            workflow_orders = workflow_orders.filtered(lambda order: order.order_line.filtered(
+                lambda l: l.product_id.invoice_policy == 'order'))
+            workflow_orders.validate_and_paid_orders_invoices_ept(work_flow_process_record)
+        return True
+
+    def get_orders_to_invoice_ept(self, work_flow_process_record):
+        """
+        Returns the orders for which the workflow creates the invoices, connectors can skip orders
+        here.
+        """
+        return self
 
-            if not order.mapped('order_line').filtered(
-                    lambda l: l.product_id.invoice_policy == 'order'):
-                continue
+    def get_orders_to_pay_ept(self, work_flow_process_record):
+        """
+        Returns the orders for which the workflow registers the payments, connectors can skip orders
+        here.
+        """
+        return self
 
-            order.validate_and_paid_invoices_ept(work_flow_process_record)
+    def validate_and_paid_orders_invoices_ept(self, work_flow_process_record):
+        """
+        This method will create the invoices of the orders with one call, post them together and
+        register their payments, according to the workflow.
+        :param work_flow_process_record: Work flow object
+        """
+        if not work_flow_process_record.create_invoice:
+            return True
+        orders = self.get_orders_to_invoice_ept(work_flow_process_record)
+        if not orders:
+            return True
+        invoices = orders._create_invoices(grouped=True)
+        invoices.action_post()
+        if work_flow_process_record.register_payment:
+            orders_to_pay = orders.get_orders_to_pay_ept(work_flow_process_record)
+            invoices = invoices.filtered(
+                lambda invoice: invoice.invoice_line_ids.sale_line_ids.order_id & orders_to_pay)
+            self.register_payment_of_invoices_ept(invoices, work_flow_process_record)
+        return True
+
+    def register_payment_of_invoices_ept(self, invoices, work_flow_process_record):
+        """
+        Registers one payment per invoice from the values of prepare_payment_dict. The payments are
+        created with one call, posted together and each one is reconciled with its invoice.
+        :param invoices: Invoices to pay.
+        :param work_flow_process_record: Work flow object
+        """
+        invoices = invoices.filtered(lambda invoice: invoice.amount_residual)
+        if not invoices:
+            return True
+        payments = self.env['account.payment'].create(
+            [invoice.prepare_payment_dict(work_flow_process_record) for invoice in invoices])
+        payments.action_post()
+        for payment, invoice in zip(payments, invoices):
+            payment_lines = payment.line_ids.filtered(
+                lambda line: line.account_internal_type in ('receivable', 'payable')
+                and not line.reconciled)
+            for account in payment_lines.account_id:
+                (payment_lines + invoice.line_ids).filtered(
+                    lambda line: line.account_id == account and not line.reconciled).reconcile()
         return True
 
     def validate_and_paid_invoices_ept(self, work_flow_process_record):
@@ -221,15 +283,7 @@ class SaleOrder(models.Model):
         Migration done by twinkalc August 2020
         """
         self.ensure_one()
-        account_payment_obj = self.env['account.payment']
-        for invoice in invoices:
-            if invoice.amount_residual:
-                vals = invoice.prepare_payment_dict(
-                    self.auto_workflow_process_id)
-                if invoice.amount_residual:
-                    payment_id = account_payment_obj.create(vals)
-                    payment_id.action_post()
-        return True
+        return self.register_payment_of_invoices_ept(invoices, self.auto_workflow_process_id)
 
     def auto_shipped_order_ept(self, customers_location,
                                is_mrp_installed=False):
@@ -237,23 +291,36 @@ class SaleOrder(models.Model):
         Added by Udit
         :param customers_location: It is customer location object.
         :param is_mrp_installed: It is a boolean for mrp installed or not.
-        :return: This method will generate stock move and done it, it will return boolean.
+        :return: This method will generate stock moves of all the orders with one create and done
+                 them together, it will return boolean.
         Migration done by twinkalc August 2020
         """
-        order_lines = self.order_line.filtered(
-            lambda l: l.product_id.type != 'service')
-        for order_line in order_lines:
-            if not is_mrp_installed:
-                self.create_and_done_stock_move_ept(order_line, customers_location)
-            else:
-                bom_lines = self.amz_fbm_shipped_get_set_product_ept(order_line.product_id)
-                for bom_line in bom_lines:
-                    self.create_and_done_stock_move_ept(order_line,
-                                                    customers_location,
-                                                    bom_line)
-                if not bom_lines:
-                    self.create_and_done_stock_move_ept(order_line,
-                                                    customers_location)
+        bom_lines_by_product = {}
+        if is_mrp_installed:
+            bom_explosion_obj = self.env['mrp.bom.explosion.ept']
+            for company in self.company_id:
+                products = self.filtered(lambda o: o.company_id == company).order_line.product_id
+                exploded = bom_explosion_obj.explode_products_ept(
+                    products, company_id=company.id, bom_type='phantom')
+                bom_lines_by_product.update({(product_id, company.id): lines
+                                             for product_id, lines in exploded.items()})
+        vals_list = []
+        for order in self:
+            order_lines = order.order_line.filtered(
+                lambda l: l.product_id.type != 'service')
+            for order_line in order_lines:
+                bom_lines = bom_lines_by_product.get(
+                    (order_line.product_id.id, order.company_id.id), [])
+                for bom_line in bom_lines or [False]:
+                    vals = order.prepare_stock_move_vals_ept(order_line, customers_location,
+                                                             bom_line)
+                    vals and vals_list.append(vals)
+        if vals_list:
+            stock_moves = self.env['stock.move'].create(vals_list)
+            stock_moves._action_assign()
+            for stock_move in stock_moves:
+                stock_move._set_quantity_done(stock_move.product_uom_qty)
+            stock_moves._action_done()
         return True
 
     def amz_fbm_shipped_get_set_product_ept(self, product):
@@ -265,26 +332,15 @@ class SaleOrder(models.Model):
         :param product:
         :return:
         """
-        try:
-            bom_obj = self.env['mrp.bom']
-            bom_point = bom_obj.sudo()._bom_find(product=product, company_id=self.company_id.id, bom_type='phantom')
-            from_uom = product.uom_id
-            to_uom = bom_point.product_uom_id
-            factor = from_uom._compute_quantity(1, to_uom) / bom_point.product_qty
-            bom, lines = bom_point.explode(product, factor, picking_type=bom_point.picking_type_id)
-            return lines
-        except:
-            return {}
+        return self.env['mrp.bom.explosion.ept'].explode_product_ept(
+            product, company_id=self.company_id.id, bom_type='phantom')
 
-    def create_and_done_stock_move_ept(self, order_line, customers_location,
-                                   bom_line=False):
+    def prepare_stock_move_vals_ept(self, order_line, customers_location, bom_line=False):
         """
-        Added by Udit
+        Prepares the values of the stock move of the order line or of its BOM line.
         :param order_line: It is sale order line.
         :param customers_location: It is customer location.
-        :return: It will create and done stock move as per the data
-                in order line and return boolean.
-        Migration done by twinkalc August 2020
+        :return: Dictionary of the stock move values or False when nothing is to move.
         """
         if bom_line:
             product = bom_line[0].product_id
@@ -294,24 +350,39 @@ class SaleOrder(models.Model):
             product = order_line.product_id
             product_qty = order_line.product_uom_qty
             product_uom = order_line.product_uom
-        if product and product_qty and product_uom:
-            vals = {
-                'name': _('Auto processed move : %s') % 
-                        (product.description_sale if product.description_sale
-                         else order_line.name),
-                'company_id': self.company_id.id,
-                'product_id': product.id if product else False,
-                'product_uom_qty': product_qty,
-                'product_uom': product_uom.id if product_uom else False,
-                'location_id': self.warehouse_id.lot_stock_id.id,
-                'location_dest_id': customers_location.id,
-                'state': 'confirmed',
-                'sale_line_id': order_line.id
-            }
-            if bom_line:
-                vals.update({'bom_line_id': bom_line[0].id})
+        if not (product and product_qty and product_uom):
+            return False
+        vals = {
+            'name': _('Auto processed move : %s') %
+                    (product.description_sale if product.description_sale
+                     else order_line.name),
+            'company_id': self.company_id.id,
+            'product_id': product.id if product else False,
+            'product_uom_qty': product_qty,
+            'product_uom': product_uom.id if product_uom else False,
+            'location_id': self.warehouse_id.lot_stock_id.id,
+            'location_dest_id': customers_location.id,
+            'state': 'confirmed',
+            'sale_line_id': order_line.id
+        }
+        if bom_line:
+            vals.update({'bom_line_id': bom_line[0].id})
+        return vals
+
+    def create_and_done_stock_move_ept(self, order_line, customers_location,
+                                   bom_line=False):
+        """
+        Added by Udit
+        :param order_line: It is sale order line.
+        :param customers_location: It is customer location.
+        :return: It will create and done stock move as per the data
+                in order line and return boolean.
+        Migration done by twinkalc August 2020
+        """
+        vals = self.prepare_stock_move_vals_ept(order_line, customers_location, bom_line)
+        if vals:
             stock_move = self.env['stock.move'].create(vals)
             stock_move._action_assign()
-            stock_move._set_quantity_done(product_qty)
+            stock_move._set_quantity_done(vals.get('product_uom_qty'))
             stock_move._action_done()
         return True
@@ -92,8 +92,9 @@ class SaleWorkflowProcess(models.Model):
 
     def shipped_order_workflow_ept(self, orders):
         """
-        This method is for processing the shipped orders.
-        :param orders: list of order objects
+        This method is for processing the shipped orders, the stock moves of all the orders are
+        created and done together.
+        :param orders: Sale order recordset
         :return: True
         Migration done by twinkalc August 2020
         """
@@ -101,20 +102,22 @@ class SaleWorkflowProcess(models.Model):
         module_obj = self.env['ir.module.module']
         stock_location_obj = self.env["stock.location"]
 
-        mrp_module = module_obj.sudo().search([('name', '=', 'mrp'), ('state', '=', 'installed')])
+        mrp_module = module_obj.is_module_installed_ept('mrp')
         customer_location = stock_location_obj.search([("usage", "=", "customer")], limit=1)
 
-        for order in orders:
-            if order.order_line:
-                order.state = 'sale'
-                order.order_line.write({'state': 'sale'})
+        orders = orders.filtered('order_line')
+        if not orders:
+            return True
+        orders.write({'state': 'sale'})
+        orders.order_line.write({'state': 'sale'})
 
-                if order.order_line.filtered(lambda l: l.product_id.invoice_policy == 'order'):
-                    order.validate_and_paid_invoices_ept(self)
+        for order in orders.filtered(
+                lambda o: o.order_line.filtered(lambda l: l.product_id.invoice_policy == 'order')):
+            order.validate_and_paid_invoices_ept(self)
 
-                order.auto_shipped_order_ept(customer_location, mrp_module)
+        orders.auto_shipped_order_ept(customer_location, mrp_module)
 
-                delivered_lines = order.order_line.filtered(lambda l: l.product_id.invoice_policy != 'order')
-                if delivered_lines:
-                    order.validate_and_paid_invoices_ept(self)
+        for order in orders.filtered(
+                lambda o: o.order_line.filtered(lambda l: l.product_id.invoice_policy != 'order')):
+            order.validate_and_paid_invoices_ept(self)
         return True
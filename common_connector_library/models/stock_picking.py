@@ -10,19 +10,15 @@ from odoo import fields, models, _
 class StockPicking(models.Model):
     _inherit = "stock.picking"
 
-    def get_set_product(self, product):
-        try:
-            bom_obj = self.env['mrp.bom']
-            bom_point = bom_obj.sudo()._bom_find(product=product)
-            from_uom = product.uom_id
-            to_uom = bom_point.product_uom_id
-            factor = from_uom._compute_quantity(1,
-                                                to_uom) / bom_point.product_qty
-            bom, lines = bom_point.explode(product, factor,
-                                           picking_type=bom_point.picking_type_id)
-            return lines
-        except:
-            return {}
+    def get_set_product(self, product, bom_explosions=None):
+        """
+        Explodes the BOM of the product.
+        :param product: Product record.
+        :param bom_explosions: Dictionary of the BOM explosions of the run.
+        :return: List of (bom_line, {'qty': qty}), empty when the product has no BOM.
+        """
+        return self.env['mrp.bom.explosion.ept'].explode_product_ept(
+            product, bom_explosions=bom_explosions)
 
 
 
@@ -55,6 +51,7 @@ class StockPicking(models.Model):
             use order_line_field_key = shopify_line_id
     For Ex:- picking_id = 25
     This way call Method :-  self.env['stock.picking'].get_tracking_numbers(25,'shopify_line_id')
+    For many pickings :- self.env['stock.picking'].get_tracking_numbers_ept([25, 26],'shopify_line_id')
     Method return :-
             {'default_code' :[{
                                 'order_line_field_key':'',
@@ -73,90 +70,149 @@ class StockPicking(models.Model):
                                 'qty':qty
                             }],
             }"""
-    def get_traking_number_for_phantom_type_product(self, picking, order_line_field=False):
+    def prepare_tracking_data_ept(self, picking_ids, order_line_field=False):
+        """
+        Reads everything needed to build the tracking numbers of many pickings with a few queries.
+        :param picking_ids: List of picking ids.
+        :param order_line_field: Field of the sale order line which is returned as line_id.
+        :return: Dictionary of the tracking references, moves, sale lines, product codes,
+                 move lines and package tracking numbers.
+        """
+        move_obj = self.env['stock.move']
+        pickings = self.search_read([('id', 'in', picking_ids)], ['carrier_tracking_ref'])
+        moves = move_obj.search_read([('picking_id', 'in', picking_ids)],
+                                     ['picking_id', 'product_id', 'sale_line_id', 'state'])
+        sale_line_fields = ['product_id', 'product_qty'] + ([order_line_field] if order_line_field
+                                                            else [])
+        sale_line_ids = list({move['sale_line_id'][0] for move in moves if move['sale_line_id']})
+        sale_lines = self.env['sale.order.line'].search_read([('id', 'in', sale_line_ids)],
+                                                             sale_line_fields)
+        move_lines = self.env['stock.move.line'].search_read(
+            [('move_id', 'in', [move['id'] for move in moves])],
+            ['move_id', 'product_id', 'qty_done', 'result_package_id'])
+        product_ids = {move['product_id'][0] for move in moves}
+        product_ids.update(line['product_id'][0] for line in sale_lines if line['product_id'])
+        products = self.env['product.product'].with_context(active_test=False).search_read(
+            [('id', 'in', list(product_ids))], ['default_code'])
+        package_ids = list({line['result_package_id'][0] for line in move_lines
+                            if line['result_package_id']})
+        packages = self.env['stock.quant.package'].search_read([('id', 'in', package_ids)],
+                                                               ['tracking_no'])
+
+        tracking_data = {
+            'tracking_refs': {picking['id']: picking['carrier_tracking_ref'] for picking in pickings},
+            'moves_by_picking': {},
+            'sale_lines': {line['id']: line for line in sale_lines},
+            'default_codes': {product['id']: product['default_code'] for product in products},
+            'move_lines_by_move': {},
+            'package_tracking': {package['id']: package['tracking_no'] for package in packages},
+        }
+        for move in moves:
+            tracking_data['moves_by_picking'].setdefault(move['picking_id'][0], []).append(move)
+        for move_line in move_lines:
+            tracking_data['move_lines_by_move'].setdefault(move_line['move_id'][0],
+                                                           []).append(move_line)
+        return tracking_data
+
+    @staticmethod
+    def add_tracking_line_ept(line_items, default_code, quantity, line_id, tracking_no):
+        """
+        Adds the quantity to the line of the same tracking number of the product or adds a new line.
+        """
+        for line in line_items.setdefault(default_code, []):
+            if line.get('tracking_no') == tracking_no:
+                line.update({'quantity': line.get('quantity') + quantity, 'line_id': line_id})
+                return line_items
+        line_items[default_code].append({'quantity': quantity, 'line_id': line_id,
+                                         'tracking_no': tracking_no})
+        return line_items
+
+    def get_traking_number_for_phantom_type_product(self, picking, order_line_field=False,
+                                                    tracking_data=False):
+        """
+        Prepares the tracking lines of the kit products of the picking, the quantity is taken from
+        the sale order line of the kit.
+        :param picking: Picking id.
+        :param order_line_field: Field of the sale order line which is returned as line_id.
+        :param tracking_data: Data prepared by prepare_tracking_data_ept for many pickings.
+        :return: Tuple of the tracking lines and the ids of the moves of the kit products.
+        """
+        if not tracking_data:
+            tracking_data = self.prepare_tracking_data_ept([picking], order_line_field)
         line_items = {}
         update_move_ids = []
-        move_obj = self.env['stock.move']
-        picking_obj = self.env['stock.picking'].browse(picking)
+        moves = tracking_data['moves_by_picking'].get(picking, [])
         phantom_product_dict = {}
-        move_lines = picking_obj.move_lines
-        for move in move_lines:
-            if move.sale_line_id.product_id.id != move.product_id.id:
-                if move.sale_line_id in phantom_product_dict and \
-                        move.product_id.id not in phantom_product_dict.get(move.sale_line_id):
-                    phantom_product_dict.get(move.sale_line_id).append(move.product_id.id)
-                else:
-                    phantom_product_dict.update({move.sale_line_id: [move.product_id.id]})
+        for move in moves:
+            sale_line = tracking_data['sale_lines'].get(move['sale_line_id'] and
+                                                        move['sale_line_id'][0])
+            sale_product_id = sale_line and sale_line['product_id'] and sale_line['product_id'][0]
+            if sale_product_id != move['product_id'][0]:
+                phantom_product_dict.setdefault(move['sale_line_id'] and move['sale_line_id'][0],
+                                                set()).add(move['product_id'][0])
+
         for sale_line_id, product_ids in phantom_product_dict.items():
-            moves = move_obj.search([('picking_id', '=', picking_obj.id), ('state', '=', 'done'),
-                                     ('product_id', 'in', product_ids)])
-            line_id = sale_line_id.search_read([("id", "=", sale_line_id.id)],
-            [order_line_field])[0].get(order_line_field)
-            tracking_no = picking_obj.carrier_tracking_ref
-            for move in moves:
-                if not tracking_no:
-                    for move_line in move.move_line_ids:
-                        tracking_no = move_line.result_package_id \
-                                      and move_line.result_package_id.tracking_no or False
-
-            update_move_ids += moves.ids
-            product_qty = sale_line_id.product_qty or 0.0
-            default_code = sale_line_id.product_id.default_code
-            if default_code in line_items:
-                for line in line_items.get(default_code):
-                    if tracking_no in line.get('tracking_no'):
-                        quantity = line.get('quantity')
-                        product_qty = quantity + product_qty
-                        line.update({'quantity': product_qty, 'line_id': line_id,
-                                     'tracking_no': tracking_no})
-                else:
-                    line_items.get(default_code).append(
-                        {'quantity': product_qty, 'line_id': line_id, 'tracking_no': tracking_no})
-            else:
-                line_items.update({default_code: []})
-                line_items.get(default_code).append(
-                    {'quantity': product_qty, 'line_id': line_id, 'tracking_no': tracking_no})
+            phantom_moves = [move for move in moves if move['state'] == 'done'
+                             and move['product_id'][0] in product_ids]
+            sale_line = tracking_data['sale_lines'].get(sale_line_id, {})
+            line_id = order_line_field and sale_line.get(order_line_field) or False
+            tracking_no = tracking_data['tracking_refs'].get(picking)
+            for move in phantom_moves:
+                if tracking_no:
+                    break
+                for move_line in tracking_data['move_lines_by_move'].get(move['id'], []):
+                    package = move_line['result_package_id']
+                    tracking_no = package and tracking_data['package_tracking'].get(package[0])
+                    if tracking_no:
+                        break
+
+            update_move_ids += [move['id'] for move in phantom_moves]
+            default_code = sale_line.get('product_id') and \
+                tracking_data['default_codes'].get(sale_line['product_id'][0])
+            self.add_tracking_line_ept(line_items, default_code, sale_line.get('product_qty') or 0.0,
+                                       line_id, tracking_no)
 
         return line_items, update_move_ids
 
-    def get_tracking_numbers(self, picking, order_line_field=False):
-        move_line_obj = self.env['stock.move.line']
-        line_items, update_move_ids = \
-            self.get_traking_number_for_phantom_type_product(picking, order_line_field)
-        stock_moves = self.env['stock.move'].search(
-            [('id', 'not in', update_move_ids), ('picking_id', '=', picking)])
-        for move in stock_moves:
-            line_id = \
-            move.sale_line_id.search_read([("id", "=", move.sale_line_id.id)], [order_line_field])[
-                0].get(order_line_field)
-            move_line = move_line_obj.search(
-                [('move_id', '=', move.id), ('product_id', '=', move.product_id.id)])
-            for move in move_line:
-                if move.result_package_id:
-                    tracking_no = False
-                    if move.result_package_id.tracking_no:
-                        tracking_no = move.result_package_id.tracking_no
-                    product_qty = move.qty_done or 0.0
-                    product_qty = int(product_qty)
-                    default_code = move.product_id.default_code
-                    if default_code in line_items:
-                        for line in line_items.get(default_code):
-                            if tracking_no in line.get('tracking_no'):
-                                quantity = line.get('quantity')
-                                product_qty = quantity + product_qty
-                                line.update({'quantity': product_qty, 'line_id': line_id,
-                                             'tracking_no': tracking_no})
-                        else:
-                            line_items.get(default_code).append(
-                                {'quantity': product_qty, 'line_id': line_id,
-                                 'tracking_no': tracking_no})
-                    else:
-                        line_items.update({default_code: []})
-                        line_items.get(default_code).append(
-                            {'quantity': product_qty, 'line_id': line_id,
-                             'tracking_no': tracking_no})
+    def get_tracking_numbers(self, picking, order_line_field=False, tracking_data=False):
+        """
+        Prepares the tracking lines of the picking.
+        :param picking: Picking id.
+        :param order_line_field: Field of the sale order line which is returned as line_id.
+        :param tracking_data: Data prepared by prepare_tracking_data_ept for many pickings.
+        :return: Dictionary of the tracking lines by product default code.
+        """
+        if not tracking_data:
+            tracking_data = self.prepare_tracking_data_ept([picking], order_line_field)
+        line_items, update_move_ids = self.get_traking_number_for_phantom_type_product(
+            picking, order_line_field, tracking_data)
+        for move in tracking_data['moves_by_picking'].get(picking, []):
+            if move['id'] in update_move_ids:
+                continue
+            sale_line = tracking_data['sale_lines'].get(move['sale_line_id'] and
+                                                        move['sale_line_id'][0], {})
+            line_id = order_line_field and sale_line.get(order_line_field) or False
+            for move_line in tracking_data['move_lines_by_move'].get(move['id'], []):
+                package = move_line['result_package_id']
+                if not package or move_line['product_id'][0] != move['product_id'][0]:
+                    continue
+                tracking_no = tracking_data['package_tracking'].get(package[0]) or False
+                default_code = tracking_data['default_codes'].get(move_line['product_id'][0])
+                self.add_tracking_line_ept(line_items, default_code,
+                                           int(move_line['qty_done'] or 0.0), line_id, tracking_no)
         return line_items
 
+    def get_tracking_numbers_ept(self, picking_ids, order_line_field=False):
+        """
+        Prepares the tracking lines of many pickings at once.
+        :param picking_ids: List of picking ids.
+        :param order_line_field: Field of the sale order line which is returned as line_id.
+        :return: Dictionary of {picking_id: tracking lines of get_tracking_numbers}.
+        """
+        tracking_data = self.prepare_tracking_data_ept(picking_ids, order_line_field)
+        return {picking: self.get_tracking_numbers(picking, order_line_field, tracking_data)
+                for picking in picking_ids}
+
     def send_to_shipper(self):
         """
         usage: If auto_processed_orders_ept = True passed in Context then we can not call send shipment from carrier
@@ -169,7 +169,9 @@ class Webhook(http.Controller):
             _logger.info("Added customer id : %s in existing customer queue %s" % (
                 res.get('id'), customer_data_queue.display_name))
 
-        if customer_data_queue and len(customer_data_queue.queue_line_ids) >= 50:
+        queue_size = request.env["woo.queue.chunk.policy.ept"].sudo().get_queue_chunk_policy(
+            instance, "customer")["webhook_queue_size"]
+        if customer_data_queue and len(customer_data_queue.queue_line_ids) >= queue_size:
             customer_data_queue.queue_line_ids.woo_customer_data_queue_to_odoo()
 
         elif not customer_data_queue:
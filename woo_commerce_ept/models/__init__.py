@@ -30,4 +30,5 @@ from . import res_partner_ept
 from . import coupons_ept
 from . import coupon_data_queue_ept
 from . import coupon_data_queue_line_ept
-from . import data_queue_mixin_ept
\ No newline at end of file
+from . import data_queue_mixin_ept
+from . import queue_chunk_policy_ept
@@ -20,7 +20,7 @@ class CommonLogLinesEpt(models.Model):
                         product and its type is string
         :param model_id: It contain the id of the model and Its type is Integer
         :param queue_line_id: It contain the value of type integer of queue line id
-        :return: return the new log line
+        :return: return the new log line, empty while the log lines are buffered
         @author: Dipak Gogiya @Emipro Technologies Pvt.Ltd
         """
         vals = {"message": message,
@@ -31,7 +31,7 @@ class CommonLogLinesEpt(models.Model):
             vals.update({"woo_order_data_queue_line_id":queue_line_id.id})
         else:
             vals.update({"woo_product_queue_line_id":queue_line_id.id})
-        return self.create(vals)
+        return self.log_line_ept(vals)
 
     def woo_product_export_log_line(self, message, model_id, common_log_id, product_template_id):
         """
@@ -46,7 +46,7 @@ class CommonLogLinesEpt(models.Model):
                 "log_book_id": common_log_id.id,
                 "res_id": product_template_id.id if product_template_id else False,
                 }
-        self.create(vals)
+        self.log_line_ept(vals)
 
     def woo_create_log_line(self, message, model_id, common_log_id, product_template_id):
         """
@@ -61,4 +61,4 @@ class CommonLogLinesEpt(models.Model):
                 "log_book_id": common_log_id.id,
                 "res_id": product_template_id.id if product_template_id else False,
                 }
-        self.create(vals)
+        self.log_line_ept(vals)
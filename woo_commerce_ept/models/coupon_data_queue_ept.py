@@ -2,6 +2,7 @@
 #See LICENSE file for full copyright and licensing details.
 
 from odoo import models, fields, api
+import json
 import logging
 _logger = logging.getLogger("WooCommerce")
 
@@ -88,7 +89,7 @@ class WooCouponDataQueueEpt(models.Model):
         for coupon in coupons:
             vals_list.append({"coupon_data_queue_id":self.id,
                               "woo_coupon":coupon["id"],
-                              "coupon_data":coupon,
+                              "coupon_data":json.dumps(coupon),
                               "number": coupon["code"],
                               })
         if vals_list:
@@ -134,7 +135,9 @@ class WooCouponDataQueueEpt(models.Model):
             coupon_data_queue.create_woo_data_queue_lines([result])
             _logger.info("Added coupon id : %s in existing customer queue %s"%(result.get('id'),coupon_data_queue.display_name))
 
-        if coupon_data_queue and len(coupon_data_queue.coupon_data_queue_line_ids) >= 50:
+        queue_size = self.env["woo.queue.chunk.policy.ept"].get_queue_chunk_policy(
+            instance, "coupon")["webhook_queue_size"]
+        if coupon_data_queue and len(coupon_data_queue.coupon_data_queue_line_ids) >= queue_size:
             coupon_data_queue.coupon_data_queue_line_ids.process_coupon_queue_line()
 
         elif not coupon_data_queue:
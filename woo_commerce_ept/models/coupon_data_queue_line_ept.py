@@ -36,7 +36,6 @@ class WooCouponDataQueueLineEpt(models.Model):
         Process the imported coupon data and create the coupon.
         @author: Nilesh Parmar on Date 31 Dec 2019.
         """
-        common_log_book_obj = self.env["common.log.book.ept"]
         coupon_obj = self.env["woo.coupons.ept"]
         start = time.time()
         #below two line add by Haresh Mori on date 7/1/2020, this is used to set is_process_queue as False.
@@ -44,18 +43,15 @@ class WooCouponDataQueueLineEpt(models.Model):
         where is_process_queue = True""")
         self._cr.commit()
         queue_id = self.coupon_data_queue_id
-        if queue_id.common_log_book_id:
-            common_log_book_id = queue_id.common_log_book_id
-        else:
-            common_log_book_id = common_log_book_obj.create({"type":"import",
-                                                             "module":"woocommerce_ept",
-                                                             "woo_instance_id":queue_id.woo_instance_id.id,
-                                                             "active":True})
-
-        coupons = coupon_obj.create_or_write_coupon(self, common_log_book_id)
-        if not common_log_book_id.log_lines:
-            common_log_book_id.unlink()
-        else:
+        # The log book is created only when a log line is written, the lines are created together.
+        common_log_book_id = queue_id.common_log_book_id.buffer_log_lines_ept(
+            {"type":"import",
+             "module":"woocommerce_ept",
+             "woo_instance_id":queue_id.woo_instance_id.id,
+             "active":True})
+        coupon_obj.with_env(common_log_book_id.env).create_or_write_coupon(self, common_log_book_id)
+        common_log_book_id = common_log_book_id.flush_log_lines_ept()
+        if common_log_book_id:
             queue_id.common_log_book_id = common_log_book_id
         end = time.time()
         _logger.info("Processed %s Coupons in %s seconds." % (str(len(self)), str(end - start)))
@@ -65,13 +61,13 @@ class WooCouponDataQueueLineEpt(models.Model):
             This method used to find a coupon queue line records .
             @author: Nilesh Parmar on Date 31 Dec 2019.
         """
-        coupon_data_queue_obj = self.env["woo.coupon.data.queue.ept"]
-        query = """SELECT coupon_data_queue_id FROM woo_coupon_data_queue_line_ept WHERE state = 
-        'draft' ORDER BY "create_date" ASC limit 1;"""
-        self._cr.execute(query)
-        coupon_queue_data = self._cr.fetchone()
-        coupon_queue_id = coupon_data_queue_obj.browse(coupon_queue_data)
-        coupon_queue_lines = coupon_queue_id and coupon_queue_id.coupon_data_queue_line_ids.filtered(
-                lambda x:x.state == "draft")
-        coupon_queue_lines and coupon_queue_lines.process_coupon_queue_line()
+        queue_chunk_policy_obj = self.env["woo.queue.chunk.policy.ept"]
+        # The queues of each instance are taken as per the queue chunk policy of the instance.
+        for coupon_queue_id in queue_chunk_policy_obj.claim_queues("coupon"):
+            coupon_queue_lines = coupon_queue_id.coupon_data_queue_line_ids.filtered(
+                    lambda x:x.state == "draft")
+            start = time.time()
+            coupon_queue_lines and coupon_queue_lines.process_coupon_queue_line()
+            queue_chunk_policy_obj.record_queue_run(coupon_queue_id.woo_instance_id, "coupon",
+                                                    len(coupon_queue_lines), time.time() - start)
         return True
\ No newline at end of file
@@ -2,11 +2,15 @@
 #See LICENSE file for full copyright and licensing details.
 
 import ast
+import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
 _logger = logging.getLogger("Woo")
+# Number of coupon batches posted at the same time to an instance while exporting the coupons.
+COUPON_EXPORT_WORKERS = 4
 
 from odoo import models, fields, api
 
@@ -98,7 +102,7 @@ class WooCoupons(models.Model):
         Creates log line for the failed queue line.
         @param queue_line: Failed queue line.
         @param message: Cause of failure.
-        @return: Created log line.
+        @return: Created log line, empty while the log lines are buffered.
         @author: Nilesh Parmar
         """
         log_line_obj = self.env["common.log.lines.ept"]
@@ -109,116 +113,196 @@ class WooCoupons(models.Model):
             queue_line.state = "failed"
         if common_log_book_id:
             log_line_vals.update({"log_book_id": common_log_book_id.id})
-        return log_line_obj.create(log_line_vals)
+        return log_line_obj.log_line_ept(log_line_vals)
 
     def create_or_write_coupon(self, queue_lines, common_log_book_id=False):
         """
         this method is used to create new coupons or update the coupons which available in odoo.
-        :param instance: instance of woo commerce
-        :param coupons: coupons data and type list
-        :return:
+        Queue lines are processed in chunks of the queue size of the coupon chunk policy of the
+        instance, the products, variants, categories and coupons of a chunk are searched together.
+        :param queue_lines: coupon queue lines to process
+        :param common_log_book_id: common log book id for create a log.
+        :return: woo coupons
         @author : Nilesh Parmar on date 17 Dec 2019.
         """
-        woo_product_categ_ept_obj = self.env["woo.product.categ.ept"]
-        woo_product_template_ept_obj = self.env["woo.product.template.ept"]
-        woo_product_product_obj = self.env['woo.product.product.ept']
         instance = queue_lines.instance_id
-        woo_coupons = []
-        commit_count = 0
+        woo_coupons = self
+        chunk_size = self.env["woo.queue.chunk.policy.ept"].get_queue_chunk_policy(
+            instance, "coupon")["queue_size"]
+        for start in range(0, len(queue_lines), chunk_size):
+            chunk_lines = queue_lines[start:start + chunk_size]
+            woo_coupons += self.create_or_write_coupon_chunk(instance, chunk_lines,
+                                                             common_log_book_id)
+            chunk_lines.coupon_data_queue_id.is_process_queue = True
+            # The failed queue lines are committed with their log lines.
+            self.env["common.log.book.ept"].flush_log_lines_ept()
+            self._cr.commit()
+        queue_lines.coupon_data_queue_id.is_process_queue = False
+        return woo_coupons
+
+    @staticmethod
+    def get_coupon_from_queue_line(queue_line):
+        """
+        Returns the coupon data of the queue line, older queue lines keep it as python literal.
+        """
+        try:
+            return json.loads(queue_line.coupon_data)
+        except ValueError:
+            return ast.literal_eval(queue_line.coupon_data)
+
+    def prepare_coupon_maps(self, instance, coupons):
+        """
+        This method is used to search the coupons, products, variants and categories of all the
+        given coupons together.
+        :param coupons: list of coupons data
+        :return: dictionary of the maps by woo id and of the existing coupons by id and by code.
+        """
+        woo_product_ids = set()
+        woo_categ_ids = set()
+        for coupon in coupons:
+            woo_product_ids.update(coupon.get("product_ids") or [])
+            woo_product_ids.update(coupon.get("excluded_product_ids") or [])
+            woo_categ_ids.update(coupon.get("product_categories") or [])
+            woo_categ_ids.update(coupon.get("excluded_product_categories") or [])
+        woo_product_ids = [str(woo_id) for woo_id in woo_product_ids]
+        woo_categ_ids = [str(woo_id) for woo_id in woo_categ_ids]
+
+        coupon_maps = {"templates": {}, "variants": {}, "categories": {}, "coupon_ids": {},
+                       "codes": {}}
+        if woo_product_ids:
+            for template in self.env["woo.product.template.ept"].search_read(
+                    [("woo_tmpl_id", "in", woo_product_ids),
+                     ("woo_instance_id", "=", instance.id)], ["woo_tmpl_id"]):
+                coupon_maps["templates"].setdefault(int(template["woo_tmpl_id"]), template["id"])
+            for variant in self.env["woo.product.product.ept"].search_read(
+                    [("variant_id", "in", woo_product_ids),
+                     ("woo_instance_id", "=", instance.id)], ["variant_id"]):
+                coupon_maps["variants"].setdefault(int(variant["variant_id"]), variant["id"])
+        if woo_categ_ids:
+            for categ in self.env["woo.product.categ.ept"].search_read(
+                    [("woo_categ_id", "in", woo_categ_ids),
+                     ("woo_instance_id", "=", instance.id)], ["woo_categ_id"]):
+                coupon_maps["categories"].setdefault(int(categ["woo_categ_id"]), categ["id"])
+
+        coupon_ids = [str(coupon.get("id")) for coupon in coupons if coupon.get("id")]
+        codes = [coupon.get("code") for coupon in coupons if coupon.get("code")]
+        for woo_coupon in self.with_context(active_test=False).search(
+                ["|", ("coupon_id", "in", coupon_ids), ("code", "in", codes),
+                 ("woo_instance_id", "=", instance.id)]):
+            woo_coupon.coupon_id and coupon_maps["coupon_ids"].setdefault(woo_coupon.coupon_id,
+                                                                          woo_coupon)
+            coupon_maps["codes"].setdefault(woo_coupon.code, woo_coupon)
+        return coupon_maps
+
+    @staticmethod
+    def split_coupon_products(product_ids, coupon_maps):
+        """
+        Splits the woo product ids of the coupon into template ids and variant ids.
+        :return: template ids, variant ids and woo ids which are not imported in odoo.
+        """
+        template_ids = []
+        variant_ids = []
+        remain_products = []
+        for product_id in product_ids or []:
+            if product_id in coupon_maps["templates"]:
+                template_ids.append(coupon_maps["templates"][product_id])
+            elif product_id in coupon_maps["variants"]:
+                variant_ids.append(coupon_maps["variants"][product_id])
+            else:
+                remain_products.append(product_id)
+        return template_ids, variant_ids, remain_products
+
+    def prepare_coupon_vals(self, instance, coupon, coupon_maps):
+        """
+        Prepares the values of the coupon from the coupon data.
+        :return: dictionary of values or False, when some of the products are not imported in odoo.
+        """
+        woo_product_ids, woo_variant_ids, remain_products = self.split_coupon_products(
+            coupon.get("product_ids"), coupon_maps)
+        exclude_woo_product_ids, exclude_woo_variant_ids, remain_exclude_products = \
+            self.split_coupon_products(coupon.get("excluded_product_ids"), coupon_maps)
+        if remain_products or remain_exclude_products:
+            return False
+
+        categories = coupon_maps["categories"]
+        woo_product_categ = [categories[categ_id] for categ_id in
+                             coupon.get("product_categories") or [] if categ_id in categories]
+        exclude_woo_product_categ = [categories[categ_id] for categ_id in
+                                     coupon.get("excluded_product_categories") or [] if
+                                     categ_id in categories]
+        email_restriction = coupon.get("email_restrictions") or ''
+        email_ids = ""
+        if email_restriction:
+            email_ids = ",".join(email_restriction)
+
+        return {
+            'coupon_id': coupon.get("id"),
+            'code': coupon.get("code"),
+            'description': coupon.get("description"),
+            'discount_type': coupon.get("discount_type"),
+            'amount': coupon.get("amount"),
+            'free_shipping': coupon.get("free_shipping"),
+            'expiry_date': coupon.get("date_expires") or False,
+            'minimum_amount': float(coupon.get("minimum_amount", 0.0)),
+            'maximum_amount': float(coupon.get("maximum_amount", 0.0)),
+            'individual_use': coupon.get("individual_use"),
+            'exclude_sale_items': coupon.get("exclude_sale_items"),
+            'product_ids': [(6, False, woo_product_ids)],
+            'product_variant_ids': [(6, False, woo_variant_ids)],
+            'exclude_product_ids': [(6, False, exclude_woo_product_ids)],
+            'exclude_product_variant_ids': [(6, False, exclude_woo_variant_ids)],
+            'product_category_ids': [(6, False, woo_product_categ)],
+            'excluded_product_category_ids': [(6, False, exclude_woo_product_categ)],
+            'email_restrictions': email_ids,
+            'usage_limit': coupon.get("usage_limit"),
+            'limit_usage_to_x_items': coupon.get("limit_usage_to_x_items"),
+            'usage_limit_per_user': coupon.get("usage_limit_per_user"),
+            'usage_count': coupon.get("usage_count"),
+            'used_by': coupon.get("used_by"),
+            'woo_instance_id': instance.id,
+            'exported_in_woo': True,
+            'active': True
+        }
+
+    def create_or_write_coupon_chunk(self, instance, queue_lines, common_log_book_id=False):
+        """
+        Creates or updates the coupons of a chunk of queue lines. New coupons are created with one
+        create call.
+        :return: woo coupons
+        """
+        coupons = []
         for queue_line in queue_lines:
-            commit_count += 1
-            if commit_count == 10:
-                # This is used for commit every 10 coupons
-                queue_line.coupon_data_queue_id.is_process_queue = True
-                self._cr.commit()
-                commit_count = 0
-            coupon = ast.literal_eval(queue_line.coupon_data)
-            coupon_id = coupon.get("id")
+            coupon = self.get_coupon_from_queue_line(queue_line)
             if not coupon.get("code"):
-                message = "Coupon code not available in coupon number %s" % (coupon_id)
+                message = "Coupon code not available in coupon number %s" % (coupon.get("id"))
                 self.create_woo_coupon_log_lines(message, common_log_book_id, queue_line)
                 continue
+            coupons.append((queue_line, coupon))
+        coupon_maps = self.prepare_coupon_maps(instance, [coupon for _line, coupon in coupons])
+
+        woo_coupons = self
+        done_lines = self.env["woo.coupon.data.queue.line.ept"]
+        vals_to_create = {}
+        for queue_line, coupon in coupons:
             code = coupon.get("code")
-            if instance.woo_version == 'wc/v3':
-                woo_product_categ = woo_product_categ_ept_obj.search(
-                    [("woo_categ_id", "in", coupon.get("product_categories")),
-                     ("woo_instance_id", "=", instance.id)]).ids
-                product_category = [(6, False, woo_product_categ)] or ''
-                exclude_woo_product_categ = woo_product_categ_ept_obj.search(
-                    [("woo_categ_id", "in", coupon.get("excluded_product_categories")),
-                     ("woo_instance_id", "=", instance.id)]).ids
-                exclude_product_category = [(6, False, exclude_woo_product_categ)] or ''
-                email_restriction = coupon.get("email_restrictions") or ''
-
-            woo_coupon = self.with_context(active_test=False).search(
-                ["&", "|", ('coupon_id', '=', coupon_id), ('code', '=', code), ('woo_instance_id', '=', instance.id)],
-                limit=1)
-
-            coupon_product_ids = coupon.get("product_ids")
-            woo_product_ids = woo_product_template_ept_obj.search(
-                [("woo_tmpl_id", "in", coupon_product_ids), ("woo_instance_id", "=", instance.id)])
-            remain_products = list(set(coupon_product_ids) - set(list(map(int,woo_product_ids.mapped("woo_tmpl_id")))))
-            woo_variant_ids = woo_product_product_obj.search(
-                [("variant_id", "in", remain_products), ("woo_instance_id", "=", instance.id)])
-            remain_products = list(set(remain_products) - set(list(map(int,woo_variant_ids.mapped("variant_id")))))
-
-            coupon_exclude_product_id = coupon.get("excluded_product_ids")
-            exclude_woo_product_ids = woo_product_template_ept_obj.search(
-                [("woo_tmpl_id", "in", coupon_exclude_product_id),
-                 ("woo_instance_id", "=", instance.id)])
-            remain_exclude_products = list(
-                set(coupon_exclude_product_id) - set(list(map(int,exclude_woo_product_ids.mapped("woo_tmpl_id")))))
-            exclude_woo_variant_ids = woo_product_product_obj.search(
-                [("variant_id", "in", remain_exclude_products),
-                 ("woo_instance_id", "=", instance.id)])
-            remain_exclude_products = list(set(remain_exclude_products) - set(list(map(int,exclude_woo_variant_ids.mapped("variant_id")))))
-
-            if remain_products or remain_exclude_products:
+            vals = self.prepare_coupon_vals(instance, coupon, coupon_maps)
+            if not vals:
                 message = "System could not import coupon '{0}'. Some of the products are not imported in odoo.".format(
                     code)
                 self.create_woo_coupon_log_lines(message, common_log_book_id, queue_line)
                 continue
-
-            email_ids = ""
-            if email_restriction:
-                email_ids = ",".join(email_restriction)
-
-            vals = {
-                'coupon_id': coupon_id,
-                'code': code,
-                'description': coupon.get("description"),
-                'discount_type': coupon.get("discount_type"),
-                'amount': coupon.get("amount"),
-                'free_shipping': coupon.get("free_shipping"),
-                'expiry_date': coupon.get("date_expires") or False,
-                'minimum_amount': float(coupon.get("minimum_amount", 0.0)),
-                'maximum_amount': float(coupon.get("maximum_amount", 0.0)),
-                'individual_use': coupon.get("individual_use"),
-                'exclude_sale_items': coupon.get("exclude_sale_items"),
-                'product_ids': [(6, False, woo_product_ids.ids)],
-                'product_variant_ids': [(6, False, woo_variant_ids.ids)],
-                'exclude_product_ids': [(6, False, exclude_woo_product_ids.ids)],
-                'exclude_product_variant_ids': [(6, False, exclude_woo_variant_ids.ids)] or '',
-                'product_category_ids': product_category or '',
-                'excluded_product_category_ids': exclude_product_category or '',
-                'email_restrictions': email_ids,
-                'usage_limit': coupon.get("usage_limit"),
-                'limit_usage_to_x_items': coupon.get("limit_usage_to_x_items"),
-                'usage_limit_per_user': coupon.get("usage_limit_per_user"),
-                'usage_count': coupon.get("usage_count"),
-                'used_by': coupon.get("used_by"),
-                'woo_instance_id': instance.id,
-                'exported_in_woo': True,
-                'active': True
-            }
-            if not woo_coupon:
-                woo_coupon = self.create(vals)
-                queue_line.state = 'done'
-            else:
+            woo_coupon = coupon_maps["coupon_ids"].get(str(coupon.get("id"))) or \
+                         coupon_maps["codes"].get(code)
+            if woo_coupon:
                 woo_coupon.write(vals)
-                queue_line.state = 'done'
-            woo_coupons += woo_coupon
-            queue_line.coupon_data_queue_id.is_process_queue = False
+                woo_coupons += woo_coupon
+            else:
+                # The same code can come twice in a chunk, the latest data is kept.
+                vals_to_create.update({code: vals})
+            done_lines += queue_line
+        if vals_to_create:
+            woo_coupons += self.create(list(vals_to_create.values()))
+        done_lines.write({"state": "done", "processed_at": fields.Datetime.now()})
         return woo_coupons
 
     def woo_import_all_coupons(self, wcapi, instance, page, common_log_book_id, model_id):
@@ -233,7 +317,9 @@ class WooCoupons(models.Model):
         @author : Nilesh Parmar on date 17 Dec 2019.
         """
         common_log_line_obj = self.env["common.log.lines.ept"]
-        res = wcapi.get("coupons", params={"per_page": 100, 'page': page})
+        params = {"per_page": 100, 'page': page}
+        params.update(instance.get_woo_import_fields_params('coupon'))
+        res = wcapi.get("coupons", params=params)
         if not isinstance(res, requests.models.Response):
             message = "Get Coupons \nResponse is not in proper format :: %s" % (res)
             common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
@@ -261,22 +347,26 @@ class WooCoupons(models.Model):
         woo_coupon_data_queue_obj = self.env["woo.coupon.data.queue.ept"]
         vals = {"woo_instance_id": woo_instance.id, "created_by":created_by}
         coupon_queues = []
+        queue_size = self.env["woo.queue.chunk.policy.ept"].get_queue_chunk_policy(
+            woo_instance, "coupon")["queue_size"]
         while coupon_data:
-            data = coupon_data[:100]
+            data = coupon_data[:queue_size]
             if data:
                 coupon_data_queue = woo_coupon_data_queue_obj.create(vals)
                 coupon_queues.append(coupon_data_queue.id)
                 _logger.info("New coupon queue %s created." % (coupon_data_queue.name))
                 coupon_data_queue.create_woo_data_queue_lines(data)
                 _logger.info("Lines added in Coupon queue %s." % (coupon_data_queue.name))
-                del coupon_data[:100]
+                del coupon_data[:queue_size]
         _logger.info("Import coupon process completed.")
         return coupon_queues
 
     def sync_woo_coupons(self, instance, common_log_book_id, model_id):
         common_log_line_obj = self.env["common.log.lines.ept"]
         wcapi = instance.woo_connect()
-        res = wcapi.get('coupons', params={"per_page": 100})
+        params = {"per_page": 100}
+        params.update(instance.get_woo_import_fields_params('coupon'))
+        res = wcapi.get('coupons', params=params)
 
         if not isinstance(res, requests.models.Response):
             message = "Get Coupons \nResponse is not in proper format :: %s" % (res)
@@ -321,154 +411,134 @@ class WooCoupons(models.Model):
         """
         common_log_line_obj = self.env["common.log.lines.ept"]
         for instance in instance:
-            wcapi = instance.woo_connect()
+            instance_coupons = woo_coupons.filtered(lambda x: x.woo_instance_id == instance)
+            if not instance_coupons:
+                continue
+            _logger.info("Exporting coupons to Woo of instance {0}".format(instance.name))
+            exported_count = 0
+            for chunk_coupons, exported_coupons in self.post_coupon_batches(
+                    instance, "create", instance_coupons, common_log_book_id, model_id):
+                coupon_values = []
+                for woo_coupon, exported_coupon in zip(chunk_coupons, exported_coupons):
+                    if not isinstance(exported_coupon, dict):
+                        continue
+                    if exported_coupon.get("error"):
+                        message = "%s :: %s" % (exported_coupon["error"].get("message"), woo_coupon.code)
+                        common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
+                        continue
+                    if exported_coupon.get("id", False):
+                        coupon_values.append((woo_coupon.id, str(exported_coupon.get("id")),
+                                              exported_coupon.get("code") or woo_coupon.code))
+                self.write_exported_coupons(coupon_values)
+                exported_count += len(coupon_values)
+            _logger.info("Exported {0} coupons to Woo of instance {1}".format(exported_count, instance.name))
+
+    def prepare_export_coupon_data(self, woo_coupon):
+        """
+        Prepares the data of the coupon for WooCommerce.
+        :param woo_coupon: woo coupon
+        :return: dictionary of the coupon data
+        """
+        woo_product_tmpl_ids = woo_coupon.product_ids.mapped("woo_tmpl_id") + \
+                               woo_coupon.product_variant_ids.mapped("variant_id")
+        woo_product_exclude_tmpl_ids = woo_coupon.exclude_product_ids.mapped("woo_tmpl_id") + \
+                                       woo_coupon.exclude_product_variant_ids.mapped("variant_id")
+        email_ids = []
+        if woo_coupon.email_restrictions:
+            email_ids = woo_coupon.email_restrictions.split(",")
+        return {'code': woo_coupon.code,
+                'description': str(woo_coupon.description or '') or '',
+                'discount_type': woo_coupon.discount_type,
+                'free_shipping': woo_coupon.free_shipping,
+                'amount': str(woo_coupon.amount),
+                'date_expires': "{}".format(woo_coupon.expiry_date or ''),
+                'minimum_amount': str(woo_coupon.minimum_amount),
+                'maximum_amount': str(woo_coupon.maximum_amount),
+                'individual_use': woo_coupon.individual_use,
+                'exclude_sale_items': woo_coupon.exclude_sale_items,
+                'product_ids': woo_product_tmpl_ids,
+                'excluded_product_ids': woo_product_exclude_tmpl_ids,
+                'product_categories': woo_coupon.product_category_ids.mapped("woo_categ_id"),
+                'excluded_product_categories': woo_coupon.excluded_product_category_ids.mapped(
+                    "woo_categ_id"),
+                'email_restrictions': email_ids,
+                'usage_limit': woo_coupon.usage_limit,
+                'limit_usage_to_x_items': woo_coupon.limit_usage_to_x_items,
+                'usage_limit_per_user': woo_coupon.usage_limit_per_user,
+                }
+
+    def post_coupon_batches(self, instance, action, woo_coupons, common_log_book_id, model_id):
+        """
+        Posts the coupons to coupons/batch in chunks of 100 coupons. The chunks are posted
+        concurrently, at most COUPON_EXPORT_WORKERS at a time.
+        :param action: create or update
+        :return: list of tuple of the coupons of the chunk and the coupons of its response, in the
+        order of the request.
+        """
+        common_log_line_obj = self.env["common.log.lines.ept"]
+        wcapi = instance.woo_connect()
+        requests_data = []
+        for start in range(0, len(woo_coupons), 100):
+            chunk_coupons = woo_coupons[start:start + 100]
             coupons = []
-            for woo_coupon in woo_coupons:
-                woo_product_tmpl_ids = []
-                woo_product_exclude_tmpl_ids = []
-                woo_category_ids = []
-                woo_exclude_category_ids = []
-                for product_tmpl_id in woo_coupon.product_ids:
-                    woo_product_tmpl_ids.append(product_tmpl_id.woo_tmpl_id)
-                for product_variant in woo_coupon.product_variant_ids:
-                    woo_product_tmpl_ids.append(product_variant.variant_id)
-                for exclude_product_tmpl_id in woo_coupon.exclude_product_ids:
-                    woo_product_exclude_tmpl_ids.append(exclude_product_tmpl_id.woo_tmpl_id)
-                for exclude_variant in woo_coupon.exclude_product_variant_ids:
-                    woo_product_exclude_tmpl_ids.append(exclude_variant.variant_id)
-                for categ_id in woo_coupon.product_category_ids:
-                    woo_category_ids.append(categ_id.woo_categ_id)
-                for exclude_categ_id in woo_coupon.excluded_product_category_ids:
-                    woo_exclude_category_ids.append(exclude_categ_id.woo_categ_id)
-                email_ids = []
-                if woo_coupon.email_restrictions:
-                    email_ids = woo_coupon.email_restrictions.split(",")
-                vals = {'code': woo_coupon.code,
-                        'description': str(woo_coupon.description or '') or '',
-                        'discount_type': woo_coupon.discount_type,
-                        'free_shipping': woo_coupon.free_shipping,
-                        'amount': str(woo_coupon.amount),
-                        'date_expires': "{}".format(woo_coupon.expiry_date or ''),
-                        'minimum_amount': str(woo_coupon.minimum_amount),
-                        'maximum_amount': str(woo_coupon.maximum_amount),
-                        'individual_use': woo_coupon.individual_use,
-                        'exclude_sale_items': woo_coupon.exclude_sale_items,
-                        'product_ids': woo_product_tmpl_ids,
-                        'excluded_product_ids': woo_product_exclude_tmpl_ids,
-                        'product_categories': woo_category_ids,
-                        'excluded_product_categories': woo_exclude_category_ids,
-                        'email_restrictions': email_ids,
-                        'usage_limit': woo_coupon.usage_limit,
-                        'limit_usage_to_x_items': woo_coupon.limit_usage_to_x_items,
-                        'usage_limit_per_user': woo_coupon.usage_limit_per_user,
-                        }
+            for woo_coupon in chunk_coupons:
+                vals = self.prepare_export_coupon_data(woo_coupon)
+                action == "update" and vals.update({'id': woo_coupon.coupon_id})
                 coupons.append(vals)
-            coupons_data = {"create": coupons}
-            _logger.info("Exporting coupons to Woo of instance {0}".format(instance.name))
-            res = wcapi.post("coupons/batch", coupons_data)
-            if not res:
-                message = "Export Coupons \nResponse is not in proper format :: %s" % (res)
-                common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
+            requests_data.append((chunk_coupons, {action: coupons}))
+
+        post_woo_batch = self.env["woo.product.template.ept"].post_woo_batch
+        with ThreadPoolExecutor(max_workers=COUPON_EXPORT_WORKERS) as executor:
+            responses = list(executor.map(
+                lambda request_data: post_woo_batch(wcapi, "coupons/batch", request_data[1]),
+                requests_data))
 
+        results = []
+        for (chunk_coupons, _data), res in zip(requests_data, responses):
+            if not isinstance(res, requests.models.Response):
+                message = "%s Coupons \nResponse is not in proper format :: %s" % (
+                    action.capitalize(), res)
+                common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
+                continue
             if res.status_code not in [200, 201]:
-                message = "Can not Export Coupons, %s" % (res.content),
+                message = "Can not %s Coupons, %s" % (action, res.content)
                 common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
                 continue
-
             try:
                 response = res.json()
             except Exception as e:
-                message = "Json Error : While export coupon to WooCommerce for instance %s." \
-                          "\n%s" % (instance.name, e)
+                message = "Json Error : While %s coupon to WooCommerce for instance %s." \
+                          "\n%s" % (action, instance.name, e)
                 common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
                 continue
-            exported_coupons = response.get("create")
-            for woo_coupon in exported_coupons:
-                exported_coupon = woo_coupons.filtered(
-                    lambda x: x.code.lower() == woo_coupon.get("code") and x.woo_instance_id == instance)
-                if woo_coupon.get("id", False) and exported_coupon:
-                    exported_coupon.write({"coupon_id": woo_coupon.get("id"),
-                                           "exported_in_woo": True,
-                                           "code":woo_coupon.get("code"),
-                                           })
-            _logger.info("Exported {0} coupons to Woo of instance {1}".format(len(exported_coupons), instance.name))
+            results.append((chunk_coupons, isinstance(response, dict) and response.get(action) or []))
+        return results
+
+    def write_exported_coupons(self, coupon_values):
+        """
+        Writes the WooCommerce id and code of the exported coupons of a chunk. Every coupon gets
+        its own WooCommerce id and code, so they are written one by one.
+        :param coupon_values: list of tuple of coupon id, WooCommerce id and code
+        """
+        for woo_coupon_id, coupon_id, code in coupon_values:
+            self.browse(woo_coupon_id).write({"coupon_id": coupon_id, "code": code,
+                                              "exported_in_woo": True})
+        return True
 
     def update_woo_coupons(self, instances, woo_coupons, common_log_book_id, model_id):
+        """
+        this method used to update the exported coupons in woo commerce.
+        """
         common_log_line_obj = self.env["common.log.lines.ept"]
         for instance in instances:
-            wcapi = instance.woo_connect()
-            coupons = []
-            for woo_coupon in woo_coupons:
-                woo_product_tmpl_ids = []
-                woo_product_exclude_tmpl_ids = []
-                woo_category_ids = []
-                woo_exclude_category_ids = []
-                for product_tmpl_id in woo_coupon.product_ids:
-                    woo_product_tmpl_ids.append(product_tmpl_id.woo_tmpl_id)
-                for product_variant in woo_coupon.product_variant_ids:
-                    woo_product_tmpl_ids.append(product_variant.variant_id)
-                for exclude_product_tmpl_id in woo_coupon.exclude_product_ids:
-                    woo_product_exclude_tmpl_ids.append(exclude_product_tmpl_id.woo_tmpl_id)
-                for exclude_variant in woo_coupon.exclude_product_variant_ids:
-                    woo_product_exclude_tmpl_ids.append(exclude_variant.variant_id)
-                for categ_id in woo_coupon.product_category_ids:
-                    woo_category_ids.append(categ_id.woo_categ_id)
-                for exclude_categ_id in woo_coupon.excluded_product_category_ids:
-                    woo_exclude_category_ids.append(exclude_categ_id.woo_categ_id)
-
-                email_ids = []
-                if woo_coupon.email_restrictions:
-                    email_ids = woo_coupon.email_restrictions.split(",")
-
-                vals = {'code': woo_coupon.code,
-                        'description': str(woo_coupon.description or '') or '',
-                        'discount_type': woo_coupon.discount_type,
-                        'free_shipping': woo_coupon.free_shipping,
-                        'amount': str(woo_coupon.amount),
-                        'date_expires': "{}".format(woo_coupon.expiry_date or ''),
-                        'minimum_amount': str(woo_coupon.minimum_amount),
-                        'maximum_amount': str(woo_coupon.maximum_amount),
-                        'individual_use': woo_coupon.individual_use,
-                        'exclude_sale_items': woo_coupon.exclude_sale_items,
-                        'product_ids': woo_product_tmpl_ids,
-                        'excluded_product_ids': woo_product_exclude_tmpl_ids,
-                        'product_categories': woo_category_ids,
-                        'excluded_product_categories': woo_exclude_category_ids,
-                        'email_restrictions': email_ids,
-                        'usage_limit': woo_coupon.usage_limit,
-                        'limit_usage_to_x_items': woo_coupon.limit_usage_to_x_items,
-                        'usage_limit_per_user': woo_coupon.usage_limit_per_user,
-                        }
-
-                vals.update({'id': woo_coupon.coupon_id})
-                coupons.append(vals)
-            _logger.info("Exporting coupons to Woo of instance {0}".format(instance.name))
-            res = wcapi.put("coupons/batch", {'update': coupons})
-            if not isinstance(res, requests.models.Response):
-                message = "Update Coupon \nResponse is not in proper format :: %s" % (
-                    res)
-                common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_book_id,
-                                                                False)
-                return False
-
-            if res.status_code not in [200, 201]:
-                if res.status_code == 500:
-                    try:
-                        response = res.json()
-                    except Exception as e:
-                        message = "Json Error : While updating coupon to WooCommerce for instance " \
-                                  "%s. \n%s" % (instance.name, e)
-                        common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
-                    if isinstance(response, dict) and response.get("code") == "term_exists":
-                        woo_coupon.write(
-                            {"code": response.get("code"), "exported_in_woo": True})
-                    else:
-                        message = res.content
+            instance_coupons = woo_coupons.filtered(lambda x: x.woo_instance_id == instance)
+            if not instance_coupons:
+                continue
+            _logger.info("Updating coupons to Woo of instance {0}".format(instance.name))
+            for chunk_coupons, updated_coupons in self.post_coupon_batches(
+                    instance, "update", instance_coupons, common_log_book_id, model_id):
+                for woo_coupon, updated_coupon in zip(chunk_coupons, updated_coupons):
+                    if isinstance(updated_coupon, dict) and updated_coupon.get("error"):
+                        message = "%s :: %s" % (updated_coupon["error"].get("message"), woo_coupon.code)
                         common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
-            try:
-                response = res.json()
-            except Exception as e:
-                message = "Json Error : While updating Coupon to WooCommerce for instance %s. \n%s" \
-                          % (instance.name, e)
-                common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
-                return False
+        return True
@@ -34,6 +34,7 @@ class WooCustomerDataQueueLineEpt(models.Model):
         """
         common_log_line_obj = self.env["common.log.lines.ept"]
         partner_obj = self.env['res.partner']
+        queue_chunk_policy_obj = self.env["woo.queue.chunk.policy.ept"]
         model_id = common_log_line_obj.get_model_id("res.partner")
         log_lines = []
         self.env.cr.execute("""update woo_customer_data_queue_ept set is_process_queue = False 
@@ -74,6 +75,11 @@ class WooCustomerDataQueueLineEpt(models.Model):
         queues = queue_lines.queue_id
         queues and self.set_log_line_with_queue_line(queues)
         end = time.time()
+        for instance in queue_lines.woo_instance_id:
+            instance_lines = queue_lines.filtered(lambda x:x.woo_instance_id == instance)
+            queue_chunk_policy_obj.record_queue_run(
+                instance, "customer", len(instance_lines),
+                (end - start) * len(instance_lines) / len(queue_lines))
         _logger.info("Processed %s Customers in %s seconds." % (str(len(queue_lines)), str(end - start)))
         return True
 
@@ -84,28 +90,16 @@ class WooCustomerDataQueueLineEpt(models.Model):
             @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 31 August 2020 .
             Task_id: 165956
         """
-        woo_customer_data_queue_obj = self.env["woo.customer.data.queue.ept"]
         common_log_obj = self.env["common.log.book.ept"]
         ir_model_obj = self.env['ir.model']
         queue_lines = self
-        customer_queue_ids = []
         if self._context.get('line_ids', False):
             queue_lines = self._context.get('line_ids')
         elif not self:
-            query = """select queue.id
-                from woo_customer_data_queue_line_ept as queue_line
-                inner join woo_customer_data_queue_ept as queue on queue_line.queue_id = queue.id
-                where queue_line.state='draft' and queue.is_action_require = 'False'
-                ORDER BY queue_line.create_date ASC limit 500"""
-            self._cr.execute(query)
-            customer_queue_list = self._cr.fetchall()
-
-            for result in customer_queue_list:
-                customer_queue_ids.append(result[0])
-
-            if not customer_queue_ids:
+            # The queues of each instance are taken as per the queue chunk policy of the instance.
+            customer_queues = self.env["woo.queue.chunk.policy.ept"].claim_queues("customer")
+            if not customer_queues:
                 return False
-            customer_queues = woo_customer_data_queue_obj.browse(list(set(customer_queue_ids)))
             for customer_queue in customer_queues:
                 customer_queue.queue_process_count += 1
                 if customer_queue.queue_process_count > 3:
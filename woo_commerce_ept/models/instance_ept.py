@@ -13,6 +13,36 @@ from ..img_upload.img_file_upload import SpecialTransport
 
 _logger = logging.getLogger("Woo")
 
+WOO_DASHBOARD_COUNT_FIELDS = ['product_count', 'sale_order_count', 'picking_count', 'invoice_count',
+                              'exported_product_count', 'ready_to_export_product_count',
+                              'published_product_count', 'unpublished_product_count',
+                              'quotation_count', 'order_count', 'confirmed_picking_count',
+                              'partially_available_picking_count', 'assigned_picking_count',
+                              'done_picking_count', 'open_invoice_count', 'paid_invoice_count',
+                              'refund_invoice_count']
+
+# Fields requested from WooCommerce per entity while importing, only the fields which are
+# read by the import processes are requested.
+WOO_IMPORT_FIELDS = {
+    'product':['id', 'name', 'type', 'status', 'sku', 'permalink', 'date_created',
+               'date_modified', 'description', 'short_description', 'regular_price',
+               'sale_price', 'tax_status', 'manage_stock', 'weight', 'categories', 'tags',
+               'images', 'attributes', 'variations'],
+    'variation':['id', 'sku', 'permalink', 'date_created', 'date_modified', 'description',
+                 'regular_price', 'sale_price', 'manage_stock', 'weight', 'image', 'attributes'],
+    'order':['id', 'number', 'status', 'currency', 'date_created_gmt', 'date_paid',
+             'prices_include_tax', 'discount_total', 'total', 'customer_id', 'customer_note',
+             'customer_ip_address', 'transaction_id', 'payment_method', 'payment_method_title',
+             'billing', 'shipping', 'line_items', 'tax_lines', 'shipping_lines', 'fee_lines',
+             'coupon_lines', 'refunds'],
+    'customer':['id', 'email', 'first_name', 'last_name', 'billing', 'shipping'],
+    'coupon':['id', 'code', 'amount', 'date_expires', 'description', 'discount_type',
+              'email_restrictions', 'exclude_sale_items', 'excluded_product_categories',
+              'excluded_product_ids', 'free_shipping', 'individual_use', 'limit_usage_to_x_items',
+              'maximum_amount', 'minimum_amount', 'product_categories', 'product_ids',
+              'usage_count', 'usage_limit', 'usage_limit_per_user', 'used_by'],
+}
+
 class WooInstanceEpt(models.Model):
     _name = "woo.instance.ept"
     _description = "WooCommerce Instance"
@@ -92,43 +122,72 @@ class WooInstanceEpt(models.Model):
         """
         Counts all attributes of Woo instance.
         @author: Dipak Gogiya.
+        The counters of all instances are aggregated with a few grouped queries.
         """
+        counts = self.filtered('id').get_woo_dashboard_counts()
         for instance in self:
-            instance.product_count = len(instance.product_ids)
-            instance.sale_order_count = len(instance.sale_order_ids)
-            instance.picking_count = len(instance.picking_ids)
-            instance.invoice_count = len(instance.invoice_ids)
-            instance.exported_product_count = len(
-                    instance.product_ids.filtered(lambda x:x.exported_in_woo))
-            instance.ready_to_export_product_count = len(
-                    instance.product_ids.filtered(lambda x:not x.exported_in_woo))
-            instance.published_product_count = len(
-                    instance.product_ids.filtered(lambda x:x.website_published))
-            instance.unpublished_product_count = len(
-                    instance.product_ids.filtered(
-                            lambda x:not x.website_published and x.exported_in_woo))
-            instance.quotation_count = len(
-                    instance.sale_order_ids.filtered(lambda x:x.state in ['draft', 'sent']))
-            instance.order_count = len(
-                    instance.sale_order_ids.filtered(
-                            lambda x:x.state not in ['draft', 'sent', 'cancel']))
-            instance.confirmed_picking_count = len(
-                    instance.picking_ids.filtered(lambda x:x.state == 'confirmed'))
-            instance.partially_available_picking_count = len(
-                    instance.picking_ids.filtered(lambda x:x.state == 'partially_available'))
-            instance.assigned_picking_count = len(
-                    instance.picking_ids.filtered(lambda x:x.state == 'assigned'))
-            instance.done_picking_count = len(
-                    instance.picking_ids.filtered(lambda x:x.state == 'done'))
-            instance.open_invoice_count = len(instance.invoice_ids.filtered(
-                    lambda
-                        x:x.state == 'posted' and x.move_type == 'out_invoice' and not x.payment_state == 'paid'))
-            instance.paid_invoice_count = len(instance.invoice_ids.filtered(
-                    lambda
-                        x:x.state == 'posted' and x.payment_state in ['paid',
-                                                                      'in_payment'] and x.move_type == 'out_invoice'))
-            instance.refund_invoice_count = len(
-                    instance.invoice_ids.filtered(lambda x:x.move_type == 'out_refund'))
+            instance.update(counts.get(instance.id, dict.fromkeys(WOO_DASHBOARD_COUNT_FIELDS, 0)))
+
+    def get_woo_dashboard_counts(self):
+        """
+        Counts the products, orders, pickings and invoices of the instances with one grouped query
+        per model.
+        @return: Dictionary of {instance_id: {counter field: count}}.
+        """
+        counts = {instance_id:dict.fromkeys(WOO_DASHBOARD_COUNT_FIELDS, 0)
+                  for instance_id in self.ids}
+        domain = [('woo_instance_id', 'in', self.ids)]
+
+        for group in self.env['woo.product.template.ept'].read_group(
+                domain, ['woo_instance_id'], ['woo_instance_id', 'exported_in_woo',
+                                              'website_published'], lazy=False):
+            instance_counts = counts[group['woo_instance_id'][0]]
+            count = group['__count']
+            instance_counts['product_count'] += count
+            if group['exported_in_woo']:
+                instance_counts['exported_product_count'] += count
+            else:
+                instance_counts['ready_to_export_product_count'] += count
+            if group['website_published']:
+                instance_counts['published_product_count'] += count
+            elif group['exported_in_woo']:
+                instance_counts['unpublished_product_count'] += count
+
+        for group in self.env['sale.order'].read_group(domain, ['woo_instance_id'],
+                                                       ['woo_instance_id', 'state'], lazy=False):
+            instance_counts = counts[group['woo_instance_id'][0]]
+            count = group['__count']
+            instance_counts['sale_order_count'] += count
+            if group['state'] in ['draft', 'sent']:
+                instance_counts['quotation_count'] += count
+            elif group['state'] != 'cancel':
+                instance_counts['order_count'] += count
+
+        picking_state_fields = {'confirmed':'confirmed_picking_count',
+                                'partially_available':'partially_available_picking_count',
+                                'assigned':'assigned_picking_count',
+                                'done':'done_picking_count'}
+        for group in self.env['stock.picking'].read_group(domain, ['woo_instance_id'],
+                                                          ['woo_instance_id', 'state'], lazy=False):
+            instance_counts = counts[group['woo_instance_id'][0]]
+            instance_counts['picking_count'] += group['__count']
+            if group['state'] in picking_state_fields:
+                instance_counts[picking_state_fields[group['state']]] += group['__count']
+
+        for group in self.env['account.move'].read_group(
+                domain, ['woo_instance_id'], ['woo_instance_id', 'state', 'move_type',
+                                              'payment_state'], lazy=False):
+            instance_counts = counts[group['woo_instance_id'][0]]
+            count = group['__count']
+            instance_counts['invoice_count'] += count
+            if group['move_type'] == 'out_refund':
+                instance_counts['refund_invoice_count'] += count
+            elif group['move_type'] == 'out_invoice' and group['state'] == 'posted':
+                if group['payment_state'] in ['paid', 'in_payment']:
+                    instance_counts['paid_invoice_count'] += count
+                if group['payment_state'] != 'paid':
+                    instance_counts['open_invoice_count'] += count
+        return counts
 
     name = fields.Char(size=120, required=True)
     company_id = fields.Many2one('res.company', string='Company',
@@ -196,6 +255,8 @@ class WooInstanceEpt(models.Model):
                                                help="Selected status orders will be imported from WooCommerce")
     last_order_import_date = fields.Datetime(
             help="This date is used to import order from this date.")
+    last_product_import_date = fields.Datetime(
+            help="Products modified after this date are imported by the incremental product import.")
     sales_team_id = fields.Many2one('crm.team',
                                     help="Choose Sales Team that handles the order you import.")
     # global_channel_id = fields.Many2one('global.channel.ept')
@@ -215,6 +276,13 @@ class WooInstanceEpt(models.Model):
                                        help="Imports orders at certain interval.")
     auto_update_order_status = fields.Boolean(string="Auto Update Order Status in Woo?",
                                               help="Automatically update order status to WooCommerce.")
+    defer_order_workflow = fields.Boolean("Process Order Workflow in Background?",
+                                          help="If checked, imported orders are confirmed, invoiced "
+                                               "and shipped by a scheduler instead of while the "
+                                               "order is created.")
+    order_workflow_batch_size = fields.Integer(default=100,
+                                               help="Number of orders processed by the order "
+                                                    "workflow scheduler per instance and run.")
     store_timezone = fields.Selection("_woo_tz_get", help="Timezone of Store for requesting data.")
     apply_tax = fields.Selection(
             [("odoo_tax", "Odoo Default Tax"), ("create_woo_tax", "Create new tax if not found")],
@@ -271,6 +339,10 @@ class WooInstanceEpt(models.Model):
     active = fields.Boolean(default=True)
 
     webhook_ids = fields.One2many("woo.webhook.ept", "instance_id")
+    queue_chunk_policy_ids = fields.One2many("woo.queue.chunk.policy.ept", "woo_instance_id",
+                                             string="Queue Chunking",
+                                             help="Sizes of the data queues and of the scheduler "
+                                                  "runs per entity.")
     create_woo_product_webhook = fields.Boolean("Manage Woo Products via Webhooks",
                                                 help="If checked, it will create all product related webhooks.")
     create_woo_customer_webhook = fields.Boolean("Manage Woo Customers via Webhooks",
@@ -290,6 +362,12 @@ class WooInstanceEpt(models.Model):
                                             ("round_globally", "Round Globally")],
                                            default="round_per_line",
                                            string="Tax Rounding Method")
+    woo_extra_import_fields = fields.Text("Extra Import Fields",
+                                          help="Additional WooCommerce fields to request while importing, "
+                                               "one entity per line as entity: field1, field2 "
+                                               "(e.g. order: meta_data). Entities are product, variation, "
+                                               "order, customer and coupon. Use entity: * to request the "
+                                               "full resource.")
     is_instance_create_from_onboarding_panel = fields.Boolean(default=False)
     is_onboarding_configurations_done = fields.Boolean(default=False)
 
@@ -554,6 +632,41 @@ class WooInstanceEpt(models.Model):
             return []
         return response
 
+    def get_woo_default_import_fields(self, entity):
+        """ This method used to get the fields read by the import processes of the entity. Modules
+            reading other keys of the WooCommerce response extend it to request them as well.
+            @param entity: One of the keys of WOO_IMPORT_FIELDS.
+            @return: List of fields, empty to get the full resource.
+        """
+        return list(WOO_IMPORT_FIELDS.get(entity, []))
+
+    def get_woo_import_fields(self, entity):
+        """ This method used to get the fields to request from WooCommerce for the entity.
+            @param entity: One of the keys of WOO_IMPORT_FIELDS.
+            @return: Comma separated fields for the _fields param or False to get the full resource.
+        """
+        import_fields = self.get_woo_default_import_fields(entity)
+        if not import_fields:
+            return False
+        for line in (self.woo_extra_import_fields or '').splitlines():
+            line_entity, _sep, extra_fields = line.partition(':')
+            if line_entity.strip().lower() != entity:
+                continue
+            for field in extra_fields.split(','):
+                field = field.strip()
+                if field == '*':
+                    return False
+                if field and field not in import_fields:
+                    import_fields.append(field)
+        return ','.join(import_fields)
+
+    def get_woo_import_fields_params(self, entity):
+        """ This method used to prepare the _fields param of the import request for the entity.
+            @return: Dictionary to update in the params of the request.
+        """
+        import_fields = self.get_woo_import_fields(entity)
+        return {'_fields':import_fields} if import_fields else {}
+
     @api.model
     def woo_connect(self):
         """
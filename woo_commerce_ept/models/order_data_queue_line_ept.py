@@ -63,24 +63,14 @@ class WooOrderDataQueueLineEpt(models.Model):
         """
         # below two line add by Haresh Mori on date 7/1/2020, this is used to update
         # is_process_queue as False.
-        woo_order_data_queue_obj = self.env["woo.order.data.queue.ept"]
+        queue_chunk_policy_obj = self.env["woo.queue.chunk.policy.ept"]
         self.env.cr.execute("""update woo_order_data_queue_ept set is_process_queue = False where is_process_queue = True""")
         self._cr.commit()
-        order_queue_ids = []
-        query = """select queue.id
-                from woo_order_data_queue_line_ept as queue_line
-                inner join woo_order_data_queue_ept as queue on queue_line.order_data_queue_id = queue.id
-                where queue_line.state='draft' and queue.is_action_require = 'False'
-                ORDER BY queue_line.create_date ASC limit 100"""
-        self._cr.execute(query)
-        order_queue_list = self._cr.fetchall()
-        for result in order_queue_list:
-            order_queue_ids.append(result[0])
-
-        if not order_queue_ids:
+        # The queues of each instance are taken as per the queue chunk policy of the instance.
+        order_queues = queue_chunk_policy_obj.claim_queues("order")
+        if not order_queues:
             return
 
-        order_queues = woo_order_data_queue_obj.browse(list(set(order_queue_ids)))
         for order_queue_id in order_queues:
             order_queue_lines = order_queue_id and order_queue_id.order_data_queue_line_ids.filtered(
                     lambda x:x.state == "draft")
@@ -94,7 +84,10 @@ class WooOrderDataQueueLineEpt(models.Model):
                 continue
 
             self._cr.commit()
+            start = time.time()
             order_queue_lines and order_queue_lines.process_order_queue_line()
+            queue_chunk_policy_obj.record_queue_run(order_queue_id.instance_id, "order",
+                                                    len(order_queue_lines), time.time() - start)
         return True
 
     def create_order_queue_schedule_activity(self, queue_id):
@@ -138,30 +131,28 @@ class WooOrderDataQueueLineEpt(models.Model):
         Process the imported order data and create the order.
         @author: Haresh Mori on Date 24-Oct-2019.
         """
-        common_log_book_obj = self.env["common.log.book.ept"]
-        ir_model_obj = self.env["ir.model"]
         sale_order_obj = self.env["sale.order"]
         start = time.time()
         queue_id = self.order_data_queue_id
         if queue_id.created_by == 'webhook':
             update_order = True
-        model_id = ir_model_obj.search([("model", "=", "sale.order")])
-        if queue_id.common_log_book_id:
-            common_log_book_id = queue_id.common_log_book_id
-        else:
-            common_log_book_id = common_log_book_obj.create({"type":"import",
-                                                             "module":"woocommerce_ept",
-                                                             "model_id":model_id.id,
-                                                             "woo_instance_id":queue_id.instance_id.id,
-                                                             "active":True})
-
+        model_id = self.env["common.log.lines.ept"].get_model_id("sale.order")
+
+        # The log lines of the orders are created together once the queue lines are processed, the
+        # log book of the queue is created with the first of them.
+        common_log_book_id = queue_id.common_log_book_id.buffer_log_lines_ept(
+            {"type":"import",
+             "module":"woocommerce_ept",
+             "model_id":model_id,
+             "woo_instance_id":queue_id.instance_id.id,
+             "active":True})
+        sale_order_obj = sale_order_obj.with_env(common_log_book_id.env)
         if update_order:
             sale_order_obj.update_woo_order(self, common_log_book_id)
         else:
             sale_order_obj.create_woo_orders(self, common_log_book_id)
-        if not common_log_book_id.log_lines:
-            common_log_book_id.unlink()
-        else:
+        common_log_book_id = common_log_book_id.flush_log_lines_ept()
+        if common_log_book_id:
             queue_id.common_log_book_id = common_log_book_id
             # Below method used to create a schedule activity base on the configuration.
             if queue_id.instance_id.is_create_schedule_activity:
@@ -8,10 +8,14 @@ class ProductProduct(models.Model):
     _inherit = 'product.product'
 
     def _woo_product_count(self):
-        woo_product_obj = self.env['woo.product.product.ept']
+        """
+        Counts the Woo products of all products with one grouped query.
+        """
+        groups = self.env['woo.product.product.ept'].read_group(
+            [('product_id', 'in', self.ids)], ['product_id'], ['product_id'])
+        counts = {group['product_id'][0]:group['product_id_count'] for group in groups}
         for product in self:
-            woo_products = woo_product_obj.search([('product_id', '=', product.id)])
-            product.woo_product_count = len(woo_products) if woo_products else 0
+            product.woo_product_count = counts.get(product.id, 0)
 
     woo_product_count = fields.Integer(string='# Sales Count', compute='_woo_product_count')
     image_url = fields.Char(size=600, string='Image URL')
@@ -23,13 +27,12 @@ class ProductProduct(models.Model):
         """
         if 'active' in vals.keys():
             woo_product_product_obj = self.env['woo.product.product.ept']
-            for product in self:
-                woo_product = woo_product_product_obj.search(
-                        [('product_id', '=', product.id)])
-                if vals.get('active'):
-                    woo_product = woo_product_product_obj.with_context(active_test=False).search(
-                        [('product_id', '=', product.id), ('active', '=', False)])
-                woo_product and woo_product.write({'active':vals.get('active')})
+            domain = [('product_id', 'in', self.ids)]
+            if vals.get('active'):
+                woo_product_product_obj = woo_product_product_obj.with_context(active_test=False)
+                domain.append(('active', '=', False))
+            woo_products = woo_product_product_obj.search(domain)
+            woo_products and woo_products.write({'active':vals.get('active')})
         return super(ProductProduct, self).write(vals)
 
 
@@ -46,20 +49,23 @@ class ProductTemplate(models.Model):
         """
         if 'active' in vals.keys():
             woo_product_template_obj = self.env['woo.product.template.ept']
-            for template in self:
-                woo_templates = woo_product_template_obj.search(
-                        [('product_tmpl_id', '=', template.id)])
-                if vals.get('active'):
-                    woo_templates = woo_product_template_obj.search(
-                            [('product_tmpl_id', '=', template.id), ('active', '=', False)])
-                woo_templates and woo_templates.write({'active':vals.get('active')})
+            domain = [('product_tmpl_id', 'in', self.ids)]
+            if vals.get('active'):
+                woo_product_template_obj = woo_product_template_obj.with_context(active_test=False)
+                domain.append(('active', '=', False))
+            woo_templates = woo_product_template_obj.search(domain)
+            woo_templates and woo_templates.write({'active':vals.get('active')})
         res = super(ProductTemplate, self).write(vals)
         return res
 
     def _woo_template_count(self):
-        woo_product_template_obj = self.env['woo.product.template.ept']
+        """
+        Counts the Woo templates of all templates with one grouped query.
+        """
+        groups = self.env['woo.product.template.ept'].read_group(
+            [('product_tmpl_id', 'in', self.ids)], ['product_tmpl_id'], ['product_tmpl_id'])
+        counts = {group['product_tmpl_id'][0]:group['product_tmpl_id_count'] for group in groups}
         for template in self:
-            woo_templates = woo_product_template_obj.search([('product_tmpl_id', '=', template.id)])
-            template.woo_template_count = len(woo_templates) if woo_templates else 0
+            template.woo_template_count = counts.get(template.id, 0)
 
     woo_template_count = fields.Integer(string='# Sales', compute='_woo_template_count')
@@ -2,6 +2,7 @@
 #See LICENSE file for full copyright and licensing details.
 
 from odoo import models, fields
+from odoo.addons.common_connector_library.models.product_attribute import _normalize_attribute_name
 
 
 class WooProductAttributeEpt(models.Model):
@@ -21,4 +22,30 @@ class WooProductAttributeEpt(models.Model):
     attribute_type = fields.Selection([('select', 'Select'), ('text', 'Text')],
                                       string='Attribute Type', default='select')
     has_archives = fields.Boolean(string="Enable Archives?",
-                                  help="Enable/Disable attribute archives")
\ No newline at end of file
+                                  help="Enable/Disable attribute archives")
+
+    def get_woo_attribute_index(self, instance):
+        """
+        Loads the exported Woo attributes of the instance once and indexes them by normalized
+        name, Odoo attribute and Woo attribute id.
+        :param instance: It contain the browsable object of the current instance
+        :return: It will return the index into Dict Format.
+        """
+        woo_attribute_index = {'instance_id':instance.id, 'by_name':{}, 'by_attribute':{},
+                               'by_woo_id':{}}
+        woo_attributes = self.search([('woo_instance_id', '=', instance.id),
+                                      ('exported_in_woo', '=', True)])
+        for woo_attribute in woo_attributes:
+            self.add_to_woo_attribute_index(woo_attribute_index, woo_attribute)
+        return woo_attribute_index
+
+    @staticmethod
+    def add_to_woo_attribute_index(woo_attribute_index, woo_attribute):
+        """
+        Adds Woo attribute in the index, keeping the first record found for every key.
+        """
+        woo_attribute_index['by_name'].setdefault(_normalize_attribute_name(woo_attribute.name),
+                                                  woo_attribute)
+        woo_attribute_index['by_attribute'].setdefault(woo_attribute.attribute_id.id, woo_attribute)
+        woo_attribute_index['by_woo_id'].setdefault(str(woo_attribute.woo_attribute_id), woo_attribute)
+        return woo_attribute_index
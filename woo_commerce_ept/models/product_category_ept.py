@@ -49,501 +49,460 @@ class WooProductCategoryEpt(models.Model):
     def name_create(self, name):
         return self.create({'name':name}).name_get()[0]
 
+    def prepare_woo_category_sync(self, instance):
+        """ This method used to prepare the category sync of an import run. The category tree is
+            loaded from WooCommerce on first use in the run and the categories processed in the run
+            are not written again, so it is passed to every category sync of the run.
+            @return: Dictionary of the category sync.
+        """
+        return {'instance_id':instance.id, 'category_tree':False, 'processed_categs':{}}
+
     def create_or_update_woo_categ(self, instance, woo_common_log_id, model_id,
-                                   woo_product_categ_name, sync_images_with_product=True):
-        common_log_line_obj = self.env["common.log.lines.ept"]
-        woo_categ = False
-        categ_name_list = []
-        product_categ_ids = []
-        wcapi = instance.woo_connect()
-        categ_res = wcapi.get("products/categories?fields=id,name,parent")
-        if not isinstance(categ_res, requests.models.Response):
-            message = "Get Product Category \nResponse is not in proper format :: %s" % (
-                categ_res)
-            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                            woo_common_log_id, False)
-            return False
-        if categ_res.status_code not in [200, 201]:
-            common_log_line_obj.woo_product_export_log_line(categ_res.content, model_id,
-                                                            woo_common_log_id, False)
+                                   woo_product_categ_name, sync_images_with_product=True,
+                                   category_sync=False):
+        """ This method used to find the category by name in the category tree of the instance and
+            create/update it with its parent categories in Odoo.
+            @param category_sync: Category sync of the import run.
+            @return: Record of the category or False when it is not found in WooCommerce.
+        """
+        category_sync = category_sync or self.prepare_woo_category_sync(instance)
+        category_tree = self.get_woo_category_tree(instance, woo_common_log_id, model_id,
+                                                   category_sync=category_sync)
+        if not category_tree:
             return False
-        try:
-            categ_response = categ_res.json()
-        except Exception as e:
-            message = "Json Error : While import product category %s from WooCommerce for " \
-                      "instance %s. \n%s" % (woo_product_categ_name, instance.name, e)
-            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                            woo_common_log_id, False)
+        woo_categ_id = category_tree['by_name'].get(woo_product_categ_name.lower())
+        if not woo_categ_id:
+            # The category can be created in the store after the tree is loaded.
+            category_tree = self.get_woo_category_tree(instance, woo_common_log_id, model_id,
+                                                       refresh=True, category_sync=category_sync)
+            woo_categ_id = category_tree and category_tree['by_name'].get(
+                    woo_product_categ_name.lower())
+            if not woo_categ_id:
+                return False
+        return self.create_or_update_woo_categ_chain(instance, category_tree, woo_categ_id,
+                                                     sync_images_with_product,
+                                                     category_sync['processed_categs'])
+
+    def get_woo_category_tree(self, instance, woo_common_log_id, model_id, refresh=False,
+                              category_sync=False):
+        """ This method used to get the category tree of the instance. It is loaded from
+            WooCommerce once per category sync of a run.
+            @param category_sync: Category sync of the run, the tree is loaded every time without it.
+            @return: Dictionary with the categories by id and the category ids by lower name or
+            False when the categories could not be loaded.
+        """
+        if not refresh and category_sync and category_sync['category_tree']:
+            return category_sync['category_tree']
+        categories = self.load_woo_categories(instance, woo_common_log_id, model_id)
+        if categories is False:
             return False
-        if instance.woo_version == 'v3':
-            product_categories = categ_response.get('product_categories')
-        else:
-            product_categories = categ_response
-        categ = list(filter(lambda categ:categ['name'].lower() == woo_product_categ_name.lower(),
-                            product_categories))
-        if categ:
-            categ = categ[0]
-            product_categ_ids.append(categ.get('id'))
-            categ_name_list.append(woo_product_categ_name.lower())
-        for product_categ_id in product_categ_ids:
-            tmp_categ = list(
-                    filter(lambda categ1:categ1['id'] == product_categ_id, product_categories))
-            if tmp_categ:
-                tmp_categ = tmp_categ[0]
-                if tmp_categ.get('parent') and tmp_categ.get('parent') not in product_categ_ids:
-                    product_categ_ids.append(tmp_categ.get('parent'))
-                    tmp_parent_categ = list(
-                            filter(lambda categ2:categ2['id'] == tmp_categ.get('parent'),
-                                   product_categories))
-                    tmp_parent_categ and categ_name_list.append(
-                            tmp_parent_categ[0].get('name').lower())
+        category_tree = {'by_id':{}, 'by_name':{}}
+        for categ in categories:
+            if not isinstance(categ, dict):
+                continue
+            category_tree['by_id'].update({categ.get('id'):categ})
+            category_tree['by_name'].setdefault((categ.get('name') or '').lower(), categ.get('id'))
+        if category_sync:
+            category_sync['category_tree'] = category_tree
+        return category_tree
 
-        product_categ_ids.reverse()
-        for product_categ_id in product_categ_ids:
-            response = wcapi.get("products/categories/%s" % (product_categ_id))
-            if not isinstance(response, requests.models.Response):
-                message = "Get Product Category \nResponse is not in proper format :: %s" % (
-                    response)
+    def load_woo_categories(self, instance, woo_common_log_id, model_id):
+        """ This method used to load all the categories of the instance page by page.
+            @return: List of categories or False, when any page could not be loaded.
+        """
+        common_log_line_obj = self.env["common.log.lines.ept"]
+        wcapi = instance.woo_connect()
+        categories = []
+        page = total_pages = 1
+        while page <= total_pages:
+            if instance.woo_version == 'v3':
+                res = wcapi.get("products/categories?filter[limit]=1000&page=%s" % (page))
+            else:
+                res = wcapi.get("products/categories", params={'per_page':100, 'page':page})
+            if not isinstance(res, requests.models.Response):
+                message = "Get Product Category \nResponse is not in proper format :: %s" % (res)
                 common_log_line_obj.woo_product_export_log_line(message, model_id,
                                                                 woo_common_log_id, False)
-                continue
-            if response.status_code not in [200, 201]:
-                common_log_line_obj.woo_product_export_log_line(response.content, model_id,
+                return False
+            if res.status_code not in [200, 201]:
+                common_log_line_obj.woo_product_export_log_line(res.content, model_id,
                                                                 woo_common_log_id, False)
-                continue
+                return False
             try:
-                response = response.json()
+                response = res.json()
             except Exception as e:
-                message = "Json Error : While import product category with id %s from " \
-                          "WooCommerce for instance %s. \n%s" % (
-                              product_categ_id, instance.name, e)
+                message = "Json Error : While import product categories from WooCommerce for " \
+                          "instance %s. \n%s" % (instance.name, e)
                 common_log_line_obj.woo_product_export_log_line(message, model_id,
                                                                 woo_common_log_id, False)
-                continue
+                return False
             if instance.woo_version == 'v3':
-                categ = response.get('product_category')
+                total_pages = int(res.headers.get('X-WC-TotalPages') or 1)
+                categories += response.get('product_categories') or []
             else:
-                categ = response
-            product_category = {'id':categ.get('id'), 'name':categ.get('name')}
-            categ_name = product_category.get('name')
-            if categ_name.lower() in categ_name_list:
-                single_catg_res = wcapi.get("products/categories/%s" % (product_category.get('id')))
-                if not isinstance(single_catg_res, requests.models.Response):
-                    message = "Get Product Category \nResponse is not in proper format :: %s" % (
-                        single_catg_res)
-                    common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                    woo_common_log_id, False)
-                    continue
-                try:
-                    single_catg_response = single_catg_res.json()
-                except Exception as e:
-                    message = "Json Error : While import product category with id %s from" \
-                              " WooCommerce for instance %s. \n%s" % (
-                                  product_category.get('id'), instance.name, e)
-                    common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                    woo_common_log_id, False)
-                    continue
-                if instance.woo_version == 'v3':
-                    single_catg = single_catg_response.get('product_category')
-                else:
-                    single_catg = single_catg_response
-                parent_woo_id = single_catg.get('parent')
-                parent_id = False
-                binary_img_data = False
-                if parent_woo_id:
-                    parent_id = self.search([('woo_categ_id', '=', parent_woo_id),
-                                             ('woo_instance_id', '=', instance.id)], limit=1).id
-                vals = {'name':categ_name, 'woo_instance_id':instance.id, 'parent_id':parent_id,
-                        'woo_categ_id':product_category.get('id'),
-                        'display':single_catg.get('display'), 'slug':single_catg.get('slug'),
-                        'exported_in_woo':True, 'description':single_catg.get('description', '')}
-                if sync_images_with_product:
-                    res_image = False
-                    if instance.woo_version == 'v3':
-                        res_image = single_catg.get('image')
-                    else:
-                        res_image = single_catg.get('image') and single_catg.get('image').get('src',
-                                                                                              '')
-                    if instance.woo_is_image_url:
-                        res_image and vals.update({'response_url':res_image})
-                    else:
-                        if res_image:
-                            try:
-                                res_img = requests.get(res_image, stream=True, verify=False,
-                                                       timeout=10)
-                                if res_img.status_code == 200:
-                                    binary_img_data = base64.b64encode(res_img.content)
-                            except Exception:
-                                pass
-                        binary_img_data and vals.update({'image':binary_img_data})
-                woo_categ = self.search([('woo_categ_id', '=', product_category.get('id')),
-                                         ('woo_instance_id', '=', instance.id)], limit=1)
-                if not woo_categ:
-                    woo_categ = self.search([('slug', '=', product_category.get('slug')),
-                                             ('woo_instance_id', '=', instance.id)], limit=1)
-                if woo_categ:
-                    woo_categ.write(vals)
-                else:
-                    woo_categ = self.create(vals)
+                total_pages = int(res.headers.get('x-wp-totalpages') or 1)
+                categories += response
+            page += 1
+        return categories
+
+    def create_or_update_woo_categ_chain(self, instance, category_tree, woo_categ_id,
+                                         sync_images_with_product=True, processed_categs=None):
+        """ This method used to create/update the category and its parent categories from the
+            category tree, parents first.
+            @param processed_categs: Dictionary of already processed categories by WooCommerce id,
+            which are not written again.
+            @return: Record of the category.
+        """
+        if processed_categs is None:
+            processed_categs = {}
+        chain = []
+        categ = category_tree['by_id'].get(woo_categ_id)
+        while categ and categ not in chain and categ.get('id') not in processed_categs:
+            chain.append(categ)
+            categ = category_tree['by_id'].get(categ.get('parent'))
+        woo_categ = categ and processed_categs.get(categ.get('id')) or False
+        chain.reverse()
+        for categ in chain:
+            parent_id = woo_categ and woo_categ.id or False
+            woo_categ = self.create_or_update_woo_categ_from_response(instance, categ, parent_id,
+                                                                      sync_images_with_product)
+            processed_categs.update({categ.get('id'):woo_categ})
         return woo_categ
 
-    def import_all_woo_categories(self, wcapi, instance, page, woo_common_log_id, model_id):
-        common_log_line_obj = self.env["common.log.lines.ept"]
-        if instance.woo_version == 'v3':
-            res = wcapi.get("products/categories?filter[limit]=1000&page=%s" % (page))
-        else:
-            res = wcapi.get("products/categories", params={'per_page':100, 'page':page})
-        if not isinstance(res, requests.models.Response):
-            message = "Get All Product Category \nResponse is not in proper format :: %s" % (
-                res)
-            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                            woo_common_log_id, False)
-            return []
-        if res.status_code not in [200, 201]:
-            common_log_line_obj.woo_product_export_log_line(res.content, model_id,
-                                                            woo_common_log_id, False)
-            return []
-        try:
-            response = res.json()
-        except Exception as e:
-            message = "Json Error : While import product categories from WooCommerce for " \
-                      "instance %s. \n%s" % (instance.name, e)
-            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                            woo_common_log_id, False)
-            return []
-        if instance.woo_version == 'v3':
-            errors = response.get('errors', '')
-            if errors:
-                message = errors[0].get('message')
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                woo_common_log_id, False)
-                return []
-            return response.get('product_categories')
+    def create_or_update_woo_categ_from_response(self, instance, categ, parent_id=False,
+                                                 sync_images_with_product=True):
+        """ This method used to create/update the category in Odoo from the category response.
+            @param parent_id: Id of the parent category, it is searched when not given.
+            @return: Record of the category.
+        """
+        parent_woo_id = categ.get('parent')
+        if parent_woo_id and not parent_id:
+            parent_id = self.search([('woo_categ_id', '=', parent_woo_id),
+                                     ('woo_instance_id', '=', instance.id)], limit=1).id
+        vals = {'name':categ.get('name'), 'woo_instance_id':instance.id,
+                'parent_id':parent_woo_id and parent_id or False,
+                'woo_categ_id':categ.get('id'), 'display':categ.get('display'),
+                'slug':categ.get('slug'), 'exported_in_woo':True,
+                'description':categ.get('description', '')}
+        if sync_images_with_product:
+            binary_img_data = False
+            if instance.woo_version == 'v3':
+                res_image = categ.get('image')
+            else:
+                res_image = categ.get('image') and categ.get('image').get('src', '')
+            if instance.woo_is_image_url:
+                res_image and vals.update({'response_url':res_image})
+            else:
+                if res_image:
+                    try:
+                        res_img = requests.get(res_image, stream=True, verify=False, timeout=10)
+                        if res_img.status_code == 200:
+                            binary_img_data = base64.b64encode(res_img.content)
+                    except Exception:
+                        pass
+                binary_img_data and vals.update({'image':binary_img_data})
+        woo_categ = self.search([('woo_categ_id', '=', categ.get('id')),
+                                 ('woo_instance_id', '=', instance.id)], limit=1)
+        if not woo_categ:
+            woo_categ = self.search([('slug', '=', categ.get('slug')),
+                                     ('woo_instance_id', '=', instance.id)], limit=1)
+        if woo_categ:
+            woo_categ.write(vals)
         else:
-            return response
+            woo_categ = self.create(vals)
+        return woo_categ
 
     def sync_woo_product_category(self, instance, woo_common_log_id, woo_product_categ=False,
-                                  woo_product_categ_name=False, sync_images_with_product=True):
+                                  woo_product_categ_name=False, sync_images_with_product=True,
+                                  category_sync=False):
         common_log_line_obj = self.env["common.log.lines.ept"]
         model_id = common_log_line_obj.get_model_id("woo.product.categ.ept")
-        wcapi = instance.woo_connect()
+        category_sync = category_sync or self.prepare_woo_category_sync(instance)
         if woo_product_categ and woo_product_categ.exported_in_woo:
-            response = wcapi.get("products/categories/%s" % (woo_product_categ.woo_categ_id))
-            if not isinstance(response, requests.models.Response):
-                if not isinstance(response, requests.models.Response):
-                    message = "Get Product Category \nResponse is not in proper format :: %s" % (
-                        response)
-                    common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                    woo_common_log_id, False)
+            woo_categ_id = int(woo_product_categ.woo_categ_id or 0)
+            if woo_categ_id in category_sync['processed_categs']:
+                return True
+            category_tree = self.get_woo_category_tree(instance, woo_common_log_id, model_id,
+                                                       category_sync=category_sync)
+            if not category_tree:
                 return True
-            if response.status_code == 404:
+            # The category can be created in the store after the tree is loaded.
+            if woo_categ_id not in category_tree['by_id']:
+                category_tree = self.get_woo_category_tree(instance, woo_common_log_id, model_id,
+                                                           refresh=True,
+                                                           category_sync=category_sync)
+                if not category_tree:
+                    return True
+            if woo_categ_id not in category_tree['by_id']:
                 self.export_product_categs(instance, [woo_product_categ], woo_common_log_id,
                                            model_id)
+                category_sync['category_tree'] = False
                 return True
+            self.create_or_update_woo_categ_chain(instance, category_tree, woo_categ_id,
+                                                  sync_images_with_product,
+                                                  category_sync['processed_categs'])
+            return True
         elif woo_product_categ and not woo_product_categ.exported_in_woo:
             woo_categ = self.create_or_update_woo_categ(instance, woo_common_log_id,
                                                         model_id, woo_product_categ.name,
-                                                        sync_images_with_product)
+                                                        sync_images_with_product, category_sync)
             if woo_categ:
                 return woo_categ
             else:
                 self.export_product_categs(instance, [woo_product_categ], woo_common_log_id,
                                            model_id)
+                category_sync['category_tree'] = False
                 return True
         elif not woo_product_categ and woo_product_categ_name:
             woo_categ = self.create_or_update_woo_categ(instance, woo_common_log_id,
                                                         model_id, woo_product_categ_name,
-                                                        sync_images_with_product)
+                                                        sync_images_with_product, category_sync)
             return woo_categ
         else:
+            category_tree = self.get_woo_category_tree(instance, woo_common_log_id, model_id,
+                                                       refresh=True, category_sync=category_sync)
+            if not category_tree:
+                return True
+            for woo_categ_id in category_tree['by_id']:
+                self.create_or_update_woo_categ_chain(instance, category_tree, woo_categ_id,
+                                                      sync_images_with_product,
+                                                      category_sync['processed_categs'])
+        return True
+
+    def export_product_categs(self, instance, woo_product_categs, woo_common_log_id, model_id):
+        """ This method used to export the categories with their parent categories, which are not
+            in WooCommerce. Categories are exported level by level through the batch API, so the
+            parents are created before their children.
+        """
+        wcapi = instance.woo_connect()
+        woo_product_categs = self.browse([categ.id for categ in woo_product_categs])
+        exported_categs = woo_product_categs.filtered('woo_categ_id')
+        if exported_categs:
+            category_tree = self.get_woo_category_tree(instance, woo_common_log_id, model_id,
+                                                       refresh=True)
+            woo_product_categs -= exported_categs.filtered(
+                    lambda categ:not category_tree or int(categ.woo_categ_id) in category_tree[
+                        'by_id'])
+        parent_categs = woo_product_categs.parent_id.filtered(lambda categ:not categ.woo_categ_id)
+        while parent_categs - woo_product_categs:
+            woo_product_categs |= parent_categs
+            parent_categs = parent_categs.parent_id.filtered(lambda categ:not categ.woo_categ_id)
+
+        for level_categs in self.get_woo_categ_levels(woo_product_categs):
+            categ_values = []
+            for start in range(0, len(level_categs), 100):
+                batch_categs = level_categs[start:start + 100]
+                batch_data = []
+                for woo_product_categ in batch_categs:
+                    row_data = self.prepare_woo_categ_data(instance, woo_product_categ)
+                    woo_product_categ.parent_id.woo_categ_id and row_data.update(
+                            {'parent':woo_product_categ.parent_id.woo_categ_id})
+                    batch_data.append(row_data)
+                _logger.info("Exporting %s categories to Woo of instance %s", len(batch_data),
+                             instance.name)
+                response = self.post_woo_categ_batch(instance, wcapi, 'create', batch_data,
+                                                     woo_common_log_id, model_id)
+                for woo_product_categ, product_categ in zip(batch_categs, response):
+                    woo_categ_values = self.prepare_exported_woo_categ_values(
+                            instance, woo_product_categ, product_categ, woo_common_log_id, model_id)
+                    woo_categ_values and categ_values.append(woo_categ_values)
+            self.write_exported_woo_categs(categ_values, instance.woo_is_image_url)
+        self._cr.commit()
+        return True
+
+    def get_woo_categ_levels(self, woo_product_categs):
+        """ This method used to split the categories by their level, a category is one level below
+            its nearest parent in the given categories.
+            @return: List of recordsets of the categories, top level first.
+        """
+        levels = {}
+
+        def get_level(categ):
+            if categ.id not in levels:
+                parent = categ.parent_id
+                while parent and parent not in woo_product_categs:
+                    parent = parent.parent_id
+                levels[categ.id] = parent and get_level(parent) + 1 or 0
+            return levels[categ.id]
+
+        categs_by_level = []
+        for woo_product_categ in woo_product_categs:
+            level = get_level(woo_product_categ)
+            while len(categs_by_level) <= level:
+                categs_by_level.append(self.browse())
+            categs_by_level[level] |= woo_product_categ
+        return categs_by_level
+
+    def get_woo_categ_image_url(self, instance, woo_product_categ):
+        """ This method used to get the url of the category image, the image is uploaded when the
+            instance does not use image urls.
+        """
+        img_url = ''
+        if instance.woo_is_image_url:
+            if woo_product_categ.response_url:
+                try:
+                    img = requests.get(woo_product_categ.response_url, stream=True, verify=False,
+                                       timeout=10)
+                    if img.status_code == 200:
+                        img_url = woo_product_categ.response_url
+                    elif woo_product_categ.url:
+                        img_url = woo_product_categ.url
+                except Exception:
+                    img_url = woo_product_categ.url or ''
+            elif woo_product_categ.url:
+                img_url = woo_product_categ.url
+        else:
+            res = {}
+            if woo_product_categ.image:
+                mime_type = guess_mimetype(base64.b64decode(woo_product_categ.image))
+                res = img_file_upload.upload_image(instance, woo_product_categ.image,
+                                                   "%s_%s" % (woo_product_categ.name,
+                                                              woo_product_categ.id), mime_type)
+            img_url = res and res.get('url', False) or ''
+        return img_url
+
+    def prepare_woo_categ_data(self, instance, woo_product_categ):
+        """ This method used to prepare the data of the category for WooCommerce.
+            @return: Dictionary of the category data.
+        """
+        img_url = self.get_woo_categ_image_url(instance, woo_product_categ)
+        row_data = {'name':str(woo_product_categ.name),
+                    'description':str(woo_product_categ.description or ''),
+                    'display':str(woo_product_categ.display)}
+        if woo_product_categ.slug:
+            row_data.update({'slug':str(woo_product_categ.slug)})
+        if img_url:
             if instance.woo_version == 'v3':
-                response = wcapi.get("products/categories?filter[limit]=1000")
+                row_data.update({'image':img_url})
             else:
-                response = wcapi.get("products/categories", params={'per_page':100})
-            if not isinstance(response, requests.models.Response):
-                message = "Get Product Category \nResponse is not in proper format :: %s" % (
-                    response)
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                woo_common_log_id, False)
-                return True
-            if response.status_code not in [200, 201]:
-                message = response.content
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                woo_common_log_id, False)
-                return True
+                row_data.update({'image':{'src':img_url}})
+        return row_data
 
-        total_pages = 1
+    def post_woo_categ_batch(self, instance, wcapi, action, batch_data, woo_common_log_id,
+                             model_id):
+        """ This method used to post the categories to the batch API of WooCommerce. The legacy API
+            (v3) has no batch endpoint, so the categories are posted one by one to it.
+            @param action: create or update.
+            @return: List of the categories of the response, in the order of the request.
+        """
+        common_log_line_obj = self.env['common.log.lines.ept']
         if instance.woo_version == 'v3':
-            total_pages = response and response.headers.get('X-WC-TotalPages') or 1
+            return [self.post_woo_categ_v3(instance, wcapi, action, row_data, woo_common_log_id,
+                                           model_id) for row_data in batch_data]
+        res = wcapi.post('products/categories/batch', {action:batch_data})
+        if not isinstance(res, requests.models.Response):
+            message = "%s Product Category \nResponse is not in proper format :: %s" % (
+                action.capitalize(), res)
+            common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
+                                                            False)
+            return []
+        if res.status_code not in [200, 201]:
+            common_log_line_obj.woo_product_export_log_line(res.content, model_id,
+                                                            woo_common_log_id, False)
+            return []
+        try:
+            response = res.json()
+        except Exception as e:
+            message = "Json Error : While %s product categories to WooCommerce for instance %s." \
+                      " \n%s" % (action, instance.name, e)
+            common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
+                                                            False)
+            return []
+        if not isinstance(response, dict):
+            message = "%s Product Category \nResponse is not in proper format :: %s" % (
+                action.capitalize(), response)
+            common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
+                                                            False)
+            return []
+        return response.get(action) or []
+
+    def post_woo_categ_v3(self, instance, wcapi, action, row_data, woo_common_log_id, model_id):
+        """ This method used to post one category to the legacy API (v3) of WooCommerce.
+            @param action: create or update.
+            @return: Category of the response in the format of an item of the batch response, or
+                     False when the request failed.
+        """
+        common_log_line_obj = self.env['common.log.lines.ept']
+        row_data = dict(row_data)
+        if action == 'update':
+            res = wcapi.put('products/categories/%s' % (row_data.pop('id')),
+                            {'product_category':row_data})
         else:
-            total_pages = response and response.headers.get('x-wp-totalpages') or 1
+            res = wcapi.post('products/categories', {'product_category':row_data})
+        if not isinstance(res, requests.models.Response):
+            message = "%s Product Category \nResponse is not in proper format :: %s" % (
+                action.capitalize(), res)
+            common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
+                                                            False)
+            return False
         try:
-            res = response.json()
+            response = res.json()
         except Exception as e:
-            message = "Json Error : While import product categories from WooCommerce for " \
-                      "instance %s. \n%s" % (instance.name, e)
-            common_log_line_obj.woo_product_export_log_line(message, model_id,
+            message = "Json Error : While %s product category %s to WooCommerce for instance %s." \
+                      " \n%s" % (action, row_data.get('name'), instance.name, e)
+            common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
+                                                            False)
+            return False
+        if not isinstance(response, dict):
+            message = "%s Product Category \nResponse is not in proper format :: %s" % (
+                action.capitalize(), response)
+            common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
+                                                            False)
+            return False
+        if response.get('code') == 'term_exists':
+            return {'error':response}
+        if res.status_code not in [200, 201]:
+            common_log_line_obj.woo_product_export_log_line(res.content, model_id,
                                                             woo_common_log_id, False)
             return False
-        if instance.woo_version == 'v3':
-            errors = res.get('errors', '')
-            if errors:
-                message = errors[0].get('message')
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                woo_common_log_id, False)
-                return True
-            if woo_product_categ:
-                response = res.get('product_category')
-                results = [response]
-            else:
-                results = res.get('product_categories')
-        else:
-            if woo_product_categ:
-                results = [res]
-            else:
-                results = res
-        if int(total_pages) >= 2:
-            for page in range(2, int(total_pages) + 1):
-                results = results + self.import_all_woo_categories(wcapi, instance, page,
-                                                                   woo_common_log_id, model_id)
-
-        processed_categs = []
-        for res in results:
-            if not isinstance(res, dict):
-                continue
-            if res.get('id', False) in processed_categs:
-                continue
-
-            categ_results = []
-            categ_results.append(res)
-            for categ_result in categ_results:
-                if not isinstance(categ_result, dict):
-                    continue
-                if categ_result.get('parent'):
-                    parent_categ = list(
-                            filter(lambda categ:categ['id'] == categ_result.get('parent'), results))
-                    if parent_categ:
-                        parent_categ = parent_categ[0]
-                    else:
-                        response = wcapi.get(
-                                "products/categories/%s" % (categ_result.get('parent')))
-                        if not isinstance(response, requests.models.Response):
-                            message = "Get Product Category \nResponse is not in proper format " \
-                                      ":: %s" % (response)
-                            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                            woo_common_log_id,
-                                                                            False)
-                            continue
-                        try:
-                            response = response.json()
-                        except Exception as e:
-                            message = "Json Error : While import parent category for category" \
-                                      " %s from WooCommerce for instance %s. \n%s" % (
-                                          categ_result.get('name'), instance.name, e)
-                            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                            woo_common_log_id,
-                                                                            False)
-                            continue
-                        if instance.woo_version == 'v3':
-                            parent_categ = response.get('product_category')
-                        else:
-                            parent_categ = response
-                    if parent_categ not in categ_results:
-                        categ_results.append(parent_categ)
-
-            categ_results.reverse()
-            for result in categ_results:
-                if not isinstance(result, dict):
-                    continue
-                if result.get('id') in processed_categs:
-                    continue
+        errors = response.get('errors')
+        if errors:
+            return {'error':errors[0]}
+        return response.get('product_category', False)
 
-                woo_categ_id = result.get('id')
-                woo_categ_name = result.get('name')
-                display = result.get('display')
-                slug = result.get('slug')
-                parent_woo_id = result.get('parent')
-                parent_id = False
-                binary_img_data = False
-                if parent_woo_id:
-                    parent_id = self.search([('woo_categ_id', '=', parent_woo_id),
-                                             ('woo_instance_id', '=', instance.id)], limit=1).id
-                vals = {'name':woo_categ_name, 'woo_instance_id':instance.id, 'display':display,
-                        'slug':slug, 'exported_in_woo':True, 'parent_id':parent_id,
-                        'description':result.get('description', '')}
-                if sync_images_with_product:
-                    res_image = False
-                    if instance.woo_version == 'v3':
-                        res_image = result.get('image')
-                    else:
-                        res_image = result.get('image') and result.get('image').get('src', '')
-
-                    if instance.woo_is_image_url:
-                        res_image and vals.update({'response_url':res_image})
-                    else:
-                        if res_image:
-                            try:
-                                res_img = requests.get(res_image, stream=True, verify=False,
-                                                       timeout=10)
-                                if res_img.status_code == 200:
-                                    binary_img_data = base64.b64encode(res_img.content)
-                            except Exception:
-                                pass
-                        binary_img_data and vals.update({'image':binary_img_data})
-                vals.update({'woo_categ_id':woo_categ_id, 'slug':slug})
-                woo_product_categ = self.search(
-                        [('woo_categ_id', '=', woo_categ_id),
-                         ('woo_instance_id', '=', instance.id)])
-                if not woo_product_categ:
-                    woo_product_categ = self.search(
-                            [('slug', '=', slug), ('woo_instance_id', '=', instance.id)], limit=1)
-                if woo_product_categ:
-                    woo_product_categ.write(vals)
-                else:
-                    self.create(vals)
-
-                processed_categs.append(result.get('id', False))
-        return True
-
-    def export_product_categs(self, instance, woo_product_categs, woo_common_log_id, model_id):
+    def prepare_exported_woo_categ_values(self, instance, woo_product_categ, product_categ,
+                                          woo_common_log_id, model_id):
+        """ This method used to read the WooCommerce id of the exported category from its item of
+            the batch response. A category which already exists in WooCommerce gets the id of it.
+            @return: Tuple of category id, WooCommerce id, slug and response url or False.
+        """
         common_log_line_obj = self.env['common.log.lines.ept']
-        wcapi = instance.woo_connect()
-        for woo_product_categ in woo_product_categs:
-            if woo_product_categ.woo_categ_id:
-                res = wcapi.get("products/categories/%s" % (woo_product_categ.woo_categ_id))
-                if not isinstance(res, requests.models.Response):
-                    message = "Get Product Category \nResponse is not in proper format :: %s" % (
-                        res)
-                    common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                    woo_common_log_id, False)
-                    continue
-                if res.status_code != 404:
-                    continue
-                if res.status_code not in [200, 201]:
-                    common_log_line_obj.woo_product_export_log_line(res.content, model_id,
-                                                                    woo_common_log_id, False)
-                    continue
-            product_categs = []
-            product_categs.append(woo_product_categ)
-            for categ in product_categs:
-                if categ.parent_id and categ.parent_id not in product_categs and not categ.parent_id.woo_categ_id:
-                    product_categs.append(categ.parent_id)
+        if not isinstance(product_categ, dict):
+            return False
+        error = product_categ.get('error')
+        if error:
+            if error.get('code') == 'term_exists':
+                data = error.get('data')
+                woo_categ_id = isinstance(data, dict) and data.get('resource_id') or data
+                return (woo_product_categ.id, str(woo_categ_id), woo_product_categ.slug,
+                        woo_product_categ.response_url)
+            message = "%s :: %s" % (error.get('message'), woo_product_categ.name)
+            common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
+                                                            False)
+            return False
+        if not product_categ.get('id'):
+            return False
+        response_url = product_categ.get('image', '')
+        if instance.woo_version != 'v3':
+            response_url = response_url and response_url.get('src', '') or ''
+        return (woo_product_categ.id, str(product_categ.get('id')), product_categ.get('slug', ''),
+                response_url)
 
-            product_categs.reverse()
-            for woo_product_categ in product_categs:
-                img_url = ''
-                if instance.woo_is_image_url:
-                    if woo_product_categ.response_url:
-                        try:
-                            img = requests.get(woo_product_categ.response_url, stream=True,
-                                               verify=False, timeout=10)
-                            if img.status_code == 200:
-                                img_url = woo_product_categ.response_url
-                            elif woo_product_categ.url:
-                                img_url = woo_product_categ.url
-                        except Exception:
-                            img_url = woo_product_categ.url or ''
-                    elif woo_product_categ.url:
-                        img_url = woo_product_categ.url
-                else:
-                    res = {}
-                    if woo_product_categ.image:
-                        mime_type = guess_mimetype(base64.b64decode(woo_product_categ.image))
-                        res = img_file_upload.upload_image(instance, woo_product_categ.image,
-                                                           "%s_%s" % (woo_product_categ.name,
-                                                                      woo_product_categ.id),
-                                                           mime_type)
-                    img_url = res and res.get('url', False) or ''
-                row_data = {'name':str(woo_product_categ.name),
-                            'description':str(woo_product_categ.description or ''),
-                            'display':str(woo_product_categ.display),
-                            }
-                if woo_product_categ.slug:
-                    row_data.update({'slug':str(woo_product_categ.slug)})
-                img_url and row_data.update({'image':img_url})
-                if instance.woo_version != 'v3' and img_url:
-                    row_data.update({'image':{'src':img_url}})
-                woo_product_categ.parent_id.woo_categ_id and row_data.update(
-                        {'parent':woo_product_categ.parent_id.woo_categ_id})
-                if instance.woo_version == 'v3':
-                    data = {'product_category':row_data}
-                elif instance.woo_version != 'v3':
-                    data = row_data
-                res = wcapi.post("products/categories", data)
-                if not isinstance(res, requests.models.Response):
-                    message = "Export Product Category \nResponse is not in proper format :: %s" % (
-                        res)
-                    common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                    woo_common_log_id, False)
-                    continue
-                if res.status_code not in [200, 201]:
-                    if res.status_code == 500:
-                        try:
-                            response = res.json()
-                        except Exception as e:
-                            message = "Json Error : While export product category %s to " \
-                                      "WooCommerce for instance %s. \n%s" % (
-                                          woo_product_categ.name, instance.name, e)
-                            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                            woo_common_log_id,
-                                                                            False)
-                            continue
-                        if isinstance(response, dict) and response.get('code') == 'term_exists':
-                            woo_product_categ.write(
-                                    {'woo_categ_id':response.get('data'), 'exported_in_woo':True})
-                            continue
-                        else:
-                            message = res.content
-                            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                            woo_common_log_id,
-                                                                            False)
-                            continue
-                try:
-                    response = res.json()
-                except Exception as e:
-                    message = "Json Error : While export product category %s to WooCommerce for" \
-                              " instance %s. \n%s" % (woo_product_categ.name, instance.name, e)
-                    common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                    woo_common_log_id, False)
-                    continue
-                if not isinstance(response, dict):
-                    message = "Export Product Category \nResponse is not in proper format :: %s" % (
-                        response)
-                    common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                    woo_common_log_id, False)
-                    continue
-                if instance.woo_version == 'v3':
-                    errors = response.get('errors', '')
-                    if errors:
-                        message = errors[0].get('message')
-                        message = "%s :: %s" % (message, woo_product_categ.name)
-                        common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                        woo_common_log_id, False)
-                        continue
-                    product_categ = response.get('product_category', False)
-                else:
-                    product_categ = response
-                product_categ_id = product_categ and product_categ.get('id', False)
-                slug = product_categ and product_categ.get('slug', '')
-                response_data = {}
-                if instance.woo_is_image_url:
-                    response_url = ''
-                    if instance.woo_version == 'v3':
-                        response_url = product_categ and product_categ.get('image', '')
-                    else:
-                        response_url = product_categ and product_categ.get(
-                                'image') and product_categ.get('image', {}).get('src', '') or ''
-                    response_data.update({'response_url':response_url})
-                if product_categ_id:
-                    response_data.update(
-                            {'woo_categ_id':product_categ_id, 'slug':slug, 'exported_in_woo':True})
-                    woo_product_categ.write(response_data)
-        self._cr.commit()
+    def write_exported_woo_categs(self, categ_values, update_response_url=False):
+        """ This method used to write the WooCommerce ids of the exported categories of a level.
+            Every category gets its own WooCommerce id, so they are written one by one.
+            @param categ_values: List of tuple of category id, WooCommerce id, slug and response url.
+        """
+        for categ_id, woo_categ_id, slug, response_url in categ_values:
+            vals = {'woo_categ_id':woo_categ_id, 'slug':slug, 'exported_in_woo':True}
+            update_response_url and vals.update({'response_url':response_url})
+            self.browse(categ_id).write(vals)
         return True
 
     def update_product_categs_in_woo(self, instance, woo_product_categs):
         """- This method used to update product category from Odoo to Woocommerce.
            - It will only update category which is already synced.
+           - Parent categories which are missing in WooCommerce are exported first.
             @param : self
             @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 13/12/2019.
         """
@@ -555,80 +514,40 @@ class WooProductCategoryEpt(models.Model):
                                                                      "module":"woocommerce_ept",
                                                                      "woo_instance_id":instance.id,
                                                                      "active":True})
-        updated_categs = []
-        for woo_categ in woo_product_categs:
-            if woo_categ in updated_categs:
-                continue
-            product_categs = []
-            product_categs.append(woo_categ)
-            for categ in product_categs:
-                if categ.parent_id and categ.parent_id not in product_categs and categ.parent_id not in updated_categs:
-                    self.sync_woo_product_category(instance, common_log_book_id,
-                                                   woo_product_categ=categ.parent_id)
-                    product_categs.append(categ.parent_id)
-
-            product_categs.reverse()
-            for woo_categ in product_categs:
-                img_url = ''
-                if instance.woo_is_image_url:
-                    if woo_categ.response_url:
-                        try:
-                            img = requests.get(woo_categ.response_url, stream=True,
-                                               verify=False, timeout=10)
-                            if img.status_code == 200:
-                                img_url = woo_categ.response_url
-                            elif woo_categ.url:
-                                img_url = woo_categ.url
-                        except Exception:
-                            img_url = woo_categ.url or ''
-                    elif woo_categ.url:
-                        img_url = woo_categ.url
-                else:
-                    res = {}
-                    if woo_categ.image:
-                        mime_type = guess_mimetype(base64.b64decode(woo_categ.image))
-                        res = img_file_upload.upload_image(instance, woo_categ.image,
-                                                           "%s_%s" % (woo_categ.name, woo_categ.id),
-                                                           mime_type)
-                    img_url = res and res.get('url', False) or ''
+        parent_categs = woo_product_categs.parent_id
+        ancestor_categs = self.browse()
+        while parent_categs - ancestor_categs:
+            ancestor_categs |= parent_categs
+            parent_categs = parent_categs.parent_id
+        ancestor_categs -= woo_product_categs
+        if ancestor_categs:
+            category_tree = self.get_woo_category_tree(instance, common_log_book_id, model_id,
+                                                       refresh=True)
+            missing_categs = category_tree and ancestor_categs.filtered(
+                    lambda categ:not categ.woo_categ_id or int(categ.woo_categ_id) not in
+                                 category_tree['by_id'])
+            missing_categs and self.export_product_categs(instance, missing_categs,
+                                                          common_log_book_id, model_id)
 
-                row_data = {'name':str(woo_categ.name),
-                            'display':str(woo_categ.display),
-                            'description':str(woo_categ.description or '')}
-                if woo_categ.slug:
-                    row_data.update({'slug':str(woo_categ.slug)})
-                if instance.woo_version == 'wc/v3' and img_url:
-                    row_data.update({'image':{'src':img_url}})
+        for start in range(0, len(woo_product_categs), 100):
+            batch_categs = woo_product_categs[start:start + 100]
+            batch_data = []
+            for woo_categ in batch_categs:
+                row_data = self.prepare_woo_categ_data(instance, woo_categ)
                 woo_categ.parent_id.woo_categ_id and row_data.update(
                         {'parent':woo_categ.parent_id.woo_categ_id})
                 row_data.update({'id':woo_categ.woo_categ_id})
-            _logger.info("Start request for category name: '%s'" % (woo_categ.name))
-            res = wcapi.post('products/categories/batch', {'update':[row_data]})
-            if not isinstance(res, requests.models.Response):
-                message = "Update Product Category \nResponse is not in proper format :: %s" % (res)
-                common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id,
-                                                        False)
-                continue
-            if res.status_code not in [200, 201]:
-                common_log_line_obj.woo_create_log_line(res.content, model_id, common_log_book_id,
-                                                        False)
-                continue
-            try:
-                response = res.json()
-            except Exception as e:
-                message = "Json Error : While update product category with id %s to WooCommerce for instance %s. \n%s " % (
-                woo_categ.woo_categ_id, instance.name, e)
-                common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id,
-                                                        False)
-                continue
-            if not isinstance(response, dict):
-                message = "Update Product Category \nResponse is not in proper format :: %s" % (
-                    response)
-                common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id,
-                                                        False)
-                continue
-            updated_categs.append(woo_categ)
-            _logger.info("Done request for category name :'%s'" % (woo_categ.name))
+                batch_data.append(row_data)
+            _logger.info("Updating %s categories in Woo of instance %s", len(batch_data),
+                         instance.name)
+            response = self.post_woo_categ_batch(instance, wcapi, 'update', batch_data,
+                                                 common_log_book_id, model_id)
+            for woo_categ, product_categ in zip(batch_categs, response):
+                error = isinstance(product_categ, dict) and product_categ.get('error')
+                if error:
+                    message = "%s :: %s" % (error.get('message'), woo_categ.name)
+                    common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id,
+                                                            False)
         if not common_log_book_id.log_lines:
             common_log_book_id.unlink()
         return True
@@ -102,6 +102,7 @@ class WooProductDataQueueEpt(models.Model):
         process_import_export_obj = self.env["woo.process.import.export"]
         if product_data.get("type") == "variable":
             params = {"per_page": 100}
+            params.update(instance.get_woo_import_fields_params('variation'))
             response = wcapi.get("products/%s/variations" % (product_data.get("id")), params=params)
             variants_data = response.json()
 
@@ -130,7 +131,9 @@ class WooProductDataQueueEpt(models.Model):
             product_queue_line_obj.create(sync_queue_vals_line)
             _logger.info("Added product id : %s in existing product queue %s"%(product_data.get('id'),product_data_queue.display_name))
 
-        if product_data_queue and len(product_data_queue.queue_line_ids) >= 50:
+        queue_size = self.env["woo.queue.chunk.policy.ept"].get_queue_chunk_policy(
+            instance, "product")["webhook_queue_size"]
+        if product_data_queue and len(product_data_queue.queue_line_ids) >= queue_size:
             product_data_queue.queue_line_ids.sync_woo_product_data()
 
         elif not product_data_queue:
@@ -3,7 +3,7 @@
 
 import logging, time
 from datetime import datetime, timedelta
-from odoo import models, fields
+from odoo import models, fields, tools
 
 
 _logger = logging.getLogger("Woo")
@@ -27,6 +27,28 @@ class WooProductDataQueueLineEpt(models.Model):
     woo_update_product_date = fields.Char('Product Update Date')
     name = fields.Char(string="Product", help="It contain the name of product")
 
+    def init(self):
+        """ Index used to find the latest queue line of the WooCommerce products while importing.
+        """
+        tools.create_index(self._cr, 'woo_product_data_queue_line_ept_instance_data_id_index',
+                           self._table, ['woo_instance_id', 'woo_synced_data_id'])
+
+    def get_latest_queue_lines(self, instance, woo_ids):
+        """ This method used to find the latest queue line of each WooCommerce product in one query.
+            @param instance: Record of the instance.
+            @param woo_ids: WooCommerce product ids.
+            @return: Dictionary of {woo_id: {'id', 'state', 'woo_update_product_date'}}.
+        """
+        if not woo_ids:
+            return {}
+        self._cr.execute("""SELECT DISTINCT ON (woo_synced_data_id) id, woo_synced_data_id, state,
+                                   woo_update_product_date
+                            FROM woo_product_data_queue_line_ept
+                            WHERE woo_instance_id = %s AND woo_synced_data_id IN %s
+                            ORDER BY woo_synced_data_id, id DESC""",
+                         (instance.id, tuple(str(woo_id) for woo_id in woo_ids)))
+        return {int(row['woo_synced_data_id']):row for row in self._cr.dictfetchall()}
+
     def sync_woo_product_data(self):
         """This method used to process synced Woo Commerce data.This method called from cron
             and manually from synced Woo Commerce data.
@@ -38,34 +60,32 @@ class WooProductDataQueueLineEpt(models.Model):
         """
         woo_product_template_obj = self.env['woo.product.template.ept']
         common_log_book_obj = self.env['common.log.book.ept']
-        product_data_queue_obj = self.env['woo.product.data.queue.ept']
+        queue_chunk_policy_obj = self.env['woo.queue.chunk.policy.ept']
         ir_model_obj = self.env['ir.model']
         start = time.time()
         product_queue_line_ids = False
         product_queue = False
         common_log_book_id = False
         if not self:
-            query = """select queue.id
-                from woo_product_data_queue_line_ept as queue_line
-                inner join woo_product_data_queue_ept as queue on queue_line.queue_id = queue.id
-                where queue_line.state='draft' and queue.is_action_require = 'False'
-                ORDER BY queue_line.create_date ASC limit 1"""
-            self._cr.execute(query)
-            queue_id = self._cr.fetchone()
-            if not queue_id:
-                return
-            product_queue = product_data_queue_obj.browse(queue_id)
-            product_queue_line_ids = product_queue.queue_line_ids
-
-            product_queue.queue_process_count += 1
-            if product_queue.queue_process_count > 3:
-                product_queue.is_action_require = True
-                note = "<p>Attention %s queue is processed 3 times you need to process it manually.</p>" % (product_queue.name)
-                product_queue.message_post(body=note)
-                if product_queue.woo_instance_id.is_create_schedule_activity:
-                    model = ir_model_obj.search([('model', '=', 'woo.product.data.queue.ept')])
-                    common_log_book_obj.create_woo_schedule_activity(product_queue, model, True)
-                return
+            # The queues of each instance are taken as per the queue chunk policy of the instance.
+            for product_queue in queue_chunk_policy_obj.claim_queues("product"):
+                product_queue.queue_process_count += 1
+                if product_queue.queue_process_count > 3:
+                    product_queue.is_action_require = True
+                    note = "<p>Attention %s queue is processed 3 times you need to process it manually.</p>" % (product_queue.name)
+                    product_queue.message_post(body=note)
+                    if product_queue.woo_instance_id.is_create_schedule_activity:
+                        model = ir_model_obj.search([('model', '=', 'woo.product.data.queue.ept')])
+                        common_log_book_obj.create_woo_schedule_activity(product_queue, model, True)
+                    continue
+                product_queue_line_ids = product_queue.queue_line_ids.filtered(
+                    lambda x:x.state == "draft")
+                queue_start = time.time()
+                product_queue_line_ids.sync_woo_product_data()
+                queue_chunk_policy_obj.record_queue_run(product_queue.woo_instance_id, "product",
+                                                        len(product_queue_line_ids),
+                                                        time.time() - queue_start)
+            return True
         else:
             product_queue_line_ids = self
             if product_queue_line_ids:
@@ -77,25 +97,24 @@ class WooProductDataQueueLineEpt(models.Model):
 
         woo_instance = product_queue_line_ids.woo_instance_id
         is_skip_products = product_queue.woo_skip_existing_products
-        if product_queue.log_book_id:
-            common_log_book_id = product_queue.log_book_id
-        else:
-            common_log_book_id = common_log_book_obj.create(
-                {
-                    'type': 'import',
-                    'module': 'woocommerce_ept',
-                    'woo_instance_id': woo_instance.id,
-                    'active': True,
-                    })
-            product_queue.log_book_id = common_log_book_id.id
         # below two line add by Haresh Mori on date 7/1/2020, this is used to update
         # is_process_queue as False.
         self.env.cr.execute("""update woo_product_data_queue_ept set is_process_queue = False where is_process_queue = True""")
         self._cr.commit()
-        woo_product_template_obj.sync_products(product_queue_line_ids, woo_instance,
-                                               common_log_book_id, is_skip_products)
-        if common_log_book_id and not common_log_book_id.log_lines:
-            common_log_book_id.unlink()
+        # The log lines of the products are created together once the queue lines are processed,
+        # the log book of the queue is created with the first of them.
+        common_log_book_id = product_queue.log_book_id.buffer_log_lines_ept(
+            {
+                'type': 'import',
+                'module': 'woocommerce_ept',
+                'woo_instance_id': woo_instance.id,
+                'active': True,
+                })
+        woo_product_template_obj.with_env(common_log_book_id.env).sync_products(
+            product_queue_line_ids, woo_instance, common_log_book_id, is_skip_products)
+        common_log_book_id = common_log_book_id.flush_log_lines_ept()
+        if common_log_book_id and not product_queue.log_book_id:
+            product_queue.log_book_id = common_log_book_id.id
         end = time.time()
         _logger.info("Processed %s Products in %s seconds." % (
             str(len(product_queue_line_ids)), str(end - start)))
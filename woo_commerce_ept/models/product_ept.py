@@ -6,15 +6,20 @@ import hashlib
 import json
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import requests
 
 from odoo import models, fields, api
+from odoo.addons.common_connector_library.models.product_attribute import _normalize_attribute_name
 from ..img_upload import img_file_upload
 
 _logger = logging.getLogger("Woo")
 
+# Number of variation batches posted at the same time while exporting the products.
+EXPORT_VARIATION_WORKERS = 4
+
 class WooProductTemplateEpt(models.Model):
     _name = "woo.product.template.ept"
     _order = 'product_tmpl_id'
@@ -136,52 +141,113 @@ class WooProductTemplateEpt(models.Model):
         return variation_data
 
     @api.model
-    def get_variant_data(self, variant, instance, update_image):
+    def get_variant_data(self, variant, instance, update_image, woo_attribute_index=False):
         """
         This method is used for prepare the product variant data with its image and return it into
         dictionary format
         :param variant: It contain the woo product variant
         :param instance: It contain the browsable object of the current instance
         :param update_image: It contain Either True or False
+        :param woo_attribute_index: Woo attribute index of the export run
         :return: It will return the product variant details and its type is Dict.
         @author: Dipak Gogiya @Emipro Technologies Pvt. Ltd
         """
-        att = []
-        woo_attribute_obj = self.env['woo.product.attribute.ept']
         variation_data = {}
-        att_data = {}
-        for attribute_value in variant.product_id.product_template_attribute_value_ids:
-            if instance.woo_attribute_type == 'select':
-                woo_attribute = woo_attribute_obj.search(
-                        [('name', '=', attribute_value.attribute_id.name),
-                         ('woo_instance_id', '=', instance.id),
-                         ('exported_in_woo', '=', True)], limit=1)
-                if not woo_attribute:
-                    woo_attribute = woo_attribute_obj.search(
-                            [('attribute_id', '=', attribute_value.attribute_id.id),
-                             ('woo_instance_id', '=', instance.id),
-                             ('exported_in_woo', '=', True)], limit=1)
-                att_data = {
-                    'id':woo_attribute and woo_attribute.woo_attribute_id,
-                    'option':attribute_value.name
-                }
-            if instance.woo_attribute_type == 'text':
-                att_data = {
-                    'name':attribute_value.attribute_id.name,
-                    'option':attribute_value.name
-                }
-            att.append(att_data)
         if update_image:
             variation_data.update(self.get_variant_image(instance, variant))
+        variation_data.update(self.get_export_variant_data(instance, variant, woo_attribute_index))
+        return variation_data
 
-        weight = self.convert_weight_by_uom(variant.product_id.weight, instance)
+    def prepare_export_variants_data(self, instance, woo_variants, woo_attribute_index=False):
+        """
+        Builds the export data of the variants as plain dictionaries. The variants and their
+        attribute values are read for all the variants together by the prefetching of the ORM, the
+        Woo attribute is found once per attribute and the weight is converted once per weight.
+        :param instance: It contain the browsable object of the current instance
+        :param woo_variants: It contain the woo product variants
+        :param woo_attribute_index: Woo attribute index of the export run
+        :return: Dictionary of {woo variant id: {'attributes', 'sku', 'weight', 'manage_stock'}}
+        """
+        woo_attribute_ids = {}
+        if instance.woo_attribute_type == 'select':
+            for attribute in woo_variants.product_id.product_template_attribute_value_ids.attribute_id:
+                woo_attribute_ids[attribute.id] = self.find_woo_attribute(
+                        instance, attribute, woo_attribute_index).woo_attribute_id
+        variants_data = {}
+        for variant in woo_variants:
+            product = variant.product_id
+            attributes = []
+            for attribute_value in product.product_template_attribute_value_ids:
+                if instance.woo_attribute_type == 'select':
+                    attributes.append({'id':woo_attribute_ids.get(attribute_value.attribute_id.id),
+                                       'option':attribute_value.name})
+                elif instance.woo_attribute_type == 'text':
+                    attributes.append({'name':attribute_value.attribute_id.name,
+                                       'option':attribute_value.name})
+            variants_data[variant.id] = {
+                'attributes':attributes, 'sku':str(variant.default_code),
+                'weight':str(self.convert_weight_by_uom(product.weight, instance)),
+                'manage_stock':variant.woo_is_manage_stock
+            }
+        return variants_data
 
-        variation_data.update(
-                {
-                    'attributes':att, 'sku':str(variant.default_code),
-                    'weight':str(weight), "manage_stock":variant.woo_is_manage_stock
-                })
-        return variation_data
+    def get_export_variant_data(self, instance, variant, woo_attribute_index=False):
+        """
+        Gives a copy of the export data of the variant from the export cache, it is built for the
+        variant alone when the variant is not in the cache.
+        :return: Dictionary of the attributes, sku, weight and manage_stock of the variant
+        """
+        variant_data = self.get_export_cache(instance).get('variants_data', {}).get(variant.id) or \
+                       self.prepare_export_variants_data(instance, variant,
+                                                         woo_attribute_index)[variant.id]
+        return dict(variant_data, attributes=[dict(attribute) for attribute in
+                                              variant_data['attributes']])
+
+    def prepare_export_cache(self, instance, woo_templates, update_price=False,
+                             woo_attribute_index=False):
+        """
+        Builds the export data of all the variants of the templates and computes their pricelist
+        prices at once, so building the payloads of the templates reads plain dictionaries instead
+        of the records variant by variant. The queries and the time taken are logged, they depend
+        on the number of templates and attributes, not on the number of variants.
+        :param instance: It contain the browsable object of the current instance
+        :param woo_templates: It contain the woo product templates to export or update
+        :param woo_attribute_index: Woo attribute index of the export run
+        :return: Dictionary of the export cache
+        """
+        start = time.time()
+        query_count = self._cr.sql_log_count
+        woo_variants = woo_templates.woo_product_ids
+        export_cache = {
+            'instance_id':instance.id,
+            'product_weight_uom_id':self.get_product_weight_uom().id,
+            'converted_weights':{},
+            'variants_price':update_price and self.get_products_price(instance, woo_variants) or {}
+        }
+        export_cache['variants_data'] = self.with_context(
+                woo_export_cache=export_cache).prepare_export_variants_data(instance, woo_variants,
+                                                                           woo_attribute_index)
+        _logger.info("Prepared export data of %s templates and %s variants with %s queries in %.2f "
+                     "seconds.", len(woo_templates), len(woo_variants),
+                     self._cr.sql_log_count - query_count, time.time() - start)
+        return export_cache
+
+    def with_export_cache(self, instance, woo_templates, update_price=False,
+                          woo_attribute_index=False):
+        """
+        Returns self with the export cache of the templates in the context.
+        """
+        return self.with_context(woo_export_cache=self.prepare_export_cache(
+                instance, woo_templates, update_price, woo_attribute_index))
+
+    def get_export_cache(self, instance):
+        """
+        Gives the export cache of the current run, when it is prepared for the instance.
+        """
+        export_cache = self._context.get('woo_export_cache') or {}
+        if export_cache.get('instance_id') != instance.id:
+            return {}
+        return export_cache
 
     @api.model
     def get_product_price(self, instance, variant):
@@ -195,6 +261,43 @@ class WooProductTemplateEpt(models.Model):
         price = instance.woo_pricelist_id.get_product_price_ept(variant.product_id)
         return {'regular_price':str(price), 'sale_price':str(price)}
 
+    @api.model
+    def get_products_price(self, instance, variants):
+        """
+        It will compute the pricelist price of all given variants at once.
+        :param instance: It contain the browsable object of the current instance
+        :param variants: It contain the woo product variants
+        :return: It will return the price dict of every variant, keyed by the woo variant id.
+        """
+        prices = instance.woo_pricelist_id.get_products_price_ept(variants.product_id)
+        variants_price = {}
+        for variant in variants:
+            price = prices.get(variant.product_id.id, 0.0)
+            variants_price.update({variant.id:{'regular_price':str(price), 'sale_price':str(price)}})
+        return variants_price
+
+    def find_woo_attribute(self, instance, attribute, woo_attribute_index=False):
+        """
+        Finds the exported Woo attribute of an Odoo attribute by name and then by attribute, from
+        the index of the current run. Attributes exported during the run are searched and added.
+        :param instance: It contain the browsable object of the current instance
+        :param attribute: It contain the product attribute
+        :param woo_attribute_index: Woo attribute index of the export run, loaded when not given
+        :return: woo.product.attribute.ept()
+        """
+        woo_attribute_obj = self.env['woo.product.attribute.ept']
+        if not woo_attribute_index or woo_attribute_index.get('instance_id') != instance.id:
+            woo_attribute_index = woo_attribute_obj.get_woo_attribute_index(instance)
+        woo_attribute = woo_attribute_index['by_name'].get(_normalize_attribute_name(attribute.name)) or \
+                        woo_attribute_index['by_attribute'].get(attribute.id)
+        if not woo_attribute:
+            woo_attribute = woo_attribute_obj.search(
+                    [('attribute_id', '=', attribute.id), ('woo_instance_id', '=', instance.id),
+                     ('exported_in_woo', '=', True)], limit=1)
+            woo_attribute and woo_attribute_obj.add_to_woo_attribute_index(woo_attribute_index,
+                                                                          woo_attribute)
+        return woo_attribute or woo_attribute_obj
+
     def prepare_batches(self, data):
         """
         This method is used for create batches
@@ -229,32 +332,31 @@ class WooProductTemplateEpt(models.Model):
         :Task id: 156886
         Migration done by Haresh Mori @ Emipro on date 10 September 2020 .
         """
-        common_log_obj = self.env["common.log.book.ept"]
+        # The log lines are buffered and the log book is created at the end only if needed.
+        common_log_id = self.env["common.log.book.ept"].buffer_log_lines_ept({
+            'type':'export',
+            'module':'woocommerce_ept',
+            'woo_instance_id':instance.id,
+            'active':True,
+        })
+        woo_template_obj = self.with_env(common_log_id.env)
         common_log_line_obj = self.env["common.log.lines.ept"]
         model = "woo.product.product.ept"
         model_id = common_log_line_obj.get_model_id(model)
-        log_lines = []
 
         product_ids = woo_templates.mapped('woo_product_ids').mapped('product_id')
         product_stock = self.check_stock_type(instance, product_ids)
         variable_products = woo_templates.filtered(lambda x:x.woo_product_type == 'variable')
         simple_products = woo_templates.filtered(lambda x:x.woo_product_type == 'simple')
         if variable_products:
-            log_lines += self.export_stock_variable_products(variable_products, product_stock,
-                                                             instance, model_id)
+            woo_template_obj.export_stock_variable_products(variable_products, product_stock,
+                                                            instance, model_id)
         if simple_products:
-            log_lines += self.export_stock_simple_products(simple_products, product_stock, instance,
-                                                           model_id)
+            woo_template_obj.export_stock_simple_products(simple_products, product_stock, instance,
+                                                          model_id)
 
         instance.write({'last_inventory_update_time':datetime.now()})
-        if log_lines:
-            common_log_obj.create({
-                'type':'export',
-                'module':'woocommerce_ept',
-                'woo_instance_id':instance.id,
-                'active':True,
-                'log_lines':[(6, 0, log_lines)],
-            })
+        common_log_id.flush_log_lines_ept()
         return True
 
     def check_stock_type(self, instance, product_ids):
@@ -281,11 +383,10 @@ class WooProductTemplateEpt(models.Model):
                                        model_id):
         """ This method used to export stock for variable products.
             @param : self,woo_variable_products,product_stock,instance
-            @return: log_lines
+            @return: True
             @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 11 September 2020 .
             Task_id: 165895
         """
-        log_lines = []
         common_log_line_obj = self.env["common.log.lines.ept"]
         wcapi = instance.woo_connect()
         _logger.info('==Start process of variable product for export stock')
@@ -320,20 +421,19 @@ class WooProductTemplateEpt(models.Model):
                             'Export Stock||Variations batch process completed [status: %s] for Woo template name: %s' % (
                                 res.status_code, template.name))
                     if res.status_code not in [200, 201]:
-                        log_id = common_log_line_obj.create({
+                        common_log_line_obj.log_line_ept({
                             'model_id':model_id,
                             'message':"Update woo template: %s Stock\n%s" % (
                                 template.name, res.content),
                         })
-                        log_lines.append(log_id.id)
         _logger.info('==End process of variable product for export stock')
-        return log_lines
+        return True
 
     def export_stock_simple_products(self, woo_simple_products, product_stock, instance,
                                      model_id):
         """ This method used to export stock for simple products.
             @param : self,woo_simple_products,product_stock,instance
-            @return: log_lines
+            @return: True
             @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 11 September 2020 .
             Task_id: 165895
         """
@@ -341,7 +441,6 @@ class WooProductTemplateEpt(models.Model):
         wcapi = instance.woo_connect()
         _logger.info('==Start process of simple product for export stock')
         batches = self.prepare_batches(woo_simple_products)
-        log_lines = []
         for woo_products in batches:
             batch_update = {'update':[]}
             batch_update_data = []
@@ -365,36 +464,32 @@ class WooProductTemplateEpt(models.Model):
                 res = wcapi.post('products/batch', batch_update)
                 _logger.info('products batch completed [status: %s]', res.status_code)
                 if not isinstance(res, requests.models.Response):
-                    log_id = common_log_line_obj.create({
+                    common_log_line_obj.log_line_ept({
                         'model_id':model_id,
                         'message':"Update Product Stock \nResponse is not in proper format :: %s" % (
                             res),
                     })
-                    log_lines.append(log_id.id)
                 if res.status_code not in [200, 201]:
-                    log_id = common_log_line_obj.create({
+                    common_log_line_obj.log_line_ept({
                         'model_id':model_id,
                         'message':res.content,
                     })
-                    log_lines.append(log_id.id)
                 try:
                     response = res.json()
                 except Exception as e:
-                    log_id = common_log_line_obj.create({
+                    common_log_line_obj.log_line_ept({
                         'model_id':model_id,
                         'message':"Json Error : While update product stock to WooCommerce for instance %s. \n%s" % (
                             instance.name, e),
                     })
-                    log_lines.append(log_id.id)
                 if response.get('data', {}) and response.get('data', {}).get('status') != 200:
                     message = response.get('message')
-                    log_id = common_log_line_obj.create({
+                    common_log_line_obj.log_line_ept({
                         'model_id':model_id,
                         'message':message
                     })
-                    log_lines.append(log_id.id)
         _logger.info('==End process of simple product for export stock')
-        return log_lines
+        return True
 
     def woo_unpublished(self):
         """
@@ -572,7 +667,7 @@ class WooProductTemplateEpt(models.Model):
         model_id = common_log_line_obj.get_model_id("woo.product.attribute.term.ept")
         obj_woo_attribute = self.env['woo.product.attribute.ept']
         obj_woo_attribute_term = self.env['woo.product.attribute.term.ept']
-        odoo_attribute_value_obj = self.env['product.attribute.value']
+        attribute_index = self.env['product.attribute'].get_attribute_index_ept()
 
         wcapi = instance.woo_connect()
         if not attribute_ids:
@@ -605,22 +700,19 @@ class WooProductTemplateEpt(models.Model):
                     attributes_term_data = attributes_term_data + self.import_all_attribute_terms(
                             wcapi, instance, woo_attribute, woo_common_log_id, model_id, page)
             if response.status_code in [201, 200]:
+                exported_term_ids = obj_woo_attribute_term.search(
+                        [('woo_attribute_term_id', 'in',
+                          [str(attribute_term.get('id')) for attribute_term in attributes_term_data]),
+                         ('woo_instance_id', '=', instance.id),
+                         ('exported_in_woo', '=', True)]).mapped('woo_attribute_term_id')
+                attributes_term_data = [attribute_term for attribute_term in attributes_term_data if
+                                        str(attribute_term.get('id')) not in exported_term_ids]
+                odoo_attribute_values = attribute_index.get_attribute_values(
+                        woo_attribute.attribute_id,
+                        [attribute_term.get('name') for attribute_term in attributes_term_data],
+                        auto_create=True)
                 for attribute_term in attributes_term_data:
-                    woo_attribute_term = obj_woo_attribute_term.search(
-                            [('woo_attribute_term_id', '=', attribute_term.get('id')),
-                             ('woo_instance_id', '=', instance.id), ('exported_in_woo', '=', True)],
-                            limit=1)
-                    if woo_attribute_term:
-                        continue
-                    odoo_attribute_value = odoo_attribute_value_obj.search(
-                            [('name', '=ilike', attribute_term.get('name')),
-                             ('attribute_id', '=', woo_attribute.attribute_id.id)], limit=1)
-                    if not odoo_attribute_value:
-                        odoo_attribute_value = odoo_attribute_value.with_context(
-                                active_id=False).create({
-                            'name':attribute_term.get('name'),
-                            'attribute_id':woo_attribute.attribute_id.id
-                        })
+                    odoo_attribute_value = odoo_attribute_values.get(attribute_term.get('name'))
                     woo_attribute_term = obj_woo_attribute_term.search(
                             [('attribute_value_id', '=', odoo_attribute_value.id),
                              ('attribute_id', '=', woo_attribute.attribute_id.id),
@@ -777,13 +869,14 @@ class WooProductTemplateEpt(models.Model):
         self.sync_woo_attribute_term(instance, woo_common_log_id)
         return True
 
-    def import_all_woo_products(self, instance, common_log_id, page):
+    def import_all_woo_products(self, instance, common_log_id, page, modified_after=False):
         """
         :param wcapi: it contain the response of woo commerce product api and its type is object
         :param instance: It contain the browsable object of class woo_instance_ept
         :param comman_log_id: It contain the new log detail and its type is object
         :param model_id: It contain the id of the model
         :param page: It contain the products page number of woo commerce and its type is Integer
+        :param modified_after: Only products modified after this UTC datetime are requested.
         @author: Dipak Gogiya @Emipro Technologies Pvt. Ltd.
         Migration done by Haresh Mori @ Emipro on date 14 August 2020.
         Task_Id: 165891
@@ -791,7 +884,9 @@ class WooProductTemplateEpt(models.Model):
         common_log_line_obj = self.env["common.log.lines.ept"]
         model_id = common_log_line_obj.get_model_id('woo.product.template.ept')
         wcapi = instance.woo_connect()
-        res = wcapi.get('products', params={'per_page':100, 'page':page})
+        params = self.prepare_product_import_params(instance, modified_after)
+        params.update({'page':page})
+        res = wcapi.get('products', params=params)
         if not isinstance(res, requests.models.Response):
             message = "Get All Products\nResponse is not in proper format :: %s" % (res)
             common_log_line_obj.woo_product_export_log_line(message, model_id,
@@ -812,9 +907,10 @@ class WooProductTemplateEpt(models.Model):
         return response
 
     def get_products_from_woo_v1_v2_v3(self, instance, common_log_id, template_id=False,
-                                       import_all=False):
+                                       import_all=False, modified_after=False):
         """
         This method used to call submethods related to woo produts import from Woocommerce to Odoo.
+        When modified_after is passed, only the products modified after that date are requested.
         @author: Dipak Gogiya @Emipro Technologies Pvt. Ltd.
         Migration done by Haresh Mori @ Emipro on date 13 August 2020.
         Task_Id: 165892
@@ -824,7 +920,8 @@ class WooProductTemplateEpt(models.Model):
         woo_process_import_export_obj = process_import_export_obj.browse(
                 self._context.get('import_export_record'))
         results, total_pages = self.get_templates_from_woo(instance, common_log_id,
-                                                           template_id=template_id)
+                                                           template_id=template_id,
+                                                           modified_after=modified_after)
         product_queues = []
         if results:
             if int(total_pages) >= 2:
@@ -843,7 +940,8 @@ class WooProductTemplateEpt(models.Model):
                                          'sticky':False, 'warning':True})
                     self._cr.commit()
                 for page in range(2, int(total_pages) + 1):
-                    results = self.import_all_woo_products(instance, common_log_id, page)
+                    results = self.import_all_woo_products(instance, common_log_id, page,
+                                                           modified_after=modified_after)
                     if results:
                         total_result = self.process_product_response(results, instance,
                                                                      common_log_id,
@@ -875,9 +973,21 @@ class WooProductTemplateEpt(models.Model):
                     return total_result
         return product_queues
 
-    def get_templates_from_woo(self, instance, common_log_id, template_id):
+    def prepare_product_import_params(self, instance, modified_after=False):
+        """This method used to prepare the params of the product list request.
+            @param modified_after: Only products modified after this UTC datetime are requested.
+            @return: params
+        """
+        params = {'per_page':100}
+        params.update(instance.get_woo_import_fields_params('product'))
+        if modified_after:
+            params.update({'modified_after':modified_after.strftime("%Y-%m-%dT%H:%M:%S"),
+                           'dates_are_gmt':'true'})
+        return params
+
+    def get_templates_from_woo(self, instance, common_log_id, template_id, modified_after=False):
         """This method used to get product templates from Woocommerce to Odoo.
-            @param : self,instance,common_log_id, template_id
+            @param : self,instance,common_log_id, template_id, modified_after
             @return: results, total_pages
             @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 17 August 2020.
             Task_id:165892
@@ -887,9 +997,11 @@ class WooProductTemplateEpt(models.Model):
         wcapi = instance.woo_connect()
         results = []
         if template_id:
-            res = wcapi.get('products/%s' % (template_id))
+            res = wcapi.get('products/%s' % (template_id),
+                            params=instance.get_woo_import_fields_params('product'))
         else:
-            res = wcapi.get('products', params={'per_page':100})
+            res = wcapi.get('products',
+                            params=self.prepare_product_import_params(instance, modified_after))
         if not isinstance(res, requests.models.Response):
             message = "Get Products\nResponse is not in proper format :: %s" % (res)
             common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id, False)
@@ -921,40 +1033,28 @@ class WooProductTemplateEpt(models.Model):
             Task_id:165892
         """
         common_log_line_obj = self.env["common.log.lines.ept"]
-        product_data_queue_obj = self.env['woo.product.data.queue.ept']
+        queue_line_obj = self.env['woo.product.data.queue.line.ept']
         wcapi = instance.woo_connect()
         model_id = common_log_line_obj.get_model_id('woo.product.template.ept')
         total_results = []
         if instance.woo_version == 'wc/v2' or instance.woo_version == 'wc/v3':
-            available_queue = False
-            product_data_queue_line_ids = False
+            latest_queue_lines = {}
             if not template_id and not import_all:
-                product_data_queues = product_data_queue_obj.search(
-                        [('woo_instance_id', '=', instance.id)])
-                if product_data_queues:
-                    available_queue = True
-                    product_data_queue_line_ids = product_data_queues.queue_line_ids
-            already_exist_result = False
+                latest_queue_lines = queue_line_obj.get_latest_queue_lines(
+                        instance, [result.get('id') for result in results])
             for result in results:
                 flag = False
                 variants = []
+                already_exist_result = False
                 woo_id = result.get('id')
                 date_modified = result.get('date_modified', False)
                 # Added the code to skip the product which is already create or available in queue
-                if available_queue:
-                    already_exist_results = product_data_queue_line_ids.filtered(
-                            lambda x:int(x.woo_synced_data_id) == woo_id)
-                    already_exist_results.sorted(lambda x:x.id, True)
-
-                    for already_exist_result in already_exist_results:
-                        if already_exist_result.state in ["draft", "done"]:
-                            if already_exist_result.woo_update_product_date == date_modified:
-                                flag = True
-                                break
-                            if already_exist_result.state == "draft":
-                                break
-                        already_exist_result = False
-                        break
+                latest_queue_line = latest_queue_lines.get(woo_id)
+                if latest_queue_line and latest_queue_line['state'] in ["draft", "done"]:
+                    if latest_queue_line['woo_update_product_date'] == date_modified:
+                        flag = True
+                    elif latest_queue_line['state'] == "draft":
+                        already_exist_result = queue_line_obj.browse(latest_queue_line['id'])
                 if flag:
                     continue
                 if result.get('variations'):
@@ -983,6 +1083,7 @@ class WooProductTemplateEpt(models.Model):
         variants = []
         try:
             params = {"per_page":100}
+            params.update(instance.get_woo_import_fields_params('variation'))
             response = wcapi.get("products/%s/variations" % (result.get("id")),
                                  params=params)
             variants = response.json()
@@ -1031,17 +1132,18 @@ class WooProductTemplateEpt(models.Model):
                                                limit=1)
         return woo_product, odoo_product
 
-    def woo_create_variant_product(self, product_template_dict, woo_instance):
+    def woo_create_variant_product(self, product_template_dict, woo_instance,
+                                   attribute_index=False):
         """
         :param product_template_dict: It contain the product template info with variants and its
                                     type is Dictionary
         :param woo_instance: It is the browsable object of woo commerce instance
+        :param attribute_index: Attribute index of the import run, created when not given
         @author: Dipak Gogiya @Emipro Technologies Pvt. Ltd.
         """
         ir_config_parameter_obj = self.env["ir.config_parameter"]
-        product_attribute_obj = self.env['product.attribute']
-        product_attribute_value_obj = self.env['product.attribute.value']
         product_template_obj = self.env['product.template']
+        attribute_index = attribute_index or self.env['product.attribute'].get_attribute_index_ept()
 
         template_title = ''
         if product_template_dict.get('name', ''):
@@ -1055,20 +1157,10 @@ class WooProductTemplateEpt(models.Model):
                 continue
             attrib_name = attrib.get('name')
             attrib_values = attrib.get('options')
-            attribute = product_attribute_obj.get_attribute(attrib_name, type='radio',
-                                                            create_variant='always',
-                                                            auto_create=True)
-            attribute = attribute.filtered(lambda x:x.name == attrib_name)[0] if len(
-                    attribute) > 1 else attribute
-            attr_val_ids = []
-
-            for attrib_vals in attrib_values:
-                attrib_value = product_attribute_value_obj.get_attribute_values(attrib_vals,
-                                                                                attribute.id,
-                                                                                auto_create=True)
-                attrib_value = attrib_value.filtered(lambda x:x.name == attrib_vals)[0] if len(
-                        attrib_value) > 1 else attrib_value
-                attr_val_ids.append(attrib_value.id)
+            attribute = attribute_index.get_attribute(attrib_name, type='radio', auto_create=True)
+            attrib_value_dict = attribute_index.get_attribute_values(attribute, attrib_values,
+                                                                     auto_create=True)
+            attr_val_ids = [attrib_value_dict.get(attrib_vals).id for attrib_vals in attrib_values]
 
             if attr_val_ids:
                 attribute_line_ids_data = [0, False, {
@@ -1091,14 +1183,15 @@ class WooProductTemplateEpt(models.Model):
 
             available_odoo_products = self.woo_set_variant_sku(woo_instance, product_template_dict,
                                                                product_template,
-                                                               sync_price_with_product=woo_instance.sync_price_with_product)
+                                                               sync_price_with_product=woo_instance.sync_price_with_product,
+                                                               attribute_index=attribute_index)
             if available_odoo_products:
                 return product_template, available_odoo_products
             return False, False
 
     @api.model
     def find_template_attribute_values(self, template_attributes, variation_attributes,
-                                       product_template, woo_instance):
+                                       product_template, woo_instance, attribute_index=False):
         """
         Finds template's attribute values combination records and prepare domain for searching the odoo product.
         @author: Maulik Barad on Date 06-Dec-2019.
@@ -1106,8 +1199,10 @@ class WooProductTemplateEpt(models.Model):
         @param variation_attributes: Attributes of Woo product.
         @param product_template: Odoo template.
         @param woo_instance: Instance of Woo.
+        @param attribute_index: Attribute index of the import run, created when not given.
         """
         template_attribute_value_domain = []
+        attribute_index = attribute_index or self.env['product.attribute'].get_attribute_index_ept()
         for variation_attribute in variation_attributes:
             attribute_val = variation_attribute.get('option')
             attribute_name = variation_attribute.get('name')
@@ -1116,15 +1211,12 @@ class WooProductTemplateEpt(models.Model):
                     if attribute.get('name').replace(" ", "-").lower() == attribute_name:
                         attribute_name = attribute.get('name')
                         break
-            product_attribute = self.env["product.attribute"].get_attribute(attribute_name,
-                                                                            type="radio",
-                                                                            create_variant="always",
-                                                                            auto_create=True)
+            product_attribute = attribute_index.get_attribute(attribute_name, type="radio",
+                                                              auto_create=True)
             if product_attribute:
-                product_attribute_value = self.env[
-                    "product.attribute.value"].get_attribute_values(attribute_val,
-                                                                    product_attribute.id,
-                                                                    auto_create=True)
+                product_attribute_value = attribute_index.get_attribute_value(product_attribute,
+                                                                              attribute_val,
+                                                                              auto_create=True)
                 if product_attribute_value:
                     template_attribute_value_id = self.env[
                         'product.template.attribute.value'].search(
@@ -1141,7 +1233,7 @@ class WooProductTemplateEpt(models.Model):
         return template_attribute_value_domain
 
     def woo_set_variant_sku(self, woo_instance, product_template_dict,
-                            product_template, sync_price_with_product=False):
+                            product_template, sync_price_with_product=False, attribute_index=False):
         """
         :param woo_instance: It contain the browsable object of the current instance
         :param product_template_dict: It contain the product template info with variants and
@@ -1149,6 +1241,7 @@ class WooProductTemplateEpt(models.Model):
         :param product_template: It is the browsable object of product template
         :param sync_price_with_product: It contain the value od price if it is sync or not with
                                         product and Its type is Boolean
+        :param attribute_index: Attribute index of the import run
         @author: Dipak Gogiya @Emipro Technologies Pvt. Ltd.
         """
         odoo_product_obj = self.env['product.product']
@@ -1166,7 +1259,7 @@ class WooProductTemplateEpt(models.Model):
 
             template_attribute_value_domain = self.find_template_attribute_values(
                     product_template_dict.get("attributes"), variation_attributes, product_template,
-                    woo_instance)
+                    woo_instance, attribute_index)
 
             if template_attribute_value_domain:
                 template_attribute_value_domain.append(
@@ -1208,17 +1301,24 @@ class WooProductTemplateEpt(models.Model):
         return available_odoo_products
 
     def sync_woo_categ_with_product_v1_v2_v3(self, instance, woo_common_log_id, woo_categories,
-                                             sync_images_with_product=True):
+                                             sync_images_with_product=True, category_sync=False):
         """
         :param instance: It is the browsable object of the woo commerce instance
         :param woo_common_log_id: It contain the log id of the common log book and its type is object
         :param woo_categories: It contain the category details of products and and its type is Dict
         :param sync_images_with_product: It contain the either True or False and its type is Boolean
+        :param category_sync: Category sync of the import run, categories processed in the run are
+                              not written again.
         :return: It will return the category ids into list format
         """
         obj_woo_product_categ = self.env['woo.product.categ.ept']
+        category_sync = category_sync or obj_woo_product_categ.prepare_woo_category_sync(instance)
         categ_ids = []
         for woo_category in woo_categories:
+            processed_categ = category_sync['processed_categs'].get(woo_category.get('id'))
+            if processed_categ:
+                categ_ids.append(processed_categ.id)
+                continue
             woo_product_categ = obj_woo_product_categ.search(
                     [('woo_categ_id', '=', woo_category.get('id')),
                      ('woo_instance_id', '=', instance.id)], limit=1)
@@ -1235,7 +1335,8 @@ class WooProductTemplateEpt(models.Model):
                         })
                 obj_woo_product_categ.sync_woo_product_category(instance, woo_common_log_id,
                                                                 woo_product_categ=woo_product_categ,
-                                                                sync_images_with_product=sync_images_with_product)
+                                                                sync_images_with_product=sync_images_with_product,
+                                                                category_sync=category_sync)
                 categ_ids.append(woo_product_categ.id)
             else:
                 woo_product_categ = obj_woo_product_categ.create(
@@ -1246,7 +1347,8 @@ class WooProductTemplateEpt(models.Model):
                         })
                 obj_woo_product_categ.sync_woo_product_category(instance, woo_common_log_id,
                                                                 woo_product_categ=woo_product_categ,
-                                                                sync_images_with_product=sync_images_with_product)
+                                                                sync_images_with_product=sync_images_with_product,
+                                                                category_sync=category_sync)
                 woo_product_categ and categ_ids.append(woo_product_categ.id)
         return categ_ids
 
@@ -1473,7 +1575,7 @@ class WooProductTemplateEpt(models.Model):
 
     @api.model
     def prepare_woo_template_vals(self, template_data, odoo_template_id, import_for_order,
-                                  woo_instance, common_log_book_id):
+                                  woo_instance, common_log_book_id, category_sync=False):
         """
         Creates new Woo template.
         @author: Maulik Barad on Date 05-Dec-2019.
@@ -1482,13 +1584,15 @@ class WooProductTemplateEpt(models.Model):
         @param import_for_order: True when importing product while order process. 
         @param woo_instance: Instance of Woo.
         @param common_log_book_id: Id of Common Log Book.
+        @param category_sync: Category sync of the import run.
         """
         if import_for_order:
             woo_category_ids = self.sync_woo_categ_with_product_v1_v2_v3(woo_instance,
                                                                          common_log_book_id,
                                                                          template_data[
                                                                              "woo_categ_ids"],
-                                                                         woo_instance.sync_images_with_product)
+                                                                         woo_instance.sync_images_with_product,
+                                                                         category_sync)
             woo_tag_ids = self.sync_woo_tags_with_product_v1_v2_v3(woo_instance,
                                                                    template_data["woo_tag_ids"])
         else:
@@ -1656,6 +1760,9 @@ class WooProductTemplateEpt(models.Model):
         model_id = common_log_line_obj.get_model_id(self._name)
         if order_queue_line:
             self.env["woo.process.import.export"].sync_woo_attributes(woo_instance)
+        # Attributes are loaded once for the run instead of searched for every variant.
+        attribute_index = self.env['product.attribute'].get_attribute_index_ept()
+        category_sync = self.env['woo.product.categ.ept'].prepare_woo_category_sync(woo_instance)
 
         for product_data_queue_line in product_data_queue_lines:
             if is_process_from_queue:
@@ -1665,6 +1772,8 @@ class WooProductTemplateEpt(models.Model):
                                            product_data_queue_line.queue_id or False
                         if product_queue_id:
                             product_queue_id.is_process_queue = True
+                    # The failed queue lines are committed with their log lines.
+                    self.env["common.log.book.ept"].flush_log_lines_ept()
                     self._cr.commit()
                     queue_counter = 0
             queue_counter += 1
@@ -1696,7 +1805,9 @@ class WooProductTemplateEpt(models.Model):
                                                                woo_template, product_queue_id,
                                                                sync_category_and_tags,
                                                                template_info,
-                                                               skip_existing_products)
+                                                               skip_existing_products,
+                                                               attribute_index=attribute_index,
+                                                               category_sync=category_sync)
                 if new_woo_template:
                     woo_template = new_woo_template
             if data["type"] == "simple" or data["type"] == "bundle":
@@ -1705,7 +1816,8 @@ class WooProductTemplateEpt(models.Model):
                                                             product_data_queue_line,
                                                             template_updated,
                                                             skip_existing_products=skip_existing_products,
-                                                            order_queue_line=order_queue_line)
+                                                            order_queue_line=order_queue_line,
+                                                            category_sync=category_sync)
                 if not new_woo_template:
                     continue
                 elif not isinstance(new_woo_template, bool):
@@ -1832,7 +1944,7 @@ class WooProductTemplateEpt(models.Model):
 
     def template_attribute_process(self, woo_instance, odoo_template, variant, template_title,
                                    common_log_book_id, data, product_data_queue_line,
-                                   order_queue_line):
+                                   order_queue_line, attribute_index=False):
         """ This method use to create new attribute if customer only add the attribute value other wise it will create a mismatch logs.
             @param :self,woo_instance,odoo_template,variant,template_title,common_log_book_id,data,product_data_queue_line,order_queue_line
             @return: odoo_product, True
@@ -1841,6 +1953,7 @@ class WooProductTemplateEpt(models.Model):
         """
         common_log_line_obj = self.env["common.log.lines.ept"]
         model_id = common_log_line_obj.get_model_id(self._name)
+        attribute_index = attribute_index or self.env['product.attribute'].get_attribute_index_ept()
         if odoo_template.attribute_line_ids:
             # If the new variant has other attribute than available in odoo template, then exception
             # activity will be generated.
@@ -1849,8 +1962,7 @@ class WooProductTemplateEpt(models.Model):
             woo_attribute_ids = []
             odoo_attributes = odoo_template.attribute_line_ids.attribute_id.ids
             for attribute in variant.get("attributes"):
-                attribute = self.env["product.attribute"].get_attribute(
-                        attribute["name"])
+                attribute = attribute_index.get_attribute(attribute["name"])
                 woo_attribute_ids.append(attribute.id)
             woo_attribute_ids.sort()
             odoo_attributes.sort()
@@ -1867,24 +1979,19 @@ class WooProductTemplateEpt(models.Model):
                     product_data_queue_line.state = "failed"
                     line_failed = True
                 if woo_instance.is_create_schedule_activity:
-                    common_log_book_id.create_woo_schedule_activity()
+                    common_log_book_id.flush_log_lines_ept().create_woo_schedule_activity()
                 return False
 
             template_attribute_value_domain = self.find_template_attribute_values(
                     data.get("attributes"), variant.get("attributes"),
-                    odoo_template, woo_instance)
+                    odoo_template, woo_instance, attribute_index)
             if not template_attribute_value_domain:
                 for woo_attribute in variant.get("attributes"):
-                    attribute_id = self.env["product.attribute"].get_attribute(
-                            woo_attribute["name"],
-                            type="radio",
-                            create_variant="always",
-                            auto_create=True)
-                    value_id = self.env[
-                        "product.attribute.value"].get_attribute_values(
-                            woo_attribute["option"],
-                            attribute_id.id,
-                            auto_create=True)
+                    attribute_id = attribute_index.get_attribute(woo_attribute["name"],
+                                                                 type="radio", auto_create=True)
+                    value_id = attribute_index.get_attribute_value(attribute_id,
+                                                                   woo_attribute["option"],
+                                                                   auto_create=True)
                     attribute_line = odoo_template.attribute_line_ids.filtered(
                             lambda x:x.attribute_id.id == attribute_id.id)
                     if not value_id.id in attribute_line.value_ids.ids:
@@ -1892,7 +1999,7 @@ class WooProductTemplateEpt(models.Model):
                 odoo_template._create_variant_ids()
                 template_attribute_value_domain = self.find_template_attribute_values(
                         data.get("attributes"), variant.get("attributes"),
-                        odoo_template, woo_instance)
+                        odoo_template, woo_instance, attribute_index)
             template_attribute_value_domain.append(
                     ("product_tmpl_id", "=", odoo_template.id))
             odoo_product = self.env["product.product"].search(
@@ -1915,7 +2022,8 @@ class WooProductTemplateEpt(models.Model):
     def variation_product_sync(self, woo_instance, product_response, common_log_book_id,
                                product_data_queue_line, order_queue_line,
                                woo_template, product_queue_id, sync_category_and_tags,
-                               template_info, skip_existing_products):
+                               template_info, skip_existing_products, attribute_index=False,
+                               category_sync=False):
         """ This method use to create variation product.
             @param :self,woo_instance,product_response,common_log_book_id,product_data_queue_line,order_queue_line,
                     woo_template,product_queue_id,sync_category_and_tags,template_info,skip_existing_products
@@ -1937,6 +2045,7 @@ class WooProductTemplateEpt(models.Model):
         available_woo_products, available_odoo_products, odoo_template = self.available_woo_odoo_products(
                 woo_instance, woo_template, product_response)
         product_dict = {}
+        variant_price_dict = {}
         for variant in product_response["variations"]:
             variant_id = variant.get("id")
             product_sku = variant.get("sku")
@@ -1979,7 +2088,7 @@ class WooProductTemplateEpt(models.Model):
                 if not woo_template:
                     if not odoo_template and woo_instance.auto_import_product:
                         odoo_template, available_odoo_products = self.woo_create_variant_product(
-                                product_response, woo_instance)
+                                product_response, woo_instance, attribute_index)
                     if not odoo_template:
                         message = "%s Template Not found for sku %s in Odoo." % (
                             template_title, product_sku)
@@ -1999,14 +2108,16 @@ class WooProductTemplateEpt(models.Model):
                                                                        odoo_template.id,
                                                                        sync_category_and_tags,
                                                                        woo_instance,
-                                                                       common_log_book_id)
+                                                                       common_log_book_id,
+                                                                       category_sync)
                     woo_template = self.create(woo_template_vals)
                 elif not template_updated:
                     woo_template_vals = self.prepare_woo_template_vals(template_info,
                                                                        odoo_template.id,
                                                                        sync_category_and_tags,
                                                                        woo_instance,
-                                                                       common_log_book_id)
+                                                                       common_log_book_id,
+                                                                       category_sync)
                     woo_template.write(woo_template_vals)
                 template_updated = True
 
@@ -2032,7 +2143,8 @@ class WooProductTemplateEpt(models.Model):
                                                                        common_log_book_id,
                                                                        product_response,
                                                                        product_data_queue_line,
-                                                                       order_queue_line)
+                                                                       order_queue_line,
+                                                                       attribute_index)
                     if not new_odoo_product:
                         break
                     elif not isinstance(new_odoo_product, bool):
@@ -2047,15 +2159,14 @@ class WooProductTemplateEpt(models.Model):
                                                                        woo_product.product_id.product_tmpl_id.id,
                                                                        sync_category_and_tags,
                                                                        woo_instance,
-                                                                       common_log_book_id)
+                                                                       common_log_book_id,
+                                                                       category_sync)
                     woo_template.write(woo_template_vals)
                     template_updated = True
                 woo_product.write(variant_info)
-            update_price = woo_instance.sync_price_with_product
             update_images = woo_instance.sync_images_with_product
-            if update_price:
-                woo_instance.woo_pricelist_id.set_product_price_ept(woo_product.product_id.id,
-                                                                    variant_price)
+            if woo_instance.sync_price_with_product:
+                variant_price_dict.update({woo_product.product_id.id:variant_price})
             if update_images:
                 if not woo_template.product_tmpl_id.image_1920:
                     product_dict.update(
@@ -2065,12 +2176,14 @@ class WooProductTemplateEpt(models.Model):
                                            woo_product, woo_instance, template_images_updated,
                                            product_dict)
                 template_images_updated = True
+        if variant_price_dict:
+            woo_instance.woo_pricelist_id.set_products_price_ept(variant_price_dict)
         return woo_template
 
     def simple_product_sync(self, woo_instance, product_response, common_log_book_id,
                             product_queue_id, template_info, product_data_queue_line,
                             template_updated,
-                            skip_existing_products, order_queue_line):
+                            skip_existing_products, order_queue_line, category_sync=False):
         """ This method use to create or update a simple products.
             @param :self,woo_instance,product_response,common_log_book_id,template_info,product_queue_id,product_data_queue_line,template_updated,
                     skip_existing_products,order_queue_line
@@ -2179,7 +2292,8 @@ class WooProductTemplateEpt(models.Model):
                                                                    odoo_template.id,
                                                                    sync_category_and_tags,
                                                                    woo_instance,
-                                                                   common_log_book_id)
+                                                                   common_log_book_id,
+                                                                   category_sync)
                 woo_template = self.create(woo_template_vals)
                 template_updated = True
 
@@ -2192,13 +2306,14 @@ class WooProductTemplateEpt(models.Model):
                                                                    woo_template.product_tmpl_id.id,
                                                                    sync_category_and_tags,
                                                                    woo_instance,
-                                                                   common_log_book_id)
+                                                                   common_log_book_id,
+                                                                   category_sync)
                 woo_template.write(woo_template_vals)
                 template_updated = True
             woo_product.write(variant_info)
         if update_price:
-            woo_instance.woo_pricelist_id.set_product_price_ept(woo_product.product_id.id,
-                                                                variant_price)
+            woo_instance.woo_pricelist_id.set_products_price_ept(
+                    {woo_product.product_id.id:variant_price})
         if update_images:
             self.update_product_images(product_response["images"], {}, woo_template, woo_product,
                                        woo_instance, template_images_updated)
@@ -2251,6 +2366,7 @@ class WooProductTemplateEpt(models.Model):
 
         common_log_line_obj = self.env['common.log.lines.ept']
         model_id = common_log_line_obj.get_model_id('woo.product.template.ept')
+        woo_attribute_index = self.env['woo.product.attribute.ept'].get_woo_attribute_index(instance)
         wcapi = instance.woo_connect()
 
         if not instance.is_export_update_images:
@@ -2265,6 +2381,8 @@ class WooProductTemplateEpt(models.Model):
         for templates in batches:
             batch_update = {'update':[]}
             batch_update_data = []
+            batch_self = self.with_export_cache(instance, templates, update_price,
+                                                woo_attribute_index)
 
             for template in templates:
                 data = {'id':template.woo_tmpl_id, 'variations':[],
@@ -2277,12 +2395,13 @@ class WooProductTemplateEpt(models.Model):
                 else:
                     data.update({'status':'draft'})
 
-                flag, data = self.prepare_product_update_data(template, update_image, update_basic_detail, data)
+                flag, data = batch_self.prepare_product_update_data(template, update_image, update_basic_detail, data)
 
-                data, flag = self.prepare_product_variant_dict(instance, template, data,
+                data, flag = batch_self.prepare_product_variant_dict(instance, template, data,
                                                                update_basic_detail,
                                                                update_price, update_image,
-                                                               common_log_id, model_id)
+                                                               common_log_id, model_id,
+                                                               woo_attribute_index=woo_attribute_index)
                 flag and batch_update_data.append(data)
                 data = {}
             if batch_update_data:
@@ -2518,7 +2637,8 @@ class WooProductTemplateEpt(models.Model):
                     woo_tag.woo_tag_id and tag_ids.append(woo_tag.woo_tag_id)
         return tag_ids
 
-    def export_product_attributes_in_woo(self, instance, common_log_id, model_id, attribute):
+    def export_product_attributes_in_woo(self, instance, common_log_id, model_id, attribute,
+                                         woo_attribute_index=False):
         """
         This method is called when attribute type is select
         Find the existing product attribute if it is available then return It else create a new
@@ -2529,15 +2649,20 @@ class WooProductTemplateEpt(models.Model):
         :param common_log_id: It contain the common log book id and its type is Object
         :param model_id: It contain the id of the model class
         :param attribute: It contain the product attribute
+        :param woo_attribute_index: Woo attribute index of the export run
         :return: It will return the attribute id into Dict Format.
         @author: Dipak Gogiya @Emipro Technologies Pvt. Ltd
         """
         common_log_line_obj = self.env['common.log.lines.ept']
         wcapi = instance.woo_connect()
         obj_woo_attribute = self.env['woo.product.attribute.ept']
-        woo_attribute = obj_woo_attribute.search(
-                [('attribute_id', '=', attribute.id), ('woo_instance_id', '=', instance.id),
-                 ('exported_in_woo', '=', True)], limit=1)
+        woo_attribute = woo_attribute_index and woo_attribute_index.get(
+                'instance_id') == instance.id and woo_attribute_index['by_attribute'].get(
+                attribute.id)
+        if not woo_attribute:
+            woo_attribute = obj_woo_attribute.search(
+                    [('attribute_id', '=', attribute.id), ('woo_instance_id', '=', instance.id),
+                     ('exported_in_woo', '=', True)], limit=1)
         if woo_attribute and woo_attribute.woo_attribute_id:
             return {attribute.id:woo_attribute.woo_attribute_id}
         attribute_data = {
@@ -2566,7 +2691,7 @@ class WooProductTemplateEpt(models.Model):
         woo_attribute_slug = attribute_response.get('slug')
         woo_attribute_order_by = attribute_response.get('order_by')
         has_archives = attribute_response.get('has_archives')
-        obj_woo_attribute.create({
+        woo_attribute = obj_woo_attribute.create({
             'name':attribute and attribute.name or woo_attribute_name,
             'woo_attribute_id':woo_attribute_id,
             'order_by':woo_attribute_order_by,
@@ -2574,15 +2699,19 @@ class WooProductTemplateEpt(models.Model):
             'attribute_id':attribute.id,
             'exported_in_woo':True, 'has_archives':has_archives
         })
+        if woo_attribute_index and woo_attribute_index.get('instance_id') == instance.id:
+            obj_woo_attribute.add_to_woo_attribute_index(woo_attribute_index, woo_attribute)
         return {attribute.id:woo_attribute_id}
 
     @api.model
-    def get_product_attribute(self, template, instance, common_log_id, model_id):
+    def get_product_attribute(self, template, instance, common_log_id, model_id,
+                              woo_attribute_index=False):
         """
         :param template: It contain the browsable object of the product template
         :param instance: It contain the browsable object of the current instance
         :param common_log_id: It contain the common log book browsable object
         :param model_id: It contain the if of the model class and Its type Integer
+        :param woo_attribute_index: Woo attribute index of the export run
         :return: It will return the attributes and Its type is List of Dictionary and return True
                 or False for is_variable field
         @author: Dipak Gogiya @Emipro Technologies Pvt. Ltd
@@ -2608,7 +2737,8 @@ class WooProductTemplateEpt(models.Model):
             if instance.woo_attribute_type == 'select':
                 attrib_data = self.export_product_attributes_in_woo(instance, common_log_id,
                                                                     model_id,
-                                                                    attribute_line.attribute_id)
+                                                                    attribute_line.attribute_id,
+                                                                    woo_attribute_index)
                 if not attrib_data:
                     break
                 attribute_data.update({'id':attrib_data.get(attribute_line.attribute_id.id)})
@@ -2621,7 +2751,8 @@ class WooProductTemplateEpt(models.Model):
         return attributes, is_variable
 
     def prepare_product_variant_dict(self, instance, template, data, basic_detail, update_price,
-                                     update_image, common_log_id, model_id):
+                                     update_image, common_log_id, model_id,
+                                     woo_attribute_index=False):
         """
         This method is used for prepare the product variant dict based on parameters.
         Maulik : Updates variant in this method. Creates new variant, if not exported in woo.
@@ -2634,6 +2765,7 @@ class WooProductTemplateEpt(models.Model):
         :param update_image: It contain Either True or False and its type is Boolean
         :param common_log_id: It contain the log book id and its type is object
         :param model_id: It contain the id of the model class
+        :param woo_attribute_index: Woo attribute index of the export run
         :return: It will return the updated data dictionary
         @author: Dipak Gogiya @Emipro Technologies Pvt. Ltd
         Migration done by Haresh Mori @ Emipro on date 21 September 2020 .
@@ -2642,6 +2774,9 @@ class WooProductTemplateEpt(models.Model):
         wcapi = instance.woo_connect()
         variants_to_create = []
         flag = True
+        variants_price = update_price and (
+                self.get_export_cache(instance).get('variants_price') or
+                self.get_products_price(instance, template.woo_product_ids)) or {}
         for variant in template.woo_product_ids:
             # var_url = ''
             price = 0.0
@@ -2649,23 +2784,22 @@ class WooProductTemplateEpt(models.Model):
                 info = {'id':variant.variant_id}
 
                 if basic_detail:
-                    weight = self.convert_weight_by_uom(variant.product_id.weight, instance)
-                    info.update({'sku':variant.default_code, 'weight':str(weight),
+                    variant_data = self.get_export_variant_data(instance, variant,
+                                                                woo_attribute_index)
+                    info.update({'sku':variant.default_code, 'weight':variant_data['weight'],
                                  "manage_stock":variant.woo_is_manage_stock})
             else:
                 attributes = \
                     self.get_product_attribute(template.product_tmpl_id, instance, common_log_id,
-                                               model_id)[0]
-                info = self.get_variant_data(variant, instance, False)
+                                               model_id, woo_attribute_index)[0]
+                info = self.get_variant_data(variant, instance, False, woo_attribute_index)
 
             if update_image:
                 info.update(self.get_variant_image(instance, variant))
 
             if update_price:
-                price = instance.woo_pricelist_id.get_product_price(variant.product_id, 1.0,
-                                                                    partner=False,
-                                                                    uom_id=variant.product_id.uom_id.id)
-                info.update({'regular_price':str(price), 'sale_price':str(price)})
+                info.update(variants_price.get(variant.id))
+                price = info.get('regular_price')
 
             if template.woo_tmpl_id != variant.variant_id:
                 if variant.variant_id:
@@ -2805,43 +2939,60 @@ class WooProductTemplateEpt(models.Model):
          Migration done by Haresh Mori @ Emipro on date 15 September 2020 .
         """
         start = time.time()
+        woo_attribute_index = self.env['woo.product.attribute.ept'].get_woo_attribute_index(instance)
         wcapi = instance.woo_connect()
         common_log_line_obj = self.env['common.log.lines.ept']
         model_id = common_log_line_obj.get_model_id('woo.product.template.ept')
         if not instance.is_export_update_images:
             update_image = False
-        for woo_template in woo_templates:
-            _logger.info("== Start the export woo product: '%s'" % woo_template.name)
-            data = self.prepare_product_data(woo_template, publish, update_price, update_image, basic_detail, common_log_id, model_id)
-            variants = data.get('variations') or []
-            variants and data.update({'variations':[]})
-
-            response = self.export_woo_template(woo_template, data, common_log_id)
-            if not response:
-                continue
-            response_variations = []
-            woo_tmpl_id = response.get('id')
-
-            if woo_tmpl_id and variants:
-                response_variations = self.export_woo_variants(variants, woo_tmpl_id, wcapi,
-                                                               woo_template, model_id)
-
-            self.woo_update_template_variant_data(response_variations, woo_template, common_log_id, response, woo_tmpl_id, publish)
-
-            attribute_ids = []
-            for variant in variants:
-                for attribute in variant.get('attributes'):
-                    attribute_ids.append(int(attribute.get('id')))
-            self.sync_woo_attribute_term(instance, common_log_id,list(set(attribute_ids)))
+        attribute_ids = set()
+        for woo_templates_batch in self.prepare_batches(woo_templates):
+            export_data = []
+            batch_self = self.with_export_cache(instance, woo_templates_batch, update_price,
+                                                woo_attribute_index)
+            for woo_template in woo_templates_batch:
+                _logger.info("== Start the export woo product: '%s'" % woo_template.name)
+                data = batch_self.prepare_product_data(woo_template, publish, update_price,
+                                                       update_image, basic_detail, common_log_id,
+                                                       model_id, woo_attribute_index)
+                variants = data.get('variations') or []
+                variants and data.update({'variations':[]})
+                export_data.append((woo_template, data, variants))
+
+            responses = self.export_woo_templates(instance, wcapi, export_data, common_log_id)
+            variants_to_export = [(woo_template, responses[woo_template.id].get('id'), variants)
+                                  for woo_template, data, variants in export_data
+                                  if variants and responses.get(woo_template.id, {}).get('id')]
+            response_variations = self.export_woo_variants(instance, wcapi, variants_to_export,
+                                                           common_log_id)
+
+            for woo_template, data, variants in export_data:
+                response = responses.get(woo_template.id)
+                if not response:
+                    continue
+                self.woo_update_template_variant_data(response_variations.get(woo_template.id, []),
+                                                      woo_template, common_log_id, response,
+                                                      response.get('id'), publish)
+                for attribute in data.get('attributes') or []:
+                    attribute.get('id') and attribute_ids.add(int(attribute.get('id')))
+                for variant in variants:
+                    for attribute in variant.get('attributes'):
+                        attribute_ids.add(int(attribute.get('id')))
+                _logger.info("== End the export woo product: '%s' process" % woo_template.name)
+            self._cr.commit()
 
-            _logger.info("== End the export woo product: '%s' process" % woo_template.name)
+        # Attribute terms are created in the store while exporting the products, so sync them once
+        # for all the exported attributes.
+        if attribute_ids:
+            self.sync_woo_attribute_term(instance, common_log_id, list(attribute_ids))
             self._cr.commit()
         end = time.time()
         _logger.info("Exported total templates  %s  in %s seconds." % (len(woo_templates), str(end - start)))
         return True
 
     def prepare_product_data(self, woo_template, publish, update_price,
-                             update_image, basic_detail, common_log_id, model_id):
+                             update_image, basic_detail, common_log_id, model_id,
+                             woo_attribute_index=False):
         """ This method use to prepare a data for the export product.
             @param : elf, wcapi, instance, woo_template, publish, update_price,
                          update_image, basic_detail, template, common_log_id, model_id
@@ -2884,21 +3035,25 @@ class WooProductTemplateEpt(models.Model):
                 data.update({'tags':tag_ids})
 
             attributes, is_variable = self.get_product_attribute(template, instance, common_log_id,
-                                                                 model_id)
+                                                                 model_id, woo_attribute_index)
             if is_variable:
                 data.update({'type':'variable'})
 
             if template.attribute_line_ids:
                 variations = []
+                variants_price = update_price and (
+                        self.get_export_cache(instance).get('variants_price') or
+                        self.get_products_price(instance, woo_template.woo_product_ids)) or {}
                 for variant in woo_template.woo_product_ids:
                     variation_data = {}
-                    product_variant = self.get_variant_data(variant, instance, update_image)
+                    product_variant = self.get_variant_data(variant, instance, update_image,
+                                                            woo_attribute_index)
                     variation_data.update(product_variant)
                     if update_price:
                         if data.get('type') == 'simple':
-                            data.update(self.get_product_price(instance, variant))
+                            data.update(variants_price.get(variant.id))
                         else:
-                            variation_data.update(self.get_product_price(instance, variant))
+                            variation_data.update(variants_price.get(variant.id))
                     variations.append(variation_data)
                 default_att = variations and variations[0].get('attributes') or []
                 data.update({
@@ -2910,9 +3065,11 @@ class WooProductTemplateEpt(models.Model):
                                  "manage_stock":variant.woo_is_manage_stock})
             else:
                 variant = woo_template.woo_product_ids
-                data.update(self.get_variant_data(variant, instance, update_image))
+                data.update(self.get_variant_data(variant, instance, update_image,
+                                                  woo_attribute_index))
                 if update_price:
-                    data.update(self.get_product_price(instance, variant))
+                    data.update(self.get_export_cache(instance).get('variants_price', {}).get(
+                            variant.id) or self.get_product_price(instance, variant))
 
         if publish == 'publish':
             data.update({'status':'publish'})
@@ -2934,89 +3091,130 @@ class WooProductTemplateEpt(models.Model):
         @param import_process: In which process, we are converting the weight import or export.
         """
         woo_weight_uom = instance.weight_uom_id
-        product_weight_uom = self.env.ref("uom.product_uom_lb") if self.env[
-                                                                       "ir.config_parameter"].sudo().get_param(
-                "product.weight_in_lbs") == '1' else self.env.ref("uom.product_uom_kgm")
+        product_weight_uom = self.get_product_weight_uom()
 
         if woo_weight_uom != product_weight_uom:
             if import_process:
                 weight = woo_weight_uom._compute_quantity(weight, product_weight_uom)
             else:
-                weight = product_weight_uom._compute_quantity(weight, woo_weight_uom)
+                # An export run converts every weight once, its UoMs are the same for all products.
+                converted_weights = self._context.get('woo_export_cache', {}).get(
+                        'converted_weights')
+                if converted_weights is None:
+                    return product_weight_uom._compute_quantity(weight, woo_weight_uom)
+                if weight not in converted_weights:
+                    converted_weights[weight] = product_weight_uom._compute_quantity(
+                            weight, woo_weight_uom)
+                weight = converted_weights[weight]
         return weight
 
-    def export_woo_template(self, woo_template, data, common_log_id):
-        """ This method use to export woo template in Woo commmerce store.
-            @param : self
-            @return:
-            @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 16 September 2020 .
-            Task_id: 165897
+    def get_product_weight_uom(self):
+        """
+        Gives the weight UoM of the products, from the export cache of the run when available.
+        """
+        export_cache = self._context.get('woo_export_cache')
+        if export_cache:
+            return self.env['uom.uom'].browse(export_cache['product_weight_uom_id'])
+        return self.env["product.template"]._get_weight_uom_id_from_ir_config_parameter()
+
+    def export_woo_templates(self, instance, wcapi, export_data, common_log_id):
+        """ This method use to export a batch of woo templates in Woo commmerce store with one request.
+            @param export_data: List of tuple of woo template, data and variants, up to 100 templates.
+            @return: Dictionary of {woo_template.id: response}, only for the exported templates.
         """
-        template = woo_template.product_tmpl_id
-        instance = woo_template.woo_instance_id
-        wcapi = instance.woo_connect()
         common_log_line_obj = self.env['common.log.lines.ept']
         model_id = common_log_line_obj.get_model_id(self._name)
+        responses = {}
+        if not export_data:
+            return responses
 
-        new_product = wcapi.post('products', data)
-        if not isinstance(new_product, requests.models.Response):
-            message = "Export Product\nResponse is not in proper format :: %s" % (new_product)
-            common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id, template)
-            return False
-        if new_product.status_code not in [200, 201]:
-            common_log_line_obj.woo_product_export_log_line(new_product.content, model_id, common_log_id, template)
-            return False
+        res = wcapi.post('products/batch', {'create':[data for _template, data, _variants in export_data]})
+        message = False
+        if not isinstance(res, requests.models.Response):
+            message = "Export Product\nResponse is not in proper format :: %s" % (res)
+        elif res.status_code not in [200, 201]:
+            message = res.content
+        else:
+            try:
+                created_products = res.json().get('create') or []
+            except Exception as error:
+                message = "Json Error : While export product to WooCommerce for instance %s. \n%s" % (
+                    instance.name, error)
+        if message:
+            for woo_template, data, variants in export_data:
+                common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id,
+                                                                woo_template.product_tmpl_id)
+            return responses
+
+        # The batch response keeps the order of the request, so each item belongs to the template at
+        # the same position.
+        for (woo_template, data, variants), response in zip(export_data, created_products):
+            template = woo_template.product_tmpl_id
+            if not isinstance(response, dict):
+                message = "Export Product, Response is not in proper format"
+                common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id, template)
+                continue
+            if response.get('error'):
+                error = response.get('error')
+                message = error.get('message')
+                if error.get('code') == 'woocommerce_rest_product_sku_already_exists':
+                    message = "%s, ==> %s" % (message, data.get('name'))
+                common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id, template)
+                continue
+            responses.update({woo_template.id:response})
+        return responses
+
+    @staticmethod
+    def post_woo_batch(wcapi, endpoint, data):
+        """ This method use to post a batch request, it is called from the worker threads so it must not
+            use the environment.
+            @return: Response of the request or the raised exception.
+        """
         try:
-            response = new_product.json()
+            return wcapi.post(endpoint, data)
         except Exception as error:
-            message = "Json Error : While export product to WooCommerce for instance %s. \n%s" % (
-                instance.name, error)
-            common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id, template)
-            return False
-        if response.get('data', {}) and response.get('data', {}).get('status') not in [200,
-                                                                                       201]:
-            message = response.get('message')
-            if response.get('code') == 'woocommerce_rest_product_sku_already_exists':
-                message = "%s, ==> %s" % (message, data.get('name'))
-            common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id, template)
-            return False
-        if not isinstance(response, dict):
-            message = "Export Product, Response is not in proper format"
-            common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id, template)
-            return False
-
-        return response
+            return error
 
-    def export_woo_variants(self, variants, woo_tmpl_id, wcapi, woo_template, common_log_id):
-        """ This method use to export variations data in the Woocommerce store.
-            @param : self, variants, woo_tmpl_id, wcapi
-            @return: response_variations
-            @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 16 September 2020 .
-            Task_id: 165897
+    def export_woo_variants(self, instance, wcapi, variants_to_export, common_log_id):
+        """ This method use to export variations data in the Woocommerce store. The variation batches
+            of the different templates are posted concurrently.
+            @param variants_to_export: List of tuple of woo template, woo template id and variants.
+            @return: Dictionary of {woo_template.id: response_variations}
         """
         common_log_line_obj = self.env['common.log.lines.ept']
         model_id = common_log_line_obj.get_model_id(self._name)
-        response_variations = []
-        vairant_batches = self.prepare_batches(variants)
-        for woo_variants in vairant_batches:
-            for variant in woo_variants:
-                if variant.get('image'):
-                    variant.update({'image':variant.get('image')})
-            variant_response = wcapi.post("products/%s/variations/batch" % (woo_tmpl_id),
-                                          {'create':woo_variants})
+        response_variations = {}
+        requests_data = []
+        for woo_template, woo_tmpl_id, variants in variants_to_export:
+            response_variations.update({woo_template.id:[]})
+            for woo_variants in self.prepare_batches(variants):
+                requests_data.append((woo_template, "products/%s/variations/batch" % (woo_tmpl_id),
+                                      {'create':woo_variants}))
+        if not requests_data:
+            return response_variations
+
+        with ThreadPoolExecutor(max_workers=EXPORT_VARIATION_WORKERS) as executor:
+            variant_responses = list(executor.map(
+                    lambda request_data:self.post_woo_batch(wcapi, request_data[1], request_data[2]),
+                    requests_data))
+
+        for (woo_template, endpoint, data), variant_response in zip(requests_data, variant_responses):
+            template = woo_template.product_tmpl_id
+            if not isinstance(variant_response, requests.models.Response):
+                message = "Export Product Variants\nResponse is not in proper format :: %s" % (
+                    variant_response)
+                common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id, template)
+                continue
             if variant_response.status_code not in [200, 201]:
-                common_log_line_obj.woo_product_export_log_line(variant_response.content,
-                                                                model_id, common_log_id,
-                                                                woo_template.product_tmpl_id)
+                common_log_line_obj.woo_product_export_log_line(variant_response.content, model_id,
+                                                                common_log_id, template)
                 continue
             try:
-                response_variations += variant_response.json().get('create')
+                response_variations[woo_template.id] += variant_response.json().get('create')
             except Exception as error:
                 message = "Json Error : While retrive product response from WooCommerce " \
-                          "for instance %s. \n%s" % (woo_template.woo_instance_id.name, error)
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                common_log_id,
-                                                                woo_template.product_tmpl_id)
+                          "for instance %s. \n%s" % (instance.name, error)
+                common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id, template)
                 continue
 
         return response_variations
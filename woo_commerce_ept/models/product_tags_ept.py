@@ -40,53 +40,106 @@ class WooTagsEpt(models.Model):
             model_id = common_log_line_obj.get_model_id(self._name)
         for instance in instances:
             wcapi = instance.woo_connect()
-            product_tags = []
-            for woo_product_tag in woo_product_tags.filtered(lambda x: x.woo_instance_id == instance):
-                row_data = {"name": woo_product_tag.name,
-                            "description": str(woo_product_tag.description or ""),
-                            "slug": str(woo_product_tag.slug or "")}
-                product_tags.append(row_data)
-            if not product_tags:
-                continue
-            data = {"create":product_tags}
-            _logger.info("Exporting tags to Woo of instance {0}".format(instance.name))
-            res = wcapi.post("products/tags/batch", data)
-            if not isinstance(res, requests.models.Response):
-                message = "Export Product Tags \nResponse is not in proper format :: %s" % (res)
-                common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_book_id,False)
-                return False
-            if res.status_code not in [200, 201]:
-                if res.status_code == 500:
-                    try:
-                        response = res.json()
-                    except Exception as error:
-                        message = "Json Error : While exporting tag to WooCommerce for instance %s. \n%s" % (instance.name, error)
+            instance_tags = woo_product_tags.filtered(lambda x: x.woo_instance_id == instance)
+            exported_count = 0
+            for start in range(0, len(instance_tags), 100):
+                batch_tags = instance_tags[start:start + 100]
+                product_tags = []
+                for woo_product_tag in batch_tags:
+                    row_data = {"name": woo_product_tag.name,
+                                "description": str(woo_product_tag.description or ""),
+                                "slug": str(woo_product_tag.slug or "")}
+                    product_tags.append(row_data)
+                _logger.info("Exporting tags to Woo of instance {0}".format(instance.name))
+                exported_product_tags = self.post_woo_tags_batch(instance, wcapi, "create",
+                                                                 product_tags, common_log_book_id,
+                                                                 model_id)
+                # The batch response keeps the order of the request.
+                for woo_product_tag, tag in zip(batch_tags, exported_product_tags):
+                    error = tag.get("error") if isinstance(tag, dict) else False
+                    if error and error.get("code") == "term_exists":
+                        data = error.get("data")
+                        woo_tag_id = isinstance(data, dict) and data.get("resource_id") or data
+                        woo_product_tag.write({"woo_tag_id": woo_tag_id, "exported_in_woo": True})
+                    elif error:
+                        message = "%s :: %s" % (error.get("message"), woo_product_tag.name)
                         common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                        common_log_book_id,
-                                                                        False)
-                    if isinstance(response, dict) and response.get("code") == "term_exists":
-                        woo_product_tag.write({"woo_tag_id": response.get("data"), "exported_in_woo": True})
-                    else:
-                        message = res.content
-                        common_log_line_obj.woo_product_export_log_line(message, model_id,common_log_book_id,False)
-            try:
-                response = res.json()
-            except Exception as error:
-                message = "Json Error : While exporting tag to WooCommerce for instance %s. \n%s" % (instance.name, error)
-                common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_book_id,False)
-                return False
-            exported_product_tags = response.get("create")
-            for tag in exported_product_tags:
-                woo_product_tag = woo_product_tags.filtered(lambda x: x.name == tag.get("name") and x.woo_instance_id == instance)
-                if tag.get("id", False) and woo_product_tag:
-                    woo_product_tag.write(
-                        {"woo_tag_id": tag.get("id", False),
-                         "exported_in_woo": True,
-                         "slug": tag.get("slug", "")})
-            _logger.info("Exported {0} tags to Woo of instance {1}".format(len(exported_product_tags), instance.name))
-        self._cr.commit()
+                                                                        common_log_book_id, False)
+                    elif isinstance(tag, dict) and tag.get("id", False):
+                        woo_product_tag.write(
+                            {"woo_tag_id": tag.get("id", False),
+                             "exported_in_woo": True,
+                             "slug": tag.get("slug", "")})
+                        exported_count += 1
+                self._cr.commit()
+            _logger.info("Exported {0} tags to Woo of instance {1}".format(exported_count, instance.name))
         return True
 
+    def post_woo_tags_batch(self, instance, wcapi, action, product_tags, common_log_book_id, model_id):
+        """
+        This method is used to post up to 100 tags to the tags batch API of WooCommerce. The legacy
+        API (v3) has no batch endpoint, so the tags are posted one by one to it.
+        :param action: create or update
+        :param product_tags: List of the tags data
+        :return: List of the tags of the response, in the order of the request
+        """
+        common_log_line_obj = self.env["common.log.lines.ept"]
+        if instance.woo_version == "v3":
+            return [self.post_woo_tag_v3(instance, wcapi, action, row_data, common_log_book_id, model_id)
+                    for row_data in product_tags]
+        res = wcapi.post("products/tags/batch", {action: product_tags})
+        if not isinstance(res, requests.models.Response):
+            message = "%s Product Tags \nResponse is not in proper format :: %s" % (action.capitalize(), res)
+            common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_book_id, False)
+            return []
+        if res.status_code not in [200, 201]:
+            common_log_line_obj.woo_product_export_log_line(res.content, model_id, common_log_book_id, False)
+            return []
+        try:
+            response = res.json()
+        except Exception as error:
+            message = "Json Error : While %s tags to WooCommerce for instance %s. \n%s" % (
+                action, instance.name, error)
+            common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_book_id, False)
+            return []
+        return isinstance(response, dict) and response.get(action) or []
+
+    def post_woo_tag_v3(self, instance, wcapi, action, row_data, common_log_book_id, model_id):
+        """
+        This method is used to post one tag to the legacy API (v3) of WooCommerce.
+        :param action: create or update
+        :param row_data: Data of the tag
+        :return: Tag of the response in the format of an item of the batch response, or False
+        """
+        common_log_line_obj = self.env["common.log.lines.ept"]
+        row_data = dict(row_data)
+        if action == "update":
+            res = wcapi.put("products/tags/%s" % (row_data.pop("id")), {"product_tag": row_data})
+        else:
+            res = wcapi.post("products/tags", {"product_tag": row_data})
+        if not isinstance(res, requests.models.Response):
+            message = "%s Product Tags \nResponse is not in proper format :: %s" % (action.capitalize(), res)
+            common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_book_id, False)
+            return False
+        try:
+            response = res.json()
+        except Exception as error:
+            message = "Json Error : While %s tag %s to WooCommerce for instance %s. \n%s" % (
+                action, row_data.get("name"), instance.name, error)
+            common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_book_id, False)
+            return False
+        if not isinstance(response, dict):
+            return False
+        if response.get("code") == "term_exists":
+            return {"error": response}
+        if res.status_code not in [200, 201]:
+            common_log_line_obj.woo_product_export_log_line(res.content, model_id, common_log_book_id, False)
+            return False
+        errors = response.get("errors")
+        if errors:
+            return {"error": errors[0]}
+        return response.get("product_tag", False)
+
     def woo_import_all_tags(self, wcapi, instance, page, woo_common_log_id, model_id):
         """
         This method is used for collecting the info of tags by page wise and return the response into dict format
@@ -231,53 +284,30 @@ class WooTagsEpt(models.Model):
             model_id = common_log_line_obj.get_model_id(self._name)
         for instance in instances:
             wcapi = instance.woo_connect()
-            product_tags = []
-            for woo_product_tag in woo_product_tags.filtered(lambda x: x.woo_instance_id == instance):
-                row_data = {"id":woo_product_tag.woo_tag_id,
-                            "name": woo_product_tag.name,
-                            "description": str(woo_product_tag.description or ""),
-                            "slug": str(woo_product_tag.slug or "")}
-                product_tags.append(row_data)
-
-            data = {"update":product_tags}
-            _logger.info("Updating tags in Woo of instance {0}".format(instance.name))
-            res = wcapi.post("products/tags/batch", data)
-            if not isinstance(res, requests.models.Response):
-                message = "Update Product Tags \nResponse is not in proper format :: %s" % (
-                    res)
-                common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_book_id,
-                                                                False)
-                return False
-            if res.status_code not in [200, 201]:
-                if res.status_code == 500:
-                    try:
-                        response = res.json()
-                    except Exception as e:
-                        message = "Json Error : While updating tag to WooCommerce for instance " \
-                                  "%s. \n%s" % (instance.name, e)
-                        common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                        common_log_book_id,
-                                                                        False)
-                    if isinstance(response, dict) and response.get("code") == "term_exists":
-                        woo_product_tag.write(
-                            {"woo_tag_id": response.get("data"), "exported_in_woo": True})
-                    else:
-                        message = res.content
+            instance_tags = woo_product_tags.filtered(lambda x: x.woo_instance_id == instance)
+            updated_count = 0
+            for start in range(0, len(instance_tags), 100):
+                batch_tags = instance_tags[start:start + 100]
+                product_tags = []
+                for woo_product_tag in batch_tags:
+                    row_data = {"id":woo_product_tag.woo_tag_id,
+                                "name": woo_product_tag.name,
+                                "description": str(woo_product_tag.description or ""),
+                                "slug": str(woo_product_tag.slug or "")}
+                    product_tags.append(row_data)
+                _logger.info("Updating tags in Woo of instance {0}".format(instance.name))
+                updated_product_tags = self.post_woo_tags_batch(instance, wcapi, "update",
+                                                                product_tags, common_log_book_id,
+                                                                model_id)
+                for woo_product_tag, tag in zip(batch_tags, updated_product_tags):
+                    error = tag.get("error") if isinstance(tag, dict) else False
+                    if error:
+                        message = "%s :: %s" % (error.get("message"), woo_product_tag.name)
                         common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                        common_log_book_id,
-                                                                        False)
-            try:
-                response = res.json()
-            except Exception as e:
-                message = "Json Error : While updating tag to WooCommerce for instance %s. \n%s" \
-                          % (instance.name, e)
-                common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_book_id,
-                                                                False)
-                return False
-            updated_product_tags = response.get("update")
-            for tag in updated_product_tags:
-                woo_product_tag = woo_product_tags.filtered(lambda x: x.woo_tag_id == tag.get("id") and x.woo_instance_id == instance)
-                if woo_product_tag:
-                    woo_product_tag.write({"slug": tag.get("slug", "")})
-            _logger.info("Updated {0} tags to Woo of instance {1}".format(len(updated_product_tags), instance.name))
+                                                                        common_log_book_id, False)
+                        continue
+                    if isinstance(tag, dict) and tag.get("slug", "") != woo_product_tag.slug:
+                        woo_product_tag.write({"slug": tag.get("slug", "")})
+                    updated_count += 1
+            _logger.info("Updated {0} tags to Woo of instance {1}".format(updated_count, instance.name))
         return True
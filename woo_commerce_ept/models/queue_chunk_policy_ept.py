@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# See LICENSE file for full copyright and licensing details.
+
+import logging
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger("Woo")
+
+# Chunk sizes used for instances which have no policy for the entity, the sizes used before the
+# policies. Their claim size is shared by all of those instances in a scheduler run, a claim size
+# of 1 takes one queue per run.
+DEFAULT_QUEUE_CHUNK_POLICY = {
+    'order':{'queue_size':50, 'webhook_queue_size':50, 'claim_size':100},
+    'product':{'queue_size':101, 'webhook_queue_size':50, 'claim_size':1},
+    'customer':{'queue_size':101, 'webhook_queue_size':50, 'claim_size':500},
+    'coupon':{'queue_size':100, 'webhook_queue_size':50, 'claim_size':1},
+}
+# Tables and columns of the queues of each entity, used to claim the queues to process.
+QUEUE_TABLES = {
+    'order':{'queue_model':'woo.order.data.queue.ept', 'queue_table':'woo_order_data_queue_ept',
+             'line_table':'woo_order_data_queue_line_ept', 'queue_column':'order_data_queue_id',
+             'instance_column':'instance_id', 'data_column':'order_data',
+             'action_require':True},
+    'product':{'queue_model':'woo.product.data.queue.ept',
+               'queue_table':'woo_product_data_queue_ept',
+               'line_table':'woo_product_data_queue_line_ept', 'queue_column':'queue_id',
+               'instance_column':'woo_instance_id', 'data_column':'woo_synced_data',
+               'action_require':True},
+    'customer':{'queue_model':'woo.customer.data.queue.ept',
+                'queue_table':'woo_customer_data_queue_ept',
+                'line_table':'woo_customer_data_queue_line_ept', 'queue_column':'queue_id',
+                'instance_column':'woo_instance_id', 'data_column':'woo_synced_data',
+                'action_require':True},
+    'coupon':{'queue_model':'woo.coupon.data.queue.ept', 'queue_table':'woo_coupon_data_queue_ept',
+              'line_table':'woo_coupon_data_queue_line_ept',
+              'queue_column':'coupon_data_queue_id', 'instance_column':'woo_instance_id',
+              'data_column':'coupon_data', 'action_require':False},
+}
+# Bounds of the lines per run in adaptive mode and the weight of the last run in the average.
+ADAPTIVE_MIN_CLAIM_SIZE = 10
+ADAPTIVE_MAX_CLAIM_SIZE = 2000
+ADAPTIVE_SMOOTHING = 0.3
+
+
+class WooQueueChunkPolicyEpt(models.Model):
+    """
+    Chunking of the data queues of an instance, per entity.
+    """
+    _name = "woo.queue.chunk.policy.ept"
+    _description = "Woo Queue Chunk Policy"
+    _rec_name = "entity"
+
+    woo_instance_id = fields.Many2one("woo.instance.ept", "Instance", required=True,
+                                      ondelete="cascade")
+    entity = fields.Selection([("order", "Orders"), ("product", "Products"),
+                               ("customer", "Customers"), ("coupon", "Coupons")], required=True)
+    queue_size = fields.Integer("Lines per Queue", default=100,
+                                help="Imported records are split in queues of this size. Webhook "
+                                     "queues are processed once they reach this size.")
+    claim_size = fields.Integer("Lines per Run", default=100,
+                                help="Queues are taken by the scheduler until this number of lines "
+                                     "is reached, at least one queue is taken in each run.")
+    max_claim_bytes = fields.Integer("Max Payload per Run (Bytes)", default=0,
+                                     help="Queues are taken by the scheduler until their data "
+                                          "reaches this size, 0 means no limit.")
+    adaptive = fields.Boolean("Adaptive",
+                              help="If checked, the lines per run are computed from the measured "
+                                   "processing time of a line and the target run time.")
+    target_run_seconds = fields.Integer("Target Run Time (Seconds)", default=60,
+                                        help="Time to spend on the queues of this instance in a "
+                                             "scheduler run. The scheduler processes all instances "
+                                             "in one job, so a run lasts the sum of the targets.")
+    avg_line_seconds = fields.Float("Average Seconds per Line", digits=(16, 4), readonly=True,
+                                    help="Measured by the scheduler runs.")
+
+    _sql_constraints = [("woo_queue_chunk_policy_unique", "unique(woo_instance_id,entity)",
+                         "Only one chunk policy is allowed per instance and entity.")]
+
+    def get_claim_size(self):
+        """
+        Gives the lines per run of the policy, computed from the measured time in adaptive mode.
+        @return: Number of lines.
+        """
+        self.ensure_one()
+        if self.adaptive and self.avg_line_seconds > 0:
+            claim_size = int(self.target_run_seconds / self.avg_line_seconds)
+            return min(max(claim_size, ADAPTIVE_MIN_CLAIM_SIZE), ADAPTIVE_MAX_CLAIM_SIZE)
+        return self.claim_size
+
+    @api.model
+    def get_queue_chunk_policy(self, instance, entity):
+        """
+        Gives the chunking to use for the entity of the instance.
+        @param instance: Woo instance.
+        @param entity: One of order, product, customer or coupon.
+        @return: Dictionary of queue_size, webhook_queue_size, claim_size and max_claim_bytes.
+        """
+        policy = self.search([("woo_instance_id", "=", instance.id), ("entity", "=", entity)],
+                             limit=1)
+        if not policy:
+            return dict(DEFAULT_QUEUE_CHUNK_POLICY[entity], max_claim_bytes=0)
+        queue_size = policy.queue_size or DEFAULT_QUEUE_CHUNK_POLICY[entity]['queue_size']
+        return {'queue_size':queue_size,
+                'webhook_queue_size':queue_size,
+                'claim_size':policy.get_claim_size(),
+                'max_claim_bytes':policy.max_claim_bytes}
+
+    @api.model
+    def claim_queues(self, entity):
+        """
+        Finds the queues to process in this run of the scheduler. The oldest queues having draft
+        lines are taken per instance with a policy until the lines per run or the payload per run
+        of the policy is reached. The instances without a policy share one claim with the default
+        lines per run, so they are not processed more per run than before the policies.
+        @param entity: One of order, product, customer or coupon.
+        @return: Queues ordered by their oldest draft line.
+        """
+        tables = QUEUE_TABLES[entity]
+        instances = self.env["woo.instance.ept"].with_context(active_test=False).search([])
+        if not instances:
+            return self.env[tables['queue_model']]
+        policy_by_instance = {policy.woo_instance_id.id:policy
+                              for policy in self.search([("entity", "=", entity)])}
+        policies = []
+        for instance in instances:
+            policy = policy_by_instance.get(instance.id)
+            if policy:
+                policies.append((instance.id, instance.id, policy.get_claim_size(),
+                                 policy.max_claim_bytes))
+            else:
+                policies.append((instance.id, 0, DEFAULT_QUEUE_CHUNK_POLICY[entity]['claim_size'],
+                                 0))
+        action_require = "AND queue.is_action_require = False" if tables['action_require'] else ""
+        query = """
+            WITH policy(instance_id, claim_group, claim_size, max_claim_bytes) AS (VALUES %s),
+            queue_lines AS (
+                SELECT line.{queue_column} AS queue_id, queue.{instance_column} AS instance_id,
+                       count(*) AS line_count, min(line.create_date) AS first_date,
+                       sum(octet_length(coalesce(line.{data_column}, ''))) AS payload
+                FROM {line_table} line
+                JOIN {queue_table} queue ON queue.id = line.{queue_column}
+                WHERE line.state = 'draft' {action_require}
+                GROUP BY line.{queue_column}, queue.{instance_column}
+            ),
+            claims AS (
+                SELECT queue_lines.queue_id, queue_lines.first_date, policy.claim_size,
+                       policy.max_claim_bytes,
+                       row_number() OVER group_queues AS queue_number,
+                       sum(queue_lines.line_count) OVER group_queues AS claimed_lines,
+                       sum(queue_lines.payload) OVER group_queues AS claimed_bytes
+                FROM queue_lines
+                JOIN policy ON policy.instance_id = queue_lines.instance_id
+                WINDOW group_queues AS (PARTITION BY policy.claim_group
+                                        ORDER BY queue_lines.first_date, queue_lines.queue_id)
+            )
+            SELECT queue_id FROM claims
+            WHERE queue_number = 1 OR (claimed_lines <= claim_size AND
+                                       (max_claim_bytes = 0 OR claimed_bytes <= max_claim_bytes))
+            ORDER BY first_date, queue_id""".format(action_require=action_require, **tables)
+        values = ",".join(self._cr.mogrify("(%s, %s, %s, %s)", policy).decode()
+                          for policy in policies)
+        self._cr.execute(query % values)
+        return self.env[tables['queue_model']].browse([row[0] for row in self._cr.fetchall()])
+
+    @api.model
+    def record_queue_run(self, instance, entity, line_count, seconds):
+        """
+        Updates the average processing time of a line of the adaptive policy of the instance.
+        @param instance: Woo instance.
+        @param entity: One of order, product, customer or coupon.
+        @param line_count: Number of processed lines.
+        @param seconds: Time taken to process the lines.
+        """
+        policy = self.search([("woo_instance_id", "=", instance.id), ("entity", "=", entity),
+                              ("adaptive", "=", True)], limit=1)
+        if not policy or not line_count:
+            return False
+        line_seconds = seconds / line_count
+        if policy.avg_line_seconds:
+            line_seconds = ADAPTIVE_SMOOTHING * line_seconds + \
+                           (1 - ADAPTIVE_SMOOTHING) * policy.avg_line_seconds
+        policy.write({"avg_line_seconds":line_seconds})
+        _logger.info("Average processing time of %s queue lines of instance %s is %.4f seconds." % (
+            entity, instance.name, line_seconds))
+        return True
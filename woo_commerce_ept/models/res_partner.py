@@ -24,7 +24,9 @@ class ResPartner(models.Model):
         model = "woo.instance.ept"
         model_id = common_log_line_obj.get_model_id(model)
         if instance.woo_version in ['wc/v1', 'wc/v2', 'wc/v3']:
-            res = wcapi.get('customers', params={"per_page": 100, 'page': page})
+            params = {"per_page": 100, 'page': page}
+            params.update(instance.get_woo_import_fields_params('customer'))
+            res = wcapi.get('customers', params=params)
         if not isinstance(res, requests.models.Response):
             message = "Import all customers \nresponse is not in proper format :: %s" % (res)
             common_log_line_obj.woo_create_log_line(message, model_id, common_log_id, False)
@@ -56,7 +58,9 @@ class ResPartner(models.Model):
         model_id = common_log_line_obj.get_model_id(self._name)
         woo_process_import_export_obj = process_import_export.browse(self._context.get('import_export_record_id'))
         wcapi = instance.woo_connect()
-        response = wcapi.get('customers', params={"per_page": 100})
+        params = {"per_page": 100}
+        params.update(instance.get_woo_import_fields_params('customer'))
+        response = wcapi.get('customers', params=params)
         customer_queues = []
         if not isinstance(response, requests.models.Response):
             message = "Import Customers \nResponse is not in proper format :: %s" % (response)
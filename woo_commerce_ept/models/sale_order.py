@@ -4,6 +4,7 @@
 import ast
 import logging
 import pytz
+import requests
 from datetime import timedelta
 
 from odoo import models, fields, api, _
@@ -11,6 +12,8 @@ from odoo.exceptions import UserError
 import time
 
 _logger = logging.getLogger("Woo")
+# Number of times the order workflow scheduler retries an order before it leaves it for the user.
+WORKFLOW_MAX_RETRY = 3
 
 class SaleOrder(models.Model):
     """
@@ -75,6 +78,11 @@ class SaleOrder(models.Model):
                                   copy=False, tracking=7)
     is_service_woo_order = fields.Boolean(default=False,
                                           help="It uses to identify that sale order contains all products as service type.")
+    woo_workflow_pending = fields.Boolean(default=False, copy=False, index=True,
+                                          help="The auto workflow of the order is processed by the "
+                                               "order workflow scheduler.")
+    woo_workflow_retry_count = fields.Integer(default=0, copy=False,
+                                              help="Failed attempts of the order workflow scheduler.")
 
     _sql_constraints = [('_woo_sale_order_unique_constraint',
                          'unique(woo_order_id,woo_instance_id,woo_order_number)',
@@ -89,16 +97,18 @@ class SaleOrder(models.Model):
         """
         order_queues_list = order_data_queue_obj = self.env["woo.order.data.queue.ept"]
         bus_bus_obj = self.env['bus.bus']
+        queue_size = self.env["woo.queue.chunk.policy.ept"].get_queue_chunk_policy(
+            woo_instance, "order")["queue_size"]
         while orders_data:
             vals = {"name":name, "instance_id":woo_instance.id, "created_by":created_by}
-            data = orders_data[:50]
+            data = orders_data[:queue_size]
             if data:
                 order_data_queue = order_data_queue_obj.create(vals)
                 order_queues_list += order_data_queue
                 _logger.info("New order queue %s created." % (order_data_queue.name))
                 order_data_queue.create_woo_data_queue_lines(data)
                 _logger.info("Lines added in Order queue %s." % (order_data_queue.name))
-                del orders_data[:50]
+                del orders_data[:queue_size]
                 message = "Order Queue created ", order_data_queue.mapped('name')
                 bus_bus_obj.sendone((self._cr.dbname, 'res.partner', self.env.user.partner_id.id),
                                     {'type':'simple_notification',
@@ -162,6 +172,7 @@ class SaleOrder(models.Model):
         orders_response = False
         status = ",".join(map(str, woo_instance.import_order_status_ids.mapped("status")))
         params["status"] = status
+        params.update(woo_instance.get_woo_import_fields_params('order'))
         wcapi = woo_instance.woo_connect()
         if order_type == 'completed':
             params["status"] = 'completed'
@@ -252,7 +263,7 @@ class SaleOrder(models.Model):
         @author: Maulik Barad on Date 09-Nov-2019.
         @param queue_line: Failed queue line.
         @param message: Cause of failure.
-        @return: Created log line.
+        @return: Created log line, empty while the log lines are buffered.
         """
         log_line_obj = self.env["common.log.lines.ept"]
         log_line_vals = {"message":message,
@@ -262,7 +273,7 @@ class SaleOrder(models.Model):
             queue_line.state = "failed"
         if common_log_book_id:
             log_line_vals.update({"log_book_id":common_log_book_id.id})
-        return log_line_obj.create(log_line_vals)
+        return log_line_obj.log_line_ept(log_line_vals)
 
     def prepare_woo_order_vals(self, order_data, woo_instance, partner, shipping_partner,
                                workflow_config):
@@ -451,12 +462,13 @@ class SaleOrder(models.Model):
         order_lines_list = []
         order_line_data = order_data.get("line_items")
         order_number =  order_data.get('number')
-        woo_instance = common_log_book_id.woo_instance_id
+        woo_instance = sale_order.woo_instance_id
         round = bool(woo_instance.tax_rounding_method == 'round_per_line')
         for order_line in order_line_data:
             taxes = []
             woo_product = self.find_or_create_woo_product(queue_line, order_line,
-                                                          common_log_book_id, is_process_from_queue)
+                                                          common_log_book_id, is_process_from_queue,
+                                                          woo_instance)
             if not woo_product:
                 message = "Product [%s][%s] not found for Order %s" % (order_line.get("sku"), order_line.get("name"), order_number)
                 if is_process_from_queue:
@@ -503,7 +515,7 @@ class SaleOrder(models.Model):
 
     @api.model
     def find_or_create_woo_product(self, queue_line, order_line, common_log_book_id,
-                                   is_process_from_queue):
+                                   is_process_from_queue, woo_instance=False):
         """
         Searches for the product and return it.
         If it is not found and configuration is set to import product, it will collect data and
@@ -511,10 +523,11 @@ class SaleOrder(models.Model):
         @author: Maulik Barad on Date 12-Nov-2019.
         @param queue_line: Order data queue.
         @param order_line: Order line.
+        @param woo_instance: Instance of the order, the log book may not be created yet.
         @return: Woo product if found, otherwise blank object.
         """
         woo_product_template_obj = self.env["woo.product.template.ept"]
-        woo_instance = common_log_book_id.woo_instance_id
+        woo_instance = woo_instance or common_log_book_id.woo_instance_id
 
         # Checks for the product. If found then returns it.
         woo_product_id = order_line.get("variation_id") if order_line.get(
@@ -605,6 +618,8 @@ class SaleOrder(models.Model):
             if commit_count == 5:
                 if is_process_from_queue:
                     queue_line.order_data_queue_id.is_process_queue = True
+                # The failed queue lines are committed with their log lines.
+                self.env["common.log.book.ept"].flush_log_lines_ept()
                 self._cr.commit()
                 commit_count = 0
             if is_process_from_queue:
@@ -679,7 +694,9 @@ class SaleOrder(models.Model):
 
             if order_data.get("coupon_lines"):
                 self.set_coupon_in_sale_order(order_data, sale_order)
-            if sale_order.woo_status == 'completed':
+            if woo_instance.defer_order_workflow:
+                sale_order.woo_workflow_pending = True
+            elif sale_order.woo_status == 'completed':
                 sale_order.auto_workflow_process_id.shipped_order_workflow_ept(sale_order)
             else:
                 sale_order.process_orders_and_invoices_ept()
@@ -924,57 +941,50 @@ class SaleOrder(models.Model):
         if isinstance(woo_instance, int):
             woo_instance = self.env["woo.instance.ept"].browse(woo_instance)
         wcapi = woo_instance.woo_connect()
-        sales_orders = self.search([("warehouse_id", "=", woo_instance.woo_warehouse_id.id),
-                                    ("woo_order_id", "!=", False),
-                                    ("woo_instance_id", "=", woo_instance.id),
-                                    ("state", "=", "sale"),
-                                    ("woo_status", "!=", 'completed')]).ids
-        count = 0
-        for sale_order in sales_orders:
-            sale_order = self.browse(sale_order)
-            if sale_order.updated_in_woo:
+        order_ids = self.get_woo_orders_to_complete(woo_instance)
+        for start in range(0, len(order_ids), 100):
+            sale_orders = self.browse(order_ids[start:start + 100])
+            data = {"update":[{"id":sale_order.woo_order_id, "status":"completed"} for sale_order in
+                              sale_orders]}
+            _logger.info("Start Order update status for %s Orders" % len(sale_orders))
+            response = wcapi.post("orders/batch", data)
+            if not isinstance(response, requests.models.Response) or \
+                    response.status_code not in [200, 201]:
+                message = "Error in updating status of orders %s,  %s" % (
+                    ", ".join(sale_orders.mapped("name")),
+                    response.content if isinstance(response, requests.models.Response) else response)
+                log_line = self.create_woo_log_lines(message)
+                log_line and log_lines.append(log_line.id)
+                continue
+            try:
+                updated_orders = response.json().get("update") or []
+            except Exception as error:
+                message = "Json Error : While updating status of orders %s. \n%s" % (
+                    ", ".join(sale_orders.mapped("name")), error)
+                log_line = self.create_woo_log_lines(message)
+                log_line and log_lines.append(log_line.id)
                 continue
 
-            count += 1
-            if count > 50:
-                self._cr.commit()
-                count = 1
-
-            data = {"status":"completed"}
-            order_completed = False
-            pickings = sale_order.picking_ids.filtered(lambda
-                                                           picking_id:picking_id.location_dest_id.usage == "customer" and picking_id.state != "cancel" and picking_id.updated_in_woo == False)
-            if all(state == 'done' for state in pickings.mapped("state")):
-                _logger.info("Start Order update status for Order : %s" % sale_order.name)
-                response = wcapi.put("orders/%s" % sale_order.woo_order_id, data)
-
-                if response.status_code not in [200, 201]:
-                    _logger.info("Could not update status of Order %s." % sale_order.woo_order_id)
-                    message = "Error in updating status of order %s,  %s" % (
-                        sale_order.name, response.content)
-                    log_line = self.create_woo_log_lines(message)
-                    log_line and log_lines.append(log_line.id)
-                    continue
-                pickings.write({"updated_in_woo":True})
-                order_completed = True
-                _logger.info("Done Order update status for Order : %s" % sale_order.name)
-
-            """When all products are service type."""
-            if not pickings and sale_order.state == "sale":
-                _logger.info("Start Order update status for Order : %s" % sale_order.name)
-                response = wcapi.put("orders/%s" % sale_order.woo_order_id, data)
-
-                if response.status_code not in [200, 201]:
+            completed_orders = self.browse()
+            # The batch response keeps the order of the request.
+            for sale_order, updated_order in zip(sale_orders, updated_orders):
+                error = isinstance(updated_order, dict) and updated_order.get("error")
+                if error or not isinstance(updated_order, dict):
                     _logger.info("Could not update status of Order %s." % sale_order.woo_order_id)
                     message = "Error in updating status of order %s,  %s" % (
-                        sale_order.name, response.content)
+                        sale_order.name, error and error.get("message") or updated_order)
                     log_line = self.create_woo_log_lines(message)
                     log_line and log_lines.append(log_line.id)
                     continue
-                order_completed = True
-                _logger.info("Done Order update status for Order : %s" % sale_order.name)
-            if order_completed:
-                sale_order.woo_status = "completed"
+                completed_orders += sale_order
+            if completed_orders:
+                self.env["stock.picking"].search(
+                        [("group_id", "in", completed_orders.procurement_group_id.ids),
+                         ("location_dest_id.usage", "=", "customer"), ("state", "!=", "cancel"),
+                         ("updated_in_woo", "=", False)]).write({"updated_in_woo":True})
+                completed_orders.write({"woo_status":"completed"})
+            _logger.info("Done Order update status for %s Orders" % len(completed_orders))
+            self._cr.commit()
 
         if log_lines:
             common_log_book_obj.create({"type":"export",
@@ -984,6 +994,101 @@ class SaleOrder(models.Model):
                                         "active":True})
         return True
 
+    def get_woo_orders_to_complete(self, woo_instance):
+        """
+        Finds the confirmed orders of the instance, which are not completed in WooCommerce and all
+        their delivery orders not updated in WooCommerce are done. Orders without pickings are
+        included as all their products are service type.
+        @param woo_instance: Woo Instance.
+        @return: List of order ids.
+        """
+        query = """
+            SELECT so.id FROM sale_order so
+            WHERE so.woo_instance_id = %(instance_id)s AND so.warehouse_id = %(warehouse_id)s
+                AND so.woo_order_id IS NOT NULL AND so.state = 'sale'
+                AND (so.woo_status IS NULL OR so.woo_status != 'completed')
+                AND NOT EXISTS (
+                    SELECT 1 FROM stock_picking sp
+                    INNER JOIN stock_location sl ON sl.id = sp.location_dest_id AND sl.usage = 'customer'
+                    WHERE sp.group_id = so.procurement_group_id AND sp.state NOT IN ('done', 'cancel')
+                        AND sp.updated_in_woo IS NOT TRUE)
+                AND (EXISTS (
+                    SELECT 1 FROM stock_picking sp
+                    INNER JOIN stock_location sl ON sl.id = sp.location_dest_id AND sl.usage = 'customer'
+                    WHERE sp.group_id = so.procurement_group_id AND sp.state = 'done'
+                        AND sp.updated_in_woo IS NOT TRUE)
+                OR NOT EXISTS (
+                    SELECT 1 FROM stock_picking sp
+                    WHERE sp.group_id = so.procurement_group_id AND sp.state != 'cancel'))
+            ORDER BY so.id"""
+        self._cr.execute(query, {"instance_id":woo_instance.id,
+                                 "warehouse_id":woo_instance.woo_warehouse_id.id})
+        return [row[0] for row in self._cr.fetchall()]
+
+    @api.model
+    def process_woo_order_workflow_backlog(self):
+        """
+        Runs the auto workflow of the orders, which are left for the order workflow scheduler while
+        importing. Orders of an instance are taken in batches of its order workflow batch size.
+        """
+        for woo_instance in self.env["woo.instance.ept"].search([("defer_order_workflow", "=", True)]):
+            orders = self.search([("woo_instance_id", "=", woo_instance.id),
+                                  ("woo_workflow_pending", "=", True),
+                                  ("woo_workflow_retry_count", "<", WORKFLOW_MAX_RETRY)],
+                                 order="id", limit=woo_instance.order_workflow_batch_size or 100)
+            if not orders:
+                continue
+            start = time.time()
+            completed_orders = orders.filtered(lambda x:x.woo_status == "completed")
+            for workflow in completed_orders.auto_workflow_process_id:
+                self.run_woo_order_workflow(completed_orders.filtered(
+                        lambda x:x.auto_workflow_process_id == workflow),
+                        lambda batch:workflow.shipped_order_workflow_ept(batch))
+            self.run_woo_order_workflow(orders - completed_orders,
+                                        lambda batch:batch.process_orders_and_invoices_ept())
+            _logger.info("Processed workflow of %s orders of instance %s in %s seconds." % (
+                len(orders), woo_instance.name, time.time() - start))
+        return True
+
+    def run_woo_order_workflow(self, orders, workflow_method):
+        """
+        Runs the workflow method for all the orders together. When it fails, the orders are retried
+        one by one, so only the failing orders are counted for retry.
+        @param orders: Orders to process.
+        @param workflow_method: Method which processes the given orders.
+        """
+        if not orders:
+            return True
+        try:
+            with self._cr.savepoint():
+                workflow_method(orders)
+            orders.write({"woo_workflow_pending":False})
+            self._cr.commit()
+            return True
+        except Exception:
+            _logger.exception("Order workflow failed for the batch of %s orders, processing orders "
+                              "one by one.", len(orders))
+        for order in orders:
+            try:
+                with self._cr.savepoint():
+                    workflow_method(order)
+                order.write({"woo_workflow_pending":False})
+            except Exception as error:
+                _logger.exception("Order workflow failed for order %s.", order.name)
+                retry_count = order.woo_workflow_retry_count + 1
+                order.write({"woo_workflow_retry_count":retry_count})
+                if retry_count >= WORKFLOW_MAX_RETRY:
+                    message = "Auto workflow of order %s failed %s times, it will not be " \
+                              "retried.\n%s" % (order.name, retry_count, error)
+                    log_line = order.create_woo_log_lines(message)
+                    self.env["common.log.book.ept"].create({"type":"import",
+                                                            "module":"woocommerce_ept",
+                                                            "woo_instance_id":order.woo_instance_id.id,
+                                                            "log_lines":[(6, 0, log_line.ids)],
+                                                            "active":True})
+            self._cr.commit()
+        return True
+
     def cancel_in_woo(self):
         """
         This method used to open a wizard to cancel order in WooCommerce.
@@ -1029,7 +1134,9 @@ class SaleOrder(models.Model):
             order_queue and _logger.info(
                 "Added woo order number : %s in existing order queue webhook queue %s" % (
                 order_data.get('number'), order_queue.display_name))
-            if order_queue and len(order_queue.order_data_queue_line_ids) >= 50:
+            queue_size = self.env["woo.queue.chunk.policy.ept"].get_queue_chunk_policy(
+                instance, "order")["webhook_queue_size"]
+            if order_queue and len(order_queue.order_data_queue_line_ids) >= queue_size:
                 order_queue.order_data_queue_line_ids.process_order_queue_line()
             elif not order_queue:
                 order_data_queue = self.create_woo_order_data_queue(instance, [order_data], '',
@@ -1058,94 +1165,145 @@ class SaleOrder(models.Model):
     def update_woo_order(self, queue_lines, log_book):
         """
         This method will update order as per its status got from WooCommerce.
+        All the orders of the queue lines are searched together and the lines are grouped by the
+        received status, so the orders of a status are cancelled, confirmed and written together.
         @author: Maulik Barad on Date 31-Dec-2019.
-        @param queue_line: Order Data Queue Line.
+        @param queue_lines: Order Data Queue Lines.
         @param log_book: Common Log Book.
-        @return: Updated Sale order.
+        @return: Updated Sale orders.
         """
-        orders = []
-        sale_order_obj = self.env["sale.order"]
+        partner_obj = self.env['res.partner']
+        queue_lines.write({"processed_at":fields.Datetime.now()})
+        orders_data = {}
         for queue_line in queue_lines:
-            message = ""
-            woo_instance = queue_line.instance_id
             order_data = ast.literal_eval(queue_line.order_data)
-            queue_line.processed_at = fields.Datetime.now()
+            # When an order comes more than once, the latest status is the one to apply.
+            orders_data.update({(queue_line.instance_id.id, str(order_data.get("id"))):(
+                queue_line, order_data)})
+        superseded_lines = queue_lines - self.env[queue_lines._name].browse(
+                [queue_line.id for queue_line, _order_data in orders_data.values()])
+        superseded_lines.write({"state":"done"})
+
+        orders_by_key = {}
+        for order in self.search([("woo_instance_id", "in", queue_lines.instance_id.ids),
+                                  ("woo_order_id", "in", [key[1] for key in orders_data])]):
+            orders_by_key.setdefault((order.woo_instance_id.id, order.woo_order_id), order)
+
+        missing_lines = queue_lines.browse()
+        lines_by_status = {}
+        # The shipping address is resolved once per customer and address of the chunk.
+        shipping_partners = {}
+        for key, (queue_line, order_data) in orders_data.items():
+            woo_instance = queue_line.instance_id
             woo_status = order_data.get("status")
-            partner_obj = self.env['res.partner']
-            order = self.search([("woo_instance_id", "=", woo_instance.id),
-                                 ("woo_order_id", "=", order_data.get("id"))])
+            order = orders_by_key.get(key)
             if not order:
                 # Below uses for any order queue, not process due to concurrent issues while webhook process order queue.
                 if woo_status in woo_instance.import_order_status_ids.mapped("status") + [
                     'completed']:
-                    sale_order_obj.create_woo_orders(queue_line, log_book)
+                    missing_lines += queue_line
                 else:
                     _logger.info(
                             "Woo Order %s is not created in Odoo because as received order status %s is not configured in import order status configuration" % (
                             order_data.get('number'), order_data.get('status')))
-                queue_line.state = "done"
-                return True
-            picking = order and order.picking_ids.filtered(
+                    queue_line.state = "done"
+                continue
+            picking = order.picking_ids.filtered(
                     lambda x:x.picking_type_code == 'outgoing' and x.state not in ['cancel',
                                                                                    'done'])
             if picking and woo_status != "cancelled":
                 parent_partner = order.partner_invoice_id.parent_id or False
                 shipping_partner = order.partner_shipping_id
-                updated_shipping_partner = parent_partner and partner_obj.woo_create_or_update_customer(
-                        order_data.get("shipping"), woo_instance, parent_partner,
-                        'delivery') or False
+                updated_shipping_partner = False
+                if parent_partner:
+                    shipping_key = (woo_instance.id, parent_partner.id,
+                                    str(sorted((order_data.get("shipping") or {}).items())))
+                    if shipping_key not in shipping_partners:
+                        shipping_partners[shipping_key] = partner_obj.woo_create_or_update_customer(
+                                order_data.get("shipping"), woo_instance, parent_partner,
+                                'delivery') or False
+                    updated_shipping_partner = shipping_partners[shipping_key]
                 if updated_shipping_partner and updated_shipping_partner.id != shipping_partner.id:
                     order.write({'partner_shipping_id':updated_shipping_partner.id})
                     picking.write({'partner_id':updated_shipping_partner.id})
+            lines_by_status.setdefault(woo_status, []).append((queue_line, order_data, order))
+
+        if missing_lines:
+            self.create_woo_orders(missing_lines, log_book)
+            missing_lines.filtered(lambda x:x.state != "failed").write({"state":"done"})
 
-            if woo_status == "cancelled" and order.state != "cancel":
-                cancelled = order.cancel_woo_order()
-                if not cancelled:
-                    message = "System can not cancel the order {0} as one of the picking is in the done state.".format(
+        orders = []
+        for woo_status, status_lines in lines_by_status.items():
+            messages = self.update_woo_orders_by_status(woo_status, status_lines)
+            updated_orders = self.browse()
+            done_lines = queue_lines.browse()
+            for queue_line, _order_data, order in status_lines:
+                message = messages.get(queue_line.id)
+                if message:
+                    order.create_woo_log_lines(message, log_book, queue_line)
+                else:
+                    done_lines += queue_line
+                    updated_orders += order
+                orders.append(order)
+            done_lines.write({"state":"done"})
+            updated_orders.write({"woo_status":woo_status})
+        return orders
+
+    def update_woo_orders_by_status(self, woo_status, status_lines):
+        """
+        Applies the status received from WooCommerce to the orders.
+        @param woo_status: Status of the orders in WooCommerce.
+        @param status_lines: List of tuple of queue line, order data and order.
+        @return: Dictionary of error messages by queue line id.
+        """
+        messages = {}
+        if woo_status == "cancelled":
+            to_cancel = self.browse([order.id for _queue_line, _order_data, order in status_lines]).filtered(
+                    lambda x:x.state != "cancel")
+            to_cancel and to_cancel.cancel_woo_order()
+            for queue_line, order_data, order in status_lines:
+                if order.state != "cancel":
+                    messages[queue_line.id] = "System can not cancel the order {0} as one of the picking is in the done state.".format(
                             order.name)
-            elif woo_status == "refunded":
-                refunded = order.create_woo_refund(order_data.get("refunds"), woo_instance)
+        elif woo_status == "refunded":
+            for queue_line, order_data, order in status_lines:
+                refunded = order.create_woo_refund(order_data.get("refunds"), queue_line.instance_id)
                 if refunded[0] == 4:
-                    message = "- Refund can only be generated if it's related order " \
+                    messages[queue_line.id] = "- Refund can only be generated if it's related order " \
                               "invoice is found.\n- For order [%s], system could not find the " \
                               "related order invoice. " % (order_data.get('number'))
                 elif refunded[0] == 3:
-                    message = "- Refund can only be generated if it's related order " \
+                    messages[queue_line.id] = "- Refund can only be generated if it's related order " \
                               "invoice is in 'Post' status.\n- For order [%s], system found " \
                               "related invoice but it is not in 'Post' status." % (
                                   order_data.get('number'))
                 elif refunded[0] == 2:
-                    message = "- Partial refund is received from Woocommerce for order [%s].\n " \
+                    messages[queue_line.id] = "- Partial refund is received from Woocommerce for order [%s].\n " \
                               "- System do not process partial refunds.\n" \
                               "- Either create partial refund manually in Odoo or do full " \
                               "refund in Woocommerce." % (order_data.get('number'))
-            elif woo_status == "completed":
+        elif woo_status == "completed":
+            orders = self.browse([order.id for _queue_line, _order_data, order in status_lines])
+            # The orders are confirmed together, so complete_woo_order only validates the pickings.
+            to_confirm = orders.filtered(lambda x:x.state != "sale")
+            to_confirm and to_confirm.action_confirm()
+            for queue_line, order_data, order in status_lines:
                 completed = order.complete_woo_order()
-                if isinstance(completed, bool) and not completed:
-                    message = "There is not enough stock to complete Delivery for order [" \
-                              "%s]" % order_data.get('number')
-                elif not completed:
-                    message = "There is not enough stock to complete Delivery for order [" \
+                if not completed:
+                    messages[queue_line.id] = "There is not enough stock to complete Delivery for order [" \
                               "%s]" % order_data.get('number')
-
-            if message:
-                order.create_woo_log_lines(message, log_book, queue_line)
-            else:
-                queue_line.state = "done"
-                order.woo_status = woo_status
-            orders.append(order)
-
-        return orders
+        return messages
 
     def cancel_woo_order(self):
         """
-        Cancelled the sale order when it is cancelled in WooCommerce.
+        Cancelled the sale orders when they are cancelled in WooCommerce.
+        The orders having a done picking are not cancelled, the others are cancelled together.
         @author: Maulik Barad on Date 31-Dec-2019.
+        @return: True when all the orders are cancelled.
         """
-        if "done" in self.picking_ids.mapped("state"):
-            return False
-        self.action_cancel()
-        return True
+        to_cancel = self.filtered(lambda x:"done" not in x.picking_ids.mapped("state"))
+        to_cancel and to_cancel.action_cancel()
+        return to_cancel == self
 
     def complete_woo_order(self):
         """
@@ -1272,6 +1430,20 @@ class SaleOrder(models.Model):
                 self.paid_invoice_ept(invoices)
         return True
 
+    def get_orders_to_invoice_ept(self, work_flow_process_record):
+        """
+        Skips the pending Woo orders from the invoicing of the auto workflow.
+        """
+        orders = super(SaleOrder, self).get_orders_to_invoice_ept(work_flow_process_record)
+        return orders.filtered(lambda x:not (x.woo_instance_id and x.woo_status == 'pending'))
+
+    def get_orders_to_pay_ept(self, work_flow_process_record):
+        """
+        Skips the on-hold Woo orders from the payment of the auto workflow.
+        """
+        orders = super(SaleOrder, self).get_orders_to_pay_ept(work_flow_process_record)
+        return orders.filtered(lambda x:not (x.woo_instance_id and x.woo_status == 'on-hold'))
+
 class SaleOrderLine(models.Model):
     _inherit = "sale.order.line"
 
@@ -249,12 +249,23 @@ class ResConfigSettings(models.TransientModel):
                                                  help="This is the date when last unshipped order you have imported in "
                                                       "Odoo.\nSystem will set this date in 'From date' while import "
                                                       "order process.")
+    woo_last_product_import_date = fields.Datetime(string="Last Product Import Date",
+                                                   help="Products modified after this date are imported by the "
+                                                        "incremental product import.\nClear it to import all the "
+                                                        "products again with the next incremental import.")
     woo_sales_team_id = fields.Many2one('crm.team',
                                         help="Choose Sales Team that handles the order you import.")
     # woo_global_channel_id = fields.Many2one('global.channel.ept')
     woo_custom_order_prefix = fields.Boolean("Use Odoo Default Sequence in Woo Orders?",
                                              help="If checked,Then use default sequence of odoo while create sale order.")
     woo_order_prefix = fields.Char(size=10, help="Custom order prefix for Woocommerce orders.")
+    woo_defer_order_workflow = fields.Boolean("Process Order Workflow in Background?",
+                                              help="If checked, imported orders are confirmed, "
+                                                   "invoiced and shipped by a scheduler instead of "
+                                                   "while the order is created.")
+    woo_order_workflow_batch_size = fields.Integer("Order Workflow Batch Size", default=100,
+                                                   help="Number of orders processed by the order "
+                                                        "workflow scheduler per run.")
     woo_apply_tax = fields.Selection(
             [("odoo_tax", "Odoo Default Tax"), ("create_woo_tax", "Create new tax if not found")],
             default="create_woo_tax", copy=False,
@@ -338,12 +349,15 @@ class ResConfigSettings(models.TransientModel):
 
             self.woo_import_order_status_ids = instance.import_order_status_ids.ids
             self.woo_last_order_import_date = instance.last_order_import_date
+            self.woo_last_product_import_date = instance.last_product_import_date
             self.last_inventory_update_time = instance.last_inventory_update_time
             self.woo_sales_team_id = instance.sales_team_id
             # self.woo_global_channel_id = instance.global_channel_id
             self.woo_auto_import_product = instance.auto_import_product
             self.woo_custom_order_prefix = instance.custom_order_prefix
             self.woo_order_prefix = instance.order_prefix
+            self.woo_defer_order_workflow = instance.defer_order_workflow
+            self.woo_order_workflow_batch_size = instance.order_workflow_batch_size
             self.woo_apply_tax = instance.apply_tax
             self.woo_invoice_tax_account_id = instance.invoice_tax_account_id
             self.woo_credit_note_tax_account_id = instance.credit_note_tax_account_id
@@ -379,12 +393,15 @@ class ResConfigSettings(models.TransientModel):
 
             values['import_order_status_ids'] = [(6, 0, self.woo_import_order_status_ids.ids)]
             values['last_order_import_date'] = self.woo_last_order_import_date or False
+            values['last_product_import_date'] = self.woo_last_product_import_date or False
             values['last_inventory_update_time'] = self.last_inventory_update_time or False
             values['sales_team_id'] = self.woo_sales_team_id or False
             # values['global_channel_id'] = self.woo_global_channel_id or False
             values['auto_import_product'] = self.woo_auto_import_product or False
             values['custom_order_prefix'] = self.woo_custom_order_prefix or False
             values['order_prefix'] = self.woo_order_prefix or False
+            values['defer_order_workflow'] = self.woo_defer_order_workflow
+            values['order_workflow_batch_size'] = self.woo_order_workflow_batch_size or 100
             values["apply_tax"] = self.woo_apply_tax
             values["invoice_tax_account_id"] = self.woo_invoice_tax_account_id
             values["credit_note_tax_account_id"] = self.woo_credit_note_tax_account_id
@@ -6,7 +6,7 @@ import logging
 
 from csv import DictWriter
 from datetime import datetime
-from io import StringIO
+from tempfile import TemporaryFile
 
 from odoo import models, fields, _
 from odoo.exceptions import ValidationError, UserError
@@ -52,68 +52,56 @@ class PrepareProductForExport(models.TransientModel):
             return self.export_csv_file(product_templates)
 
     def export_direct_in_woo(self, product_templates):
-        """ This method use to create/update Woo layer products.
+        """ This method use to create/update Woo layer products. Existing layer records are searched
+            once for all the products and missing ones are created with one create call.
             @param : self, product_templates
             @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 14 September 2020 .
             Task_id: 165896
         """
-        woo_template_id = False
         woo_template_obj = self.env["woo.product.template.ept"]
         woo_product_obj = self.env["woo.product.product.ept"]
         ir_config_parameter_obj = self.env["ir.config_parameter"]
         woo_category_dict = {}
-        variants = product_templates.product_variant_ids
         woo_instance = self.woo_instance_id
+        set_sales_description = ir_config_parameter_obj.sudo().get_param(
+                "woo_commerce_ept.set_sales_description")
+        variants = product_templates.product_variant_ids.filtered(lambda variant:variant.default_code)
+        product_templates = variants.product_tmpl_id
+        if not product_templates:
+            return True
 
-        for variant in variants:
-            if not variant.default_code:
-                continue
-            product_template = variant.product_tmpl_id
-
-            if product_template.attribute_line_ids and len(
-                    product_template.attribute_line_ids.filtered(
-                            lambda x:x.attribute_id.create_variant == "always")) > 0:
-                product_type = 'variable'
-            else:
-                product_type = 'simple'
-
-            woo_template = woo_template_obj.search([
-                ("woo_instance_id", "=", woo_instance.id),
-                ("product_tmpl_id", "=", product_template.id)])
-
-            woo_template_vals = (
-                {
-                    'product_tmpl_id':product_template.id,
-                    'woo_instance_id':woo_instance.id,
-                    'name':product_template.name,
-                    'woo_product_type':product_type
-                })
-
-            if ir_config_parameter_obj.sudo().get_param(
-                    "woo_commerce_ept.set_sales_description"):
-                woo_template_vals.update(
-                        {"woo_description":product_template.description_sale,
-                         "woo_short_description":product_template.description})
+        woo_categories = {}
+        for category in product_templates.categ_id:
+            self.create_categ_in_woo(category, woo_instance.id, woo_category_dict, ctg_list=[])
+            woo_categories.update({category.id:self.update_category_info(category, woo_instance.id)})
 
+        woo_templates = {woo_template.product_tmpl_id.id:woo_template for woo_template in
+                         woo_template_obj.search([("woo_instance_id", "=", woo_instance.id),
+                                                  ("product_tmpl_id", "in", product_templates.ids)])}
+        woo_template_vals_list = []
+        for product_template in product_templates:
+            woo_template_vals = self.prepare_woo_template_vals(product_template, woo_instance,
+                                                               set_sales_description)
             if product_template.categ_id:
-                self.create_categ_in_woo(product_template.categ_id, woo_instance.id, woo_category_dict)
-                woo_categ_id = self.update_category_info(product_template.categ_id, woo_instance.id)
-                woo_template_vals.update({'woo_categ_ids':[(6, 0, woo_categ_id.ids)]})
-
-            if not woo_template:
-                woo_template = woo_template_obj.create(woo_template_vals)
-                woo_template_id = woo_template.id
+                woo_template_vals.update(
+                        {'woo_categ_ids':[(6, 0, woo_categories[product_template.categ_id.id].ids)]})
+            woo_template = woo_templates.get(product_template.id)
+            if woo_template:
+                woo_template.write(woo_template_vals)
             else:
-                if woo_template_id != woo_template.id:
-                    woo_template.write(woo_template_vals)
-                    woo_template_id = woo_template.id
+                woo_template_vals_list.append(woo_template_vals)
+        for woo_template in woo_template_obj.create(woo_template_vals_list):
+            woo_templates.update({woo_template.product_tmpl_id.id:woo_template})
 
-            # For add template images in layer.
-            self.create_woo_template_images(woo_template)
-
-            woo_variant = woo_product_obj.search([('woo_instance_id', '=', woo_instance.id),
-                                                  ('product_id', '=', variant.id),
-                                                  ('woo_template_id', '=', woo_template.id)])
+        woo_template_ids = [woo_template.id for woo_template in woo_templates.values()]
+        existing_woo_variants = woo_product_obj.search([('woo_instance_id', '=', woo_instance.id),
+                                                        ('product_id', 'in', variants.ids),
+                                                        ('woo_template_id', 'in', woo_template_ids)])
+        woo_variants = {(woo_variant.product_id.id, woo_variant.woo_template_id.id):woo_variant
+                        for woo_variant in existing_woo_variants}
+        woo_variant_vals_list = []
+        for variant in variants:
+            woo_template = woo_templates[variant.product_tmpl_id.id]
             woo_variant_vals = ({
                 'woo_instance_id':woo_instance.id,
                 'product_id':variant.id,
@@ -121,16 +109,44 @@ class PrepareProductForExport(models.TransientModel):
                 'default_code':variant.default_code,
                 'name':variant.name,
             })
+            woo_variant = woo_variants.get((variant.id, woo_template.id))
             if not woo_variant:
-                woo_variant = woo_product_obj.create(woo_variant_vals)
-            else:
+                woo_variant_vals_list.append(woo_variant_vals)
+            elif woo_variant.default_code != variant.default_code or woo_variant.name != variant.name:
                 woo_variant.write(woo_variant_vals)
+        new_woo_variants = woo_product_obj.create(woo_variant_vals_list)
 
-            # For adding all odoo images into Woo layer.
-            self.create_woo_variant_images(woo_template_id, woo_variant)
-
+        # For adding all odoo images into Woo layer.
+        self.create_woo_layer_images(woo_template_obj.browse(woo_template_ids),
+                                     existing_woo_variants + new_woo_variants)
         return True
 
+    def prepare_woo_template_vals(self, product_template, woo_instance, set_sales_description):
+        """ This method use to prepare the vals of the Woo layer template.
+            @param : self, product_template, woo_instance, set_sales_description
+            @return: woo_template_vals
+        """
+        if product_template.attribute_line_ids and len(
+                product_template.attribute_line_ids.filtered(
+                        lambda x:x.attribute_id.create_variant == "always")) > 0:
+            product_type = 'variable'
+        else:
+            product_type = 'simple'
+
+        woo_template_vals = (
+            {
+                'product_tmpl_id':product_template.id,
+                'woo_instance_id':woo_instance.id,
+                'name':product_template.name,
+                'woo_product_type':product_type
+            })
+
+        if set_sales_description:
+            woo_template_vals.update(
+                    {"woo_description":product_template.description_sale,
+                     "woo_short_description":product_template.description})
+        return woo_template_vals
+
     def export_csv_file(self, odoo_template_ids):
         """
         This method is used for export the odoo products in csv file.
@@ -139,43 +155,53 @@ class PrepareProductForExport(models.TransientModel):
         @return: CSV file.
         Migration done by Haresh Mori @ Emipro on date 14 September 2020 .
         """
-        buffer = StringIO()
         delimiter = ','
         field_names = ['template_name', 'product_name', 'product_default_code',
                        'woo_product_default_code', 'product_description', 'sale_description',
                        'PRODUCT_TEMPLATE_ID', 'PRODUCT_ID', 'CATEGORY_ID']
-        csv_writer = DictWriter(buffer, field_names, delimiter=delimiter)
-        csv_writer.writer.writerow(field_names)
-        rows = []
-        for odoo_template in odoo_template_ids:
-            if len(odoo_template.product_variant_ids.ids) == 1 and not odoo_template.default_code:
-                continue
-            position = 0
-            for product in odoo_template.product_variant_ids.filtered(
-                    lambda variant:variant.default_code != False):
-                row = self.prepare_row_for_csv(odoo_template, product, position)
-                rows.append(row)
-                position = 1
-        if not rows:
-            raise UserError(_('No data found to be exported.\n\nPossible Reasons:\n   - SKU(s) are not set properly.'))
-        csv_writer.writerows(rows)
-        buffer.seek(0)
-        file_data = buffer.read().encode()
-        self.write({
-            'csv_data':base64.encodebytes(file_data),
-            'file_name':'export_product_',
-        })
+        self.file_name = 'export_product_'
+        # Rows are written to a temporary file one by one instead of building them in memory, the
+        # file is then stored as an attachment with its raw bytes, without a base64 copy.
+        with TemporaryFile('w+', encoding='utf-8', newline='') as csv_file:
+            csv_writer = DictWriter(csv_file, field_names, delimiter=delimiter)
+            csv_writer.writer.writerow(field_names)
+            has_rows = False
+            for row in self.prepare_rows_for_csv(odoo_template_ids):
+                csv_writer.writerow(row)
+                has_rows = True
+            if not has_rows:
+                raise UserError(_('No data found to be exported.\n\nPossible Reasons:\n   - SKU(s) are not set properly.'))
+            csv_file.seek(0)
+            attachment = self.env['ir.attachment'].create({
+                'name':"%s%s.csv" % (self.file_name,
+                                     datetime.now().strftime("%d/%m/%Y:%H:%M:%S")),
+                'raw':csv_file.buffer.read(),
+                'mimetype':'text/csv',
+                'res_model':self._name,
+                'res_id':self.id,
+            })
 
         return {
             'name':'CSV',
             'type':'ir.actions.act_url',
-            'url':"web/content/?model=woo.prepare.product.for.export.ept&id=" + str(
-                    self.id) + "&filename_field=file_name&field=csv_data&download=true&filename"
-                               "=%s.csv" % (
-                          self.file_name + str(datetime.now().strftime("%d/%m/%Y:%H:%M:%S"))),
+            'url':"web/content/%s?download=true" % (attachment.id),
             'target':'self',
         }
 
+    def prepare_rows_for_csv(self, odoo_templates):
+        """ This method use to generate the rows of the templates for export data in CSV file.
+            @param : self, odoo_templates
+            @return: Generator of rows
+        """
+        for odoo_template in odoo_templates:
+            if len(odoo_template.product_variant_ids.ids) == 1 and not odoo_template.default_code:
+                continue
+            position = 0
+            for product in odoo_template.product_variant_ids.filtered(
+                    lambda variant:variant.default_code != False):
+                yield self.prepare_row_for_csv(odoo_template, product, position)
+                position = 1
+
     def prepare_row_for_csv(self, odoo_template, product, position):
         """ This method use to prepare a template data row for export data in CSV file.
             @param : self, odoo_template, product, position
@@ -301,6 +327,62 @@ class PrepareProductForExport(models.TransientModel):
             woo_product_image_obj.create(woo_product_image_list)
 
 
+    def create_woo_layer_images(self, woo_templates, woo_variants):
+        """ This method is use to create the template and variant images in Woo layer, existing images
+            are searched once for all the templates.
+            @param : self, woo_templates, woo_variants
+        """
+        woo_product_image_obj = self.env["woo.product.image.ept"]
+        existing_images = {}
+        for woo_product_image in woo_product_image_obj.search(
+                [("woo_template_id", "in", woo_templates.ids)]):
+            key = (woo_product_image.woo_template_id.id, woo_product_image.odoo_image_id.id)
+            existing_images.setdefault(key, woo_product_image_obj)
+            existing_images[key] += woo_product_image
+
+        woo_product_image_list = []
+        for woo_template in woo_templates:
+            for odoo_image in woo_template.product_tmpl_id.ept_image_ids.filtered(
+                    lambda x:not x.product_id):
+                woo_product_images = existing_images.get((woo_template.id, odoo_image.id))
+                if woo_product_images:
+                    self.update_woo_image_mime_type(woo_product_images)
+                else:
+                    woo_product_image_list.append({
+                        "odoo_image_id":odoo_image.id,
+                        "woo_template_id":woo_template.id,
+                        "image_mime_type":guess_mimetype(base64.b64decode(odoo_image.image))
+                    })
+
+        for woo_variant in woo_variants:
+            odoo_image = woo_variant.product_id.ept_image_ids[:1]
+            if not odoo_image:
+                continue
+            woo_template = woo_variant.woo_template_id
+            woo_product_images = existing_images.get((woo_template.id, odoo_image.id),
+                                                     woo_product_image_obj).filtered(
+                    lambda x:x.woo_variant_id == woo_variant)
+            if woo_product_images:
+                self.update_woo_image_mime_type(woo_product_images)
+            else:
+                woo_product_image_list.append({
+                    "odoo_image_id":odoo_image.id,
+                    "woo_variant_id":woo_variant.id,
+                    "woo_template_id":woo_template.id,
+                    "image_mime_type":guess_mimetype(base64.b64decode(odoo_image.image))
+                })
+        if woo_product_image_list:
+            woo_product_image_obj.create(woo_product_image_list)
+
+    def update_woo_image_mime_type(self, woo_product_images):
+        """ This method is use to update the mime type of images in Woo layer, when it is changed.
+            @param : self, woo_product_images
+        """
+        for woo_product_image in woo_product_images:
+            mimetype = guess_mimetype(base64.b64decode(woo_product_image.image))
+            if woo_product_image.image_mime_type != mimetype:
+                woo_product_image.write({'image_mime_type':mimetype})
+
     def create_woo_variant_images(self, woo_template, woo_variant):
         """ This method is use to create variant images in Woo layer.
             @param : self,woo_template
@@ -6,7 +6,7 @@ import base64
 import logging
 import csv
 from datetime import datetime, timedelta
-from io import StringIO, BytesIO
+from io import StringIO
 
 from odoo import api, models, fields, _
 from odoo.exceptions import ValidationError, UserError
@@ -58,7 +58,9 @@ class WooProcessImportExport(models.TransientModel):
     woo_basic_detail = fields.Boolean(string="Basic Detail", default=True)
     export_stock_from = fields.Datetime(help="It is used for exporting stock from Odoo to Woo.")
     import_products_method = fields.Selection([("import_all", "Import all"),
-                                               ("new_and_updated", "New and Updated Only")],
+                                               ("new_and_updated", "New and Updated Only"),
+                                               ("modified_since_last_import",
+                                                "Modified Since Last Import")],
                                               "Products to Import",
                                               default="new_and_updated")
     choose_file = fields.Binary(filters="*.csv", help="Select CSV file to upload.")
@@ -380,6 +382,10 @@ class WooProcessImportExport(models.TransientModel):
         woo_common_log_obj = self.env["common.log.book.ept"]
         woo_instance_id = self.woo_instance_id
         import_all = True if self.import_products_method == "import_all" else False
+        modified_after = False
+        if self.import_products_method == "modified_since_last_import":
+            modified_after = woo_instance_id.last_product_import_date
+        import_start_date = fields.Datetime.now()
 
         woo_common_log_id = woo_common_log_obj.create(
                 {
@@ -394,8 +400,12 @@ class WooProcessImportExport(models.TransientModel):
         product_queues = woo_products_template_obj.with_context(
                 import_export_record=self.id).get_products_from_woo_v1_v2_v3(woo_instance_id,
                                                                              woo_common_log_id,
-                                                                             import_all=import_all)
+                                                                             import_all=import_all,
+                                                                             modified_after=modified_after)
         if not woo_common_log_id.log_lines:
+            # The mark is moved only when every page is fetched without error, so a failed
+            # page is requested again by the next incremental import.
+            woo_instance_id.last_product_import_date = import_start_date
             woo_common_log_id.unlink()
         end = time.time()
         _logger.info("Created product queues time -- %s -- seconds." % (str(end - start)))
@@ -412,7 +422,9 @@ class WooProcessImportExport(models.TransientModel):
         woo_sync_customer_obj = self.env['woo.customer.data.queue.ept']
         woo_sync_customer_data = self.env['woo.customer.data.queue.line.ept']
 
-        for customer_queue in split_every(101, customers):
+        queue_size = self.env["woo.queue.chunk.policy.ept"].get_queue_chunk_policy(
+            self.woo_instance_id, "customer")["queue_size"]
+        for customer_queue in split_every(queue_size, customers):
             queue = woo_sync_customer_obj.create({"woo_instance_id":self.woo_instance_id.id,'created_by':created_by})
             _logger.info("Created customer queue: %s" % queue.display_name)
             sync_vals = {
@@ -445,6 +457,8 @@ class WooProcessImportExport(models.TransientModel):
                 "Product Data Queue {0} created. Adding data in it.....".format(queue_obj.name))
         queue_obj_list = [queue_obj]
         sync_queue_vals_line = self.prepare_product_queue_line_vals(queue_obj)
+        queue_size = self.env["woo.queue.chunk.policy.ept"].get_queue_chunk_policy(
+            self.woo_instance_id, "product")["queue_size"]
 
         for woo_product in woo_products:
             sync_queue_vals_line.update(
@@ -455,7 +469,7 @@ class WooProcessImportExport(models.TransientModel):
                         'name':woo_product.get('name')
                     })
             woo_product_synced_queue_line_obj.create(sync_queue_vals_line)
-            if len(queue_obj.queue_line_ids) == 101:
+            if len(queue_obj.queue_line_ids) >= queue_size:
                 queue_obj = self.create_product_queue(created_by="import")
                 _logger.info(
                         "Product Data Queue {0} created. Adding data in it.....".format(
@@ -932,90 +946,194 @@ class WooProcessImportExport(models.TransientModel):
         if self.file_name and not self.file_name.lower().endswith('.csv'):
             raise UserError(_("Please provide only CSV File to Import Products"))
 
-        file_data = self.read_csv_file()
-
-        required_field = ['template_name', 'product_name', 'product_default_code',
-                          'woo_product_default_code', 'product_description', 'sale_description',
-                          'PRODUCT_TEMPLATE_ID', 'PRODUCT_ID', 'CATEGORY_ID']
-        for required_field in required_field:
-            if not required_field in file_data.fieldnames:
-                raise UserError(_("Required Column %s Is Not Available In CSV File") % required_field)
+        csv_file = self.open_csv_file()
+        try:
+            file_data = csv.DictReader(csv_file, delimiter=',')
+            required_field = ['template_name', 'product_name', 'product_default_code',
+                              'woo_product_default_code', 'product_description', 'sale_description',
+                              'PRODUCT_TEMPLATE_ID', 'PRODUCT_ID', 'CATEGORY_ID']
+            for required_field in required_field:
+                if not required_field in (file_data.fieldnames or []):
+                    raise UserError(_("Required Column %s Is Not Available In CSV File") % required_field)
+
+            woo_common_log_id = woo_common_log_obj.create(
+                    {
+                        'type':'import',
+                        'module':'woocommerce_ept',
+                        'woo_instance_id':instance_id.id,
+                        'active':True,
+                        'model_id':model_id,
+                    })
 
-        woo_common_log_id = woo_common_log_obj.create(
-                {
-                    'type':'import',
-                    'module':'woocommerce_ept',
-                    'woo_instance_id':instance_id.id,
-                    'active':True,
-                    'model_id':model_id,
-                })
+            batch_size = self.get_csv_import_batch_size()
+            row_no = 0
+            records = []
+            processed_template_ids = set()
+            woo_category_dict = {}
+            for record in file_data:
+                if not record['PRODUCT_TEMPLATE_ID'] or not record['PRODUCT_ID']:
+                    message = ""
+                    if not record['PRODUCT_TEMPLATE_ID']:
+                        if message:
+                            message += ', \n'
+                        message += 'Product Template Id not available in Row Number %s' % row_no
+                    if not record['PRODUCT_ID']:
+                        if message:
+                            message += ', \n'
+                        message += 'Product Id not available in Row Number %s' % row_no
+                    vals = {
+                        'message':message,
+                        'model_id':model_id,
+                        'log_book_id':woo_common_log_id.id,
+                    }
+                    common_log_line_obj.create(vals)
+                    row_no += 1
+                    continue
 
-        row_no = 0
-        product_tmpl_list = []
-        for record in file_data:
-            if not record['PRODUCT_TEMPLATE_ID'] or not record['PRODUCT_ID']:
-                message = ""
-                if not record['PRODUCT_TEMPLATE_ID']:
-                    if message:
-                        message += ', \n'
-                    message += 'Product Template Id not available in Row Number %s' % row_no
-                if not record['PRODUCT_ID']:
-                    if message:
-                        message += ', \n'
-                    message += 'Product Id not available in Row Number %s' % row_no
-                vals = {
-                    'message':message,
-                    'model_id':model_id,
-                    'log_book_id':woo_common_log_id.id,
-                }
-                common_log_line_obj.create(vals)
+                records.append(record)
                 row_no += 1
-                continue
-
-            product_tmpl_id = record['PRODUCT_TEMPLATE_ID']
-            if product_tmpl_id not in product_tmpl_list:
-                woo_template = self.create_or_update_woo_template(instance_id, record)
-
-            product_tmpl_list.append(product_tmpl_id)
-
-            self.create_or_update_woo_variant(instance_id, record, woo_template)
-
-            row_no += 1
+                if len(records) >= batch_size:
+                    self.import_csv_batch(instance_id, records, processed_template_ids, woo_category_dict)
+                    records = []
+                    self.notify_csv_import_progress(row_no)
+                    self._cr.commit()
+            if records:
+                self.import_csv_batch(instance_id, records, processed_template_ids, woo_category_dict)
+            self.notify_csv_import_progress(row_no, done=True)
+        finally:
+            csv_file.close()
 
         if not woo_common_log_id.log_lines:
             woo_common_log_id.unlink()
 
         return True
 
-    def read_csv_file(self):
+    def open_csv_file(self):
         """
-            Read selected .csv file based on delimiter
-            @author: Dipak Gogiya @Emipro Technologies Pvt. Ltd
-            :return: It will return the object of csv file data
-            Migration done by Haresh Mori @ Emipro on date 14 September 2020 .
+            Opens the selected .csv file to read it row by row. The file is read from the filestore
+            when it is stored there, so it is not loaded in memory as a whole.
+            :return: It will return the file object of csv file
         """
-        self.write({'csv_data':self.choose_file})
-        self._cr.commit()
-        import_file = BytesIO(base64.decodebytes(self.csv_data))
-        file_read = StringIO(import_file.read().decode())
-        reader = csv.DictReader(file_read, delimiter=',')
-        return reader
-
-    def create_or_update_woo_template(self, instance_id, record):
-        """ This method uses to create/update the Woocmmerce layer template.
-            @param : self, instance_id
-            @return: woo_template
-            @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 14 September 2020 .
-            Task_id: 165896
+        attachment = self.env['ir.attachment'].sudo().search([('res_model', '=', self._name),
+                                                              ('res_id', '=', self.id),
+                                                              ('res_field', '=', 'choose_file')],
+                                                             limit=1)
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), newline='',
+                        encoding='utf-8-sig')
+        return StringIO(base64.decodebytes(self.choose_file).decode('utf-8-sig'), newline='')
+
+    def notify_csv_import_progress(self, row_no, done=False):
+        """
+            Shows the number of imported CSV rows to the user, the notification is sent with the
+            commit of each batch.
+        """
+        message = "%s %s rows of the CSV file in Woo layer." % (
+            "Imported" if done else "Importing, done", row_no)
+        _logger.info(message)
+        self.env['bus.bus'].sendone((self._cr.dbname, 'res.partner', self.env.user.partner_id.id),
+                                    {'type':'simple_notification',
+                                     'title':'Woocomerce Connector', 'message':message,
+                                     'sticky':False, 'warning':False})
+
+    def get_csv_import_batch_size(self):
+        """
+            Gives the number of CSV rows imported together, it can be set with the system parameter
+            woo_commerce_ept.csv_import_batch_size.
+        """
+        batch_size = self.env["ir.config_parameter"].sudo().get_param(
+                "woo_commerce_ept.csv_import_batch_size", "500")
+        try:
+            return max(int(batch_size), 1)
+        except ValueError:
+            return 500
+
+    def import_csv_batch(self, instance_id, records, processed_template_ids, woo_category_dict):
+        """ This method uses to create/update the Woocmmerce layer templates and variants of the CSV
+            rows at once. Existing layer records are searched once for the batch and missing ones are
+            created with one create call.
+            @param records: Rows of the CSV file.
+            @param processed_template_ids: Product template ids already imported in previous batches,
+            a template is created/updated from its first row only.
         """
-        product_tmpl_obj = self.env['product.template']
         woo_product_template = self.env['woo.product.template.ept']
-        category_obj = self.env['product.category']
+        woo_product_obj = self.env['woo.product.product.ept']
         woo_prepare_product_for_export_obj = self.env['woo.prepare.product.for.export.ept']
-        woo_category_dict = {}
-        woo_template = woo_product_template.search(
+        set_sales_description = self.env["ir.config_parameter"].sudo().get_param(
+                "woo_commerce_ept.set_sales_description")
+
+        template_records = {}
+        for record in records:
+            template_records.setdefault(int(record['PRODUCT_TEMPLATE_ID']), record)
+        woo_templates = {woo_template.product_tmpl_id.id:woo_template for woo_template in
+                         woo_product_template.search([('woo_instance_id', '=', instance_id.id),
+                                                      ('product_tmpl_id', 'in',
+                                                       list(template_records.keys()))])}
+
+        woo_categories = {}
+        woo_template_vals_list = []
+        updated_woo_templates = woo_product_template
+        for product_tmpl_id, record in template_records.items():
+            if product_tmpl_id in processed_template_ids:
+                continue
+            processed_template_ids.add(product_tmpl_id)
+            woo_template_vals = self.prepare_woo_template_vals_from_csv(instance_id, record,
+                                                                        set_sales_description,
+                                                                        woo_categories,
+                                                                        woo_category_dict)
+            woo_template = woo_templates.get(product_tmpl_id)
+            if woo_template:
+                woo_template.write(woo_template_vals)
+                updated_woo_templates += woo_template
+            else:
+                woo_template_vals_list.append(woo_template_vals)
+        new_woo_templates = woo_product_template.create(woo_template_vals_list)
+        for woo_template in new_woo_templates:
+            woo_templates.update({woo_template.product_tmpl_id.id:woo_template})
+
+        woo_variant_vals = {}
+        for record in records:
+            woo_template = woo_templates[int(record['PRODUCT_TEMPLATE_ID'])]
+            woo_variant_vals.update({(int(record['PRODUCT_ID']), woo_template.id):{
+                'woo_instance_id':instance_id.id,
+                'product_id':int(record['PRODUCT_ID']),
+                'woo_template_id':woo_template.id,
+                'default_code':record['woo_product_default_code'],
+                'name':record['product_name'],
+            }})
+        existing_woo_variants = woo_product_obj.search(
                 [('woo_instance_id', '=', instance_id.id),
-                 ('product_tmpl_id', '=', int(record['PRODUCT_TEMPLATE_ID']))])
+                 ('product_id', 'in', [key[0] for key in woo_variant_vals]),
+                 ('woo_template_id', 'in', [key[1] for key in woo_variant_vals])])
+        existing_keys = set()
+        for woo_variant in existing_woo_variants:
+            key = (woo_variant.product_id.id, woo_variant.woo_template_id.id)
+            vals = woo_variant_vals.get(key)
+            if not vals:
+                continue
+            existing_keys.add(key)
+            if woo_variant.default_code != vals['default_code'] or woo_variant.name != vals['name']:
+                woo_variant.write(vals)
+        new_woo_variants = woo_product_obj.create([vals for key, vals in woo_variant_vals.items()
+                                                   if key not in existing_keys])
+
+        # For adding all odoo images into Woo layer.
+        woo_prepare_product_for_export_obj.create_woo_layer_images(
+                updated_woo_templates + new_woo_templates,
+                existing_woo_variants.filtered(
+                        lambda x:(x.product_id.id, x.woo_template_id.id) in existing_keys) +
+                new_woo_variants)
+        return True
+
+    def prepare_woo_template_vals_from_csv(self, instance_id, record, set_sales_description,
+                                           woo_categories, woo_category_dict):
+        """ This method uses to prepare the Woocmmerce layer template vals from the CSV row.
+            @param woo_categories: Dictionary of {category id: woo category} resolved in the batch.
+            @return: woo_template_vals
+        """
+        product_tmpl_obj = self.env['product.template']
+        category_obj = self.env['product.category']
+        woo_prepare_product_for_export_obj = self.env['woo.prepare.product.for.export.ept']
         product_template = product_tmpl_obj.browse(int(record['PRODUCT_TEMPLATE_ID']))
         if len(product_template.product_variant_ids) == 1:
             product_type = 'simple'
@@ -1028,56 +1146,18 @@ class WooProcessImportExport(models.TransientModel):
             'woo_product_type':product_type
         }
 
-        if self.env["ir.config_parameter"].sudo().get_param(
-                "woo_commerce_ept.set_sales_description"):
+        if set_sales_description:
             woo_template_vals.update({'woo_description':record.get('sale_description'),
                                       'woo_short_description':record.get('product_description')})
 
-        categ_id = category_obj.browse(int(record.get('CATEGORY_ID'))) if record.get(
-                'CATEGORY_ID') else ''
-
-        if categ_id:
-            woo_category_dict = woo_prepare_product_for_export_obj.create_categ_in_woo(categ_id, instance_id.id, woo_category_dict)
-            woo_categ_id = woo_prepare_product_for_export_obj.update_category_info(categ_id, instance_id.id)
-            woo_template_vals.update({'woo_categ_ids':[(6, 0, woo_categ_id.ids)]})
-
-        if not woo_template:
-            woo_template = woo_product_template.create(woo_template_vals)
-        else:
-            woo_template.write(woo_template_vals)
-
-        # For adding all odoo images into Woo layer.
-        woo_prepare_product_for_export_obj.create_woo_template_images(woo_template)
-
-        return woo_template
-
-    def create_or_update_woo_variant(self, instance_id, record, woo_template):
-        """ This method uses to create/update the Woocmmerce layer variant.
-            @param : self, instance_id, record, woo_template
-            @return: woo_template
-            @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 14 September 2020 .
-            Task_id: 165896
-        """
-        woo_product_obj = self.env['woo.product.product.ept']
-        woo_prepare_product_for_export_obj = self.env['woo.prepare.product.for.export.ept']
-        woo_variant = woo_product_obj.search(
-                [('woo_instance_id', '=', instance_id.id), ('product_id', '=', int(record['PRODUCT_ID'])),
-                 ('woo_template_id', '=', woo_template.id)])
-
-        woo_variant_vals = ({
-            'woo_instance_id':instance_id.id,
-            'product_id':int(record['PRODUCT_ID']),
-            'woo_template_id':woo_template.id,
-            'default_code':record['woo_product_default_code'],
-            'name':record['product_name'],
-        })
-
-        if not woo_variant:
-            woo_variant = woo_product_obj.create(woo_variant_vals)
-        else:
-            woo_variant.write(woo_variant_vals)
-
-        # For adding all odoo images into Woo layer.
-        woo_prepare_product_for_export_obj.create_woo_variant_images(woo_template.id, woo_variant)
-
-        return woo_variant
+        if record.get('CATEGORY_ID'):
+            categ_id = int(record.get('CATEGORY_ID'))
+            if categ_id not in woo_categories:
+                category = category_obj.browse(categ_id)
+                woo_prepare_product_for_export_obj.create_categ_in_woo(category, instance_id.id,
+                                                                       woo_category_dict,
+                                                                       ctg_list=[])
+                woo_categories.update({categ_id:woo_prepare_product_for_export_obj.update_category_info(
+                        category, instance_id.id)})
+            woo_template_vals.update({'woo_categ_ids':[(6, 0, woo_categories[categ_id].ids)]})
+        return woo_template_vals
@@ -1 +1,2 @@
-from . import product_ept
\ No newline at end of file
+from . import product_ept
+from . import instance_ept
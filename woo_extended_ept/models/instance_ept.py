@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+# See LICENSE file for full copyright and licensing details.
+from odoo import models
+
+
+class WooInstanceEpt(models.Model):
+    _inherit = "woo.instance.ept"
+
+    def get_woo_default_import_fields(self, entity):
+        """ Inherit the connector-based method to request the menu order of the variations, it is
+            set as the sequence of the variant while sync products from Woocommerce store to Odoo.
+        """
+        import_fields = super(WooInstanceEpt, self).get_woo_default_import_fields(entity)
+        if entity == 'variation' and 'menu_order' not in import_fields:
+            import_fields.append('menu_order')
+        return import_fields
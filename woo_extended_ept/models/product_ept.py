@@ -9,13 +9,14 @@ _logger = logging.getLogger("WooCommerce")
 class WooProductTemplateEpt(models.Model):
     _inherit = "woo.product.template.ept"
 
-    def get_variant_data(self, variant, instance, update_image):
+    def get_variant_data(self, variant, instance, update_image, woo_attribute_index=False):
         """ Inherit the connector-based method to set the sequence of variant and also set the hex code in the meta
             data field.
             @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 8 January 2021 .
             Task_id: 169550 - Woo Commerce Color picker
         """
-        variant_vals = super(WooProductTemplateEpt, self).get_variant_data(variant, instance, update_image)
+        variant_vals = super(WooProductTemplateEpt, self).get_variant_data(variant, instance, update_image,
+                                                                           woo_attribute_index)
         product_template_attribute_value = variant.product_id.product_template_attribute_value_ids.filtered(
             lambda attribute: attribute.display_type == 'color') or False
         if product_template_attribute_value and len(
@@ -28,7 +29,8 @@ class WooProductTemplateEpt(models.Model):
         return variant_vals
 
     def prepare_product_variant_dict(self, instance, template, data, basic_detail, update_price,
-                                     update_image, common_log_id, model_id):
+                                     update_image, common_log_id, model_id,
+                                     woo_attribute_index=False):
         """
         This method is used for prepare the product variant dict based on parameters.
         Maulik : Updates variant in this method. Creates new variant, if not exported in woo.
@@ -41,6 +43,7 @@ class WooProductTemplateEpt(models.Model):
         :param update_image: It contain Either True or False and its type is Boolean
         :param common_log_id: It contain the log book id and its type is object
         :param model_id: It contain the id of the model class
+        :param woo_attribute_index: Woo attribute index of the export run
         :return: It will return the updated data dictionary
         @author: Dipak Gogiya @Emipro Technologies Pvt. Ltd
         Migration done by Haresh Mori @ Emipro on date 21 September 2020 .
@@ -63,12 +66,13 @@ class WooProductTemplateEpt(models.Model):
                     info.update({'meta_data': meta_data})
 
                 if basic_detail:
-                    weight = self.convert_weight_by_uom(variant.product_id.weight, instance)
-                    info.update({'sku': variant.default_code, 'weight': str(weight),
+                    variant_data = self.get_export_variant_data(instance, variant, woo_attribute_index)
+                    info.update({'sku': variant.default_code, 'weight': variant_data['weight'],
                                  "manage_stock": variant.woo_is_manage_stock})
             else:
-                attributes = self.get_product_attribute(template.product_tmpl_id, instance, common_log_id, model_id)[0]
-                info = self.get_variant_data(variant, instance, False)
+                attributes = self.get_product_attribute(template.product_tmpl_id, instance, common_log_id, model_id,
+                                                        woo_attribute_index)[0]
+                info = self.get_variant_data(variant, instance, False, woo_attribute_index)
 
             if update_image:
                 info.update(self.get_variant_image(instance, variant))